@@ -0,0 +1,110 @@
+"""
+exposure.py – per-position exposure and weight for the whole book in one pass.
+
+The old ``get_open_positions_weight`` converted each position on its own
+(``DataFrame.apply`` → ``convert_to_account_currency``): an ``initialize``,
+a ``symbol_info`` and one or two ticks per row.  Here a snapshot
+
+    1. reads positions and the account once,
+    2. fetches the contract spec once per unique symbol,
+    3. prices each unique profit currency once through the FX graph (fx.py),
+
+and everything after that is NumPy column arithmetic over the positions,
+with the per-symbol values broadcast back through ``np.unique``'s inverse
+index:
+
+    exposure  = volume × price_open × contract_size × rate[profit ccy]
+    direction = -1 for sells, +1 otherwise
+    weight    = round(exposure × direction / balance, 3)
+
+    frame, balance, currency = position_exposures()   # position columns + the above
+    frame[["symbol", "weight"]]
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+import MetaTrader5 as mt5
+import numpy as np
+import pandas as pd
+
+from RISKCODE.fx import FxGraph
+
+WEIGHT_DECIMALS = 3
+
+
+class SymbolSpec(NamedTuple):
+    contract_size: float
+    currency_profit: str
+
+
+def initialize_mt5():
+    if not mt5.initialize():
+        raise RuntimeError(f"MetaTrader5 initialization failed, error code: {mt5.last_error()}")
+
+
+# --------------------------------------------------------------------------- #
+# Per-snapshot lookups (one terminal call per unique symbol)
+# --------------------------------------------------------------------------- #
+
+def symbol_specs(symbols: Iterable[str]) -> Dict[str, SymbolSpec]:
+    specs = {}
+    for symbol in symbols:
+        info = mt5.symbol_info(symbol)
+        if not info:
+            raise RuntimeError(f"Symbol {symbol} not found")
+        specs[symbol] = SymbolSpec(float(info.trade_contract_size), info.currency_profit)
+    return specs
+
+
+# --------------------------------------------------------------------------- #
+# Exposure
+# --------------------------------------------------------------------------- #
+
+def account_snapshot() -> Tuple[tuple, float, str]:
+    """``(positions, balance, currency)`` – one positions and one account call."""
+    initialize_mt5()
+    positions = mt5.positions_get()
+    if positions is None:
+        raise RuntimeError(f"Failed to retrieve positions, error code: {mt5.last_error()}")
+    account = mt5.account_info()
+    if account.balance <= 0:
+        raise ValueError("Account balance is zero or negative.")
+    return positions, float(account.balance), account.currency
+
+
+def exposures(positions, balance: float, account_currency: str) -> pd.DataFrame:
+    """Positions frame plus contract_size, currency_profit, rate, exposure,
+    direction and weight columns."""
+    if not positions:
+        return pd.DataFrame(columns=["symbol", "volume", "price", "type", "time", "contract_size",
+                                     "currency_profit", "rate", "exposure", "direction", "weight"])
+    frame = pd.DataFrame.from_records(positions, columns=positions[0]._fields)
+
+    symbols, at = np.unique(frame["symbol"].to_numpy(dtype=str), return_inverse=True)
+    specs = symbol_specs(symbols.tolist())
+    contract = np.array([specs[s].contract_size for s in symbols])
+    currency = np.array([specs[s].currency_profit for s in symbols], dtype=object)
+    rate = FxGraph.shared().rates(currency, account_currency)
+
+    volume = frame["volume"].to_numpy(dtype=float)
+    price = frame["price_open"].to_numpy(dtype=float)
+    direction = np.where(frame["type"].to_numpy() == mt5.ORDER_TYPE_SELL, -1, 1)
+    exposure = volume * price * contract[at] * rate[at]
+
+    frame["volume"], frame["price"] = volume, price
+    frame["contract_size"], frame["currency_profit"], frame["rate"] = contract[at], currency[at], rate[at]
+    frame["exposure"], frame["direction"] = exposure, direction
+    frame["weight"] = np.round(exposure * direction / balance, WEIGHT_DECIMALS)
+    return frame
+
+
+def position_exposures() -> Tuple[pd.DataFrame, float, str]:
+    """Exposure frame for the live book, with the balance and account currency."""
+    positions, balance, currency = account_snapshot()
+    return exposures(positions, balance, currency), balance, currency
+
+
+def format_weights(weights: np.ndarray) -> list:
+    return [f"{x: .0%}" for x in weights]
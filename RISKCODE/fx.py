@@ -0,0 +1,165 @@
+"""
+fx.py – currency conversion through a graph of the terminal's FX pairs.
+
+Every symbol the terminal offers whose base and profit currencies are two
+different ISO codes is an edge: base → profit converts at the bid, profit →
+base at one over the ask (the side you would actually deal on).  A rate
+between any two currencies is the product along the shortest path, with the
+USD and EUR legs tried first, so SEK → JPY goes SEK→USD→JPY (two ticks)
+instead of failing because neither SEKJPY nor JPYSEK exists.
+
+Ticks are cached for ``TICK_TTL`` seconds and paths for the life of the
+graph, so converting a whole column costs one tick per pair on the paths
+of its distinct currencies, once per TTL:
+
+    fx = FxGraph.shared()
+    fx.rate("SEK", "JPY")
+    df["pnl_usd"] = fx.convert(df["pnl"], df["currency"], "USD")
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import MetaTrader5 as mt5
+import numpy as np
+import pandas as pd
+
+TICK_TTL  = 5.0               # seconds a tick is reused
+HUBS      = ("USD", "EUR")    # preferred intermediate currencies
+GRAPH_TTL = 3600.0            # rebuild the symbol graph after this long
+
+Edge = Tuple[str, bool]       # (symbol, True = multiply by bid / False = divide by ask)
+
+
+def _is_ccy(code: str) -> bool:
+    return len(code) == 3 and code.isalpha()
+
+
+class FxGraph:
+    """Currency graph with cached ticks; one per process is enough."""
+
+    _shared: Optional["FxGraph"] = None
+
+    def __init__(self, symbols: Optional[Sequence] = None, ttl: float = TICK_TTL):
+        self.ttl = ttl
+        self._edges: Dict[str, Dict[str, Edge]] = {}
+        self._order: Dict[str, List[str]] = {}                       # neighbours, hubs first
+        self._paths: Dict[Tuple[str, str], Optional[List[Edge]]] = {}
+        self._ticks: Dict[str, Tuple[float, float, float]] = {}    # symbol → (t, bid, ask)
+        self.built = 0.0
+        self.build(symbols)
+
+    @classmethod
+    def shared(cls) -> "FxGraph":
+        if cls._shared is None or time.monotonic() - cls._shared.built > GRAPH_TTL:
+            cls._shared = cls()
+        return cls._shared
+
+    # ------------------------------------------------------------------ #
+    # Graph
+    # ------------------------------------------------------------------ #
+    def build(self, symbols: Optional[Sequence] = None):
+        """(Re)build from ``symbols`` (``symbol_info`` tuples, default all the
+        terminal offers)."""
+        if symbols is None:
+            if not mt5.initialize():
+                raise RuntimeError(f"MetaTrader5 initialization failed, error code: {mt5.last_error()}")
+            symbols = mt5.symbols_get() or ()
+        self._edges.clear()
+        self._order.clear()
+        self._paths.clear()
+        for s in symbols:
+            base, profit = s.currency_base, s.currency_profit
+            if base == profit or not (_is_ccy(base) and _is_ccy(profit)):
+                continue
+            # keep the first listing of a pair (suffixed duplicates like EURUSD.r come later)
+            self._edges.setdefault(base, {}).setdefault(profit, (s.name, True))
+            self._edges.setdefault(profit, {}).setdefault(base, (s.name, False))
+        hub_rank = {c: i for i, c in enumerate(HUBS)}
+        for ccy, nxt in self._edges.items():
+            self._order[ccy] = sorted(nxt, key=lambda c: hub_rank.get(c, len(HUBS)))
+        self.built = time.monotonic()
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted(self._edges)
+
+    def path(self, src: str, dst: str) -> Optional[List[Edge]]:
+        """Fewest-legs route from ``src`` to ``dst`` (hubs first on ties)."""
+        key = (src, dst)
+        if key not in self._paths:
+            self._paths[key] = self._search(src, dst)
+        return self._paths[key]
+
+    def _search(self, src: str, dst: str) -> Optional[List[Edge]]:
+        if src == dst:
+            return []
+        if src not in self._edges or dst not in self._edges:
+            return None
+        prev: Dict[str, Tuple[str, Edge]] = {src: (src, ("", True))}
+        todo = deque([src])
+        while todo:
+            cur = todo.popleft()
+            for ccy in self._order[cur]:
+                if ccy in prev:
+                    continue
+                prev[ccy] = (cur, self._edges[cur][ccy])
+                if ccy == dst:
+                    legs = []
+                    while ccy != src:
+                        ccy, edge = prev[ccy]
+                        legs.append(edge)
+                    return legs[::-1]
+                todo.append(ccy)
+        return None
+
+    # ------------------------------------------------------------------ #
+    # Rates
+    # ------------------------------------------------------------------ #
+    def _tick(self, symbol: str) -> Tuple[float, float]:
+        now = time.monotonic()
+        cached = self._ticks.get(symbol)
+        if cached and now - cached[0] < self.ttl:
+            return cached[1], cached[2]
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is None and mt5.symbol_select(symbol, True):      # not in Market Watch yet
+            tick = mt5.symbol_info_tick(symbol)
+        if tick is None or not tick.bid or not tick.ask:
+            raise RuntimeError(f"No tick for {symbol}")
+        self._ticks[symbol] = (now, tick.bid, tick.ask)
+        return tick.bid, tick.ask
+
+    def rate(self, src: str, dst: str) -> float:
+        """Units of ``dst`` per unit of ``src``."""
+        legs = self.path(src, dst)
+        if legs is None:
+            raise RuntimeError(f"Cannot find conversion rate for {src} to {dst}")
+        rate = 1.0
+        for symbol, forward in legs:
+            bid, ask = self._tick(symbol)
+            rate = rate * bid if forward else rate / ask
+        return rate
+
+    def rates(self, currencies: Iterable[str], dst: str) -> np.ndarray:
+        """``rate(c, dst)`` for every element, each distinct currency priced once."""
+        at, uniq = pd.factorize(np.asarray(currencies, dtype=object))   # hashing, no sort
+        if (at < 0).any():
+            raise ValueError("Missing currency in conversion column")
+        if not len(uniq):
+            return np.empty(len(at))
+        return np.array([self.rate(c, dst) for c in uniq])[at]
+
+    def convert(self, amounts, currencies, dst: str) -> np.ndarray:
+        """``amounts`` (in the matching ``currencies``) expressed in ``dst``."""
+        return np.asarray(amounts, dtype=float) * self.rates(currencies, dst)
+
+
+def rate(src: str, dst: str) -> float:
+    return FxGraph.shared().rate(src, dst)
+
+
+def convert(amounts, currencies, dst: str) -> np.ndarray:
+    return FxGraph.shared().convert(amounts, currencies, dst)
@@ -0,0 +1,273 @@
+"""
+history.py – local OHLC cache per symbol/timeframe, synced incrementally from MT5,
+and timestamp-aligned return / covariance / beta for many symbols at once.
+
+Each ``data/rates/<SYMBOL>.<TF>.bin`` is a flat array of ``RATE_DTYPE``
+records (the layout ``copy_rates_*`` returns), oldest first.  A sync asks the
+terminal only for the bars since the last stored one; that last bar is
+fetched again and replaced, because it may still have been forming when it
+was stored.  A torn append (crash mid-write) is cut back to whole records on
+the next open.
+
+    store = RateStore()
+    store.sync("US500")                            # first call: HISTORY_BARS bars
+    times, closes = store.closes(["US500", "EURUSD", "GER40"], count=756)
+    times, rets = returns(times, closes)           # one (T, N) matrix
+    cov = covariance(rets)
+    beta = betas(cov, 0)                           # every column vs. US500
+
+``closes`` aligns on bar timestamps, not row numbers: only times every symbol
+has a bar for are kept, so an exchange holiday becomes one longer return
+for everybody instead of shifting one series against the others.
+
+CLI:
+
+    python -m RISKCODE.history sync US500 EURUSD GER40
+    python -m RISKCODE.history show US500 --tail 5
+    python -m RISKCODE.history beta US500 EURUSD GER40 --bench US500
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import MetaTrader5 as mt5
+import numpy as np
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+RATES_DIR    = Path(__file__).resolve().parents[1] / "data" / "rates"
+HISTORY_BARS = 3 * 252        # bars fetched for a symbol seen for the first time
+MIN_SYNC     = 60.0           # seconds between terminal queries per symbol/timeframe
+BENCHMARK    = "US500"
+
+RATE_DTYPE = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                       ("close", "<f8"), ("tick_volume", "<u8"), ("spread", "<i4"),
+                       ("real_volume", "<u8")])
+
+# name → bar length in seconds (MN1 approximate – only used to size a fetch)
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600,
+                     "H4": 14_400, "D1": 86_400, "W1": 604_800, "MN1": 2_678_400}
+
+
+def timeframe_code(name: str) -> int:
+    code = getattr(mt5, f"TIMEFRAME_{name}", None)
+    if code is None or name not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Unknown timeframe {name}")
+    return code
+
+
+# --------------------------------------------------------------------------- #
+# Store
+# --------------------------------------------------------------------------- #
+
+class RateStore:
+    def __init__(self, root: Path | str = RATES_DIR, history: int = HISTORY_BARS,
+                 min_sync: float = MIN_SYNC):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.history = history
+        self.min_sync = min_sync
+        self._synced: Dict[Tuple[str, str], float] = {}
+        self._cache: Dict[Path, Tuple[Tuple[int, int], np.ndarray]] = {}   # by (size, mtime)
+        self._lock = threading.Lock()      # one sync at a time – each truncates and rewrites
+
+    def path(self, symbol: str, timeframe: str = "D1") -> Path:
+        return self.root / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', symbol)}.{timeframe}.bin"
+
+    def read(self, symbol: str, timeframe: str = "D1") -> np.ndarray:
+        """Stored bars, oldest first (empty if never synced)."""
+        path = self.path(symbol, timeframe)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return np.empty(0, RATE_DTYPE)
+        cached = self._cache.get(path)
+        if cached and cached[0] == (st.st_size, st.st_mtime_ns):
+            return cached[1]
+        whole = st.st_size - st.st_size % RATE_DTYPE.itemsize
+        if whole != st.st_size:                    # torn append – drop the partial record
+            with path.open("r+b") as f:
+                f.truncate(whole)
+            st = path.stat()
+        rates = np.fromfile(path, dtype=RATE_DTYPE)
+        rates.flags.writeable = False              # shared with later readers
+        self._cache[path] = ((st.st_size, st.st_mtime_ns), rates)
+        return rates
+
+    def _fetch(self, symbol: str, timeframe: str, count: int) -> Optional[np.ndarray]:
+        rates = mt5.copy_rates_from_pos(symbol, timeframe_code(timeframe), 0, count)
+        if rates is None:
+            return None
+        out = np.empty(len(rates), RATE_DTYPE)
+        for name in RATE_DTYPE.names:
+            out[name] = rates[name]
+        return out
+
+    def sync(self, symbol: str, timeframe: str = "D1", force: bool = False) -> Optional[int]:
+        """Fetch bars newer than the last stored one; number of new bars, or
+        None when the terminal has no data for ``symbol``."""
+        with self._lock:
+            return self._sync(symbol, timeframe, force)
+
+    def _sync(self, symbol: str, timeframe: str, force: bool) -> Optional[int]:
+        key = (symbol, timeframe)
+        now = time.time()
+        if not force and now - self._synced.get(key, 0.0) < self.min_sync:
+            return 0
+        stored = self.read(symbol, timeframe)
+        if len(stored):
+            last = int(stored["time"][-1])
+            # bars since the last stored one, plus that one again (it may have been
+            # forming); weekends only make this an over-estimate
+            count = min(self.history, math.ceil((now - last) / TIMEFRAME_SECONDS[timeframe]) + 2)
+        else:
+            last, count = None, self.history
+        fresh = self._fetch(symbol, timeframe, count)
+        if fresh is None:
+            return None
+        self._synced[key] = now
+        if last is not None:
+            fresh = fresh[fresh["time"] >= last]
+        if not len(fresh):
+            return 0
+        path = self.path(symbol, timeframe)
+        keep = int(np.searchsorted(stored["time"], fresh["time"][0])) if len(stored) else 0
+        with path.open("r+b" if path.exists() else "wb") as f:
+            f.truncate(keep * RATE_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(fresh.tobytes())
+        return len(fresh) - (len(stored) - keep)
+
+    def bars(self, symbol: str, timeframe: str = "D1", count: Optional[int] = None,
+             sync: bool = True) -> np.ndarray:
+        if sync:
+            self.sync(symbol, timeframe)
+        rates = self.read(symbol, timeframe)
+        return rates[-count:] if count else rates
+
+    def closes(self, symbols: Sequence[str], timeframe: str = "D1", count: Optional[int] = None,
+               sync: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """``(times, closes)`` – bar times every symbol has, and a (T, N) close
+        matrix in ``symbols`` order.  ``count`` limits each history first."""
+        series = [self.bars(s, timeframe, count, sync) for s in symbols]
+        missing = [s for s, r in zip(symbols, series) if not len(r)]
+        if missing:
+            raise RuntimeError(f"No rate history for {', '.join(missing)}")
+        times = series[0]["time"]
+        for r in series[1:]:
+            if not np.array_equal(r["time"], times):      # usual case: same bars everywhere
+                times = np.intersect1d(times, r["time"], assume_unique=True)
+        matrix = np.empty((len(times), len(series)))
+        for j, r in enumerate(series):
+            same = np.array_equal(r["time"], times)
+            matrix[:, j] = r["close"] if same else r["close"][np.searchsorted(r["time"], times)]
+        return times, matrix
+
+
+# --------------------------------------------------------------------------- #
+# Returns / covariance / beta
+# --------------------------------------------------------------------------- #
+
+def returns(times: np.ndarray, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Simple returns between consecutive aligned bars (row t is t-1 → t)."""
+    return times[1:], closes[1:] / closes[:-1] - 1.0
+
+
+def covariance(rets: np.ndarray) -> np.ndarray:
+    """Sample covariance of the columns of ``rets`` (one matrix product)."""
+    centred = rets - rets.mean(axis=0)
+    return centred.T @ centred / max(len(rets) - 1, 1)
+
+
+def betas(cov: np.ndarray, bench: int) -> np.ndarray:
+    """Beta of every column against column ``bench``."""
+    return cov[:, bench] / cov[bench, bench]
+
+
+_default: Optional[RateStore] = None
+
+
+def default_store() -> RateStore:
+    global _default
+    if _default is None:
+        _default = RateStore()
+    return _default
+
+
+def portfolio_beta(weights: Dict[str, float], store: Optional[RateStore] = None,
+                   bench: str = BENCHMARK, timeframe: str = "D1",
+                   count: int = HISTORY_BARS) -> float:
+    """Σ weight × beta over the symbols in ``weights`` (symbols without
+    history are skipped with a message, like the old per-position loop)."""
+    store = store or default_store()
+    symbols = []
+    for s in weights:
+        if s != bench and store.sync(s, timeframe) is None and not len(store.read(s, timeframe)):
+            print(f"Failed to retrieve data for {s}, skipping.")
+            continue
+        symbols.append(s)
+    if store.sync(bench, timeframe) is None and not len(store.read(bench, timeframe)):
+        raise RuntimeError(f"Failed to retrieve {bench} data, error code: {mt5.last_error()}")
+    names = [bench] + [s for s in symbols if s != bench]
+    times, rets = returns(*store.closes(names, timeframe, count, sync=False))
+    beta = betas(covariance(rets), 0)
+    return float(sum(weights[s] * beta[names.index(s)] for s in symbols))
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Local MT5 rate history")
+    ap.add_argument("--timeframe", default="D1", choices=sorted(TIMEFRAME_SECONDS))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("sync", help="fetch new bars for symbols")
+    sp.add_argument("symbols", nargs="+")
+    sh = sub.add_parser("show", help="print stored bars")
+    sh.add_argument("symbol")
+    sh.add_argument("--tail", type=int, default=10)
+    bt = sub.add_parser("beta", help="betas and correlation vs. a benchmark")
+    bt.add_argument("symbols", nargs="+")
+    bt.add_argument("--bench", default=BENCHMARK)
+    bt.add_argument("--bars", type=int, default=HISTORY_BARS)
+    args = ap.parse_args(argv)
+
+    if not mt5.initialize():
+        raise RuntimeError(f"MetaTrader5 initialization failed, error code: {mt5.last_error()}")
+    store = RateStore()
+    if args.cmd == "sync":
+        for s in args.symbols:
+            n = store.sync(s, args.timeframe, force=True)
+            print(f"{s:<12} {'no data' if n is None else f'+{n} bars'}  "
+                  f"({len(store.read(s, args.timeframe)):,} stored)")
+    elif args.cmd == "show":
+        for bar in store.bars(args.symbol, args.timeframe, args.tail):
+            print(time.strftime("%Y-%m-%d %H:%M", time.gmtime(int(bar["time"]))),
+                  *(f"{bar[f]:.5f}" for f in ("open", "high", "low", "close")))
+    else:
+        names = [args.bench] + [s for s in args.symbols if s != args.bench]
+        times, rets = returns(*store.closes(names, args.timeframe, args.bars))
+        cov = covariance(rets)
+        sd = np.sqrt(np.diag(cov))
+        print(f"{len(rets)} aligned returns, "
+              f"{time.strftime('%Y-%m-%d', time.gmtime(int(times[0])))} → "
+              f"{time.strftime('%Y-%m-%d', time.gmtime(int(times[-1])))}")
+        for j, s in enumerate(names):
+            print(f"{s:<12} beta {cov[j, 0] / cov[0, 0]:6.2f}   corr {cov[j, 0] / (sd[j] * sd[0]):5.2f}")
+    mt5.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
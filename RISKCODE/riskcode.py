@@ -4,6 +4,8 @@ import pandas as pd
 import numpy as np
 import datetime
 
+from RISKCODE import fx
+
 def initialize_mt5():
     if not mt5.initialize():
         raise RuntimeError(f"MetaTrader5 initialization failed, error code: {mt5.last_error()}")
@@ -13,26 +15,8 @@ def convert_to_account_currency(symbol, volume, price, account_currency):
     symbol_info = mt5.symbol_info(symbol)
     if not symbol_info:
         raise RuntimeError(f"Symbol {symbol} not found")
-    contract_size = symbol_info.trade_contract_size
-    exposure_base = volume * price * contract_size
-    if symbol_info.currency_profit == account_currency:
-        return exposure_base
-    conversion_pair = f"{symbol_info.currency_profit}{account_currency}"
-    conversion_rate = None
-    try:
-        if mt5.symbol_info(conversion_pair):
-            conversion_rate = mt5.symbol_info_tick(conversion_pair).bid
-    except Exception:
-        conversion_rate = None
-    if conversion_rate is None:
-        reverse_pair = f"{account_currency}{symbol_info.currency_profit}"
-        try:
-            conversion_rate = 1 / mt5.symbol_info_tick(reverse_pair).ask
-        except Exception:
-            conversion_rate = None
-    if conversion_rate is None:
-        raise RuntimeError(f"Cannot find conversion rate for {symbol_info.currency_profit} to {account_currency}")
-    return exposure_base * conversion_rate
+    exposure_base = volume * price * symbol_info.trade_contract_size
+    return exposure_base * fx.rate(symbol_info.currency_profit, account_currency)
 
 def get_open_positions_weight():
     initialize_mt5()
@@ -69,28 +53,9 @@ def get_monthly_statistics():
     stats_df = pd.DataFrame(stats_data)
     account_currency = mt5.account_info().currency
 
-    def convert_pnl(row):
-        if row['currency'] == account_currency:
-            return float(row['pnl'])
-        conversion_pair = f"{row['currency']}{account_currency}"
-        conversion_rate = None
-        try:
-            if mt5.symbol_info(conversion_pair):
-                conversion_rate = mt5.symbol_info_tick(conversion_pair).bid
-        except Exception:
-            conversion_rate = None
-        if conversion_rate is None:
-            reverse_pair = f"{account_currency}{row['currency']}"
-            try:
-                conversion_rate = 1 / mt5.symbol_info_tick(reverse_pair).ask
-            except Exception:
-                conversion_rate = None
-        if conversion_rate is None:
-            raise RuntimeError(f"Cannot find conversion rate for {row['currency']} to {account_currency}")
-        return float(row['pnl']) * conversion_rate
-
     if {'currency', 'pnl'}.issubset(stats_df.columns):
-        stats_df['pnl_converted'] = stats_df.apply(convert_pnl, axis=1)
+        # one rate per distinct currency, crosses through USD/EUR – see fx.py
+        stats_df['pnl_converted'] = fx.convert(stats_df['pnl'].astype(float), stats_df['currency'], account_currency)
     else:
         raise KeyError("Missing required columns: 'currency' or 'pnl'")
     return stats_df['pnl_converted'].sum()
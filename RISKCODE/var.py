@@ -0,0 +1,296 @@
+"""
+var.py – value-at-risk and expected shortfall of the open book.
+
+Two views on the same weights (exposure × direction / balance, from
+exposure.py – the numbers behind ``get_open_positions_weight``):
+
+    parametric   delta-normal on an EWMA covariance (RiskMetrics, λ = 0.94)
+    historical   the book re-priced over the last HIST_WINDOW aligned daily
+                 returns, VaR = loss quantile, ES = mean loss beyond it
+
+The EWMA covariance is state, not a recomputation: ``data/risk/ewma.npz``
+holds the matrix, its symbols and the last bar folded in, and each refresh
+folds in only the bars that arrived since,
+
+    Σ ← λ^k Σ + Σ_j (1-λ) λ^(k-1-j) r_j r_jᵀ          (k new aligned returns)
+
+as one matrix product.  Only closed bars count: the current D1 bar is
+rewritten on every sync until the day ends, and a return taken from it
+would stay in Σ for good while its final close never made it in.  A symbol
+the state has not seen yet reseeds it from the cached history (history.py)
+once; symbols that are no longer held stay in the state so re-opening them
+costs nothing – until their bars stop (expired contract, delisting, removed
+from the terminal).  Returns are aligned on times every symbol shares, so one
+dead symbol would end the aligned history and freeze Σ: a symbol whose last
+bar is more than STALE_AFTER behind the freshest one is dropped from the
+state, or, if it is held, left out of the measure and reported.
+
+    engine = RiskEngine()
+    risk = engine.measure(weights, balance)            # weights: symbol → fraction
+    print(format_report(risk))
+
+    python -m RISKCODE.var                             # live book
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from RISKCODE.exposure import position_exposures
+from RISKCODE.history import HISTORY_BARS, TIMEFRAME_SECONDS, RateStore, default_store, returns
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+STATE_FILE   = Path(__file__).resolve().parents[1] / "data" / "risk" / "ewma.npz"
+LAMBDA       = 0.94           # RiskMetrics daily decay
+HIST_WINDOW  = 500            # daily returns for historical simulation
+LEVELS       = (0.95, 0.99)
+HORIZON      = 1              # days; √h scaling for both methods
+TOP          = 5              # contributors listed in the report
+STALE_AFTER  = 7 * 86_400     # seconds a symbol's last bar may trail the freshest one
+
+# --------------------------------------------------------------------------- #
+# EWMA covariance (incremental)
+# --------------------------------------------------------------------------- #
+
+class EwmaCovariance:
+    def __init__(self, lam: float = LAMBDA, path: Optional[Path | str] = STATE_FILE,
+                 period: int = TIMEFRAME_SECONDS["D1"]):
+        self.lam = lam
+        self.period = period                # bar length – a bar is closed once time + period ≤ now
+        self.path = Path(path) if path else None
+        self.symbols: List[str] = []
+        self.cov = np.zeros((0, 0))
+        self.last = 0                       # time of the newest return folded in
+        if self.path and self.path.exists():
+            self.load()
+
+    def load(self):
+        with np.load(self.path, allow_pickle=False) as z:
+            if float(z["lam"]) != self.lam:
+                return                      # different decay – start over
+            self.symbols = [str(s) for s in z["symbols"]]
+            self.cov = z["cov"]
+            self.last = int(z["last"])
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp, lam=self.lam, symbols=np.array(self.symbols, dtype=str),
+                 cov=self.cov, last=self.last)
+        os.replace(tmp, self.path)
+
+    def closed(self, times: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+        """Mask of rows whose bar has finished (its close is final)."""
+        return times + self.period <= (time.time() if now is None else now)
+
+    def seed(self, symbols: Sequence[str], times: np.ndarray, rets: np.ndarray,
+             now: Optional[float] = None):
+        """Start from the sample covariance and fold in the whole history."""
+        done = self.closed(times, now)
+        times, rets = times[done], rets[done]
+        self.symbols = list(symbols)
+        centred = rets - rets.mean(axis=0)
+        self.cov = centred.T @ centred / max(len(rets) - 1, 1)
+        self.last = 0
+        self.update(times, rets, now)
+
+    def update(self, times: np.ndarray, rets: np.ndarray, now: Optional[float] = None) -> int:
+        """Fold in the closed rows newer than ``last``; columns in ``symbols`` order."""
+        new = (times > self.last) & self.closed(times, now)
+        k = int(new.sum())
+        if not k:
+            return 0
+        r = rets[new]
+        w = (1 - self.lam) * self.lam ** np.arange(k - 1, -1, -1)
+        self.cov = self.lam ** k * self.cov + r.T @ (w[:, None] * r)
+        self.last = int(times[new][-1])
+        return k
+
+    def matrix(self, symbols: Sequence[str]) -> np.ndarray:
+        at = [self.symbols.index(s) for s in symbols]
+        return self.cov[np.ix_(at, at)]
+
+    def keep(self, symbols: Sequence[str]):
+        """Drop every other symbol (its row and column) from the state."""
+        self.cov = self.matrix(symbols)
+        self.symbols = list(symbols)
+
+
+# --------------------------------------------------------------------------- #
+# Measures
+# --------------------------------------------------------------------------- #
+
+@dataclass
+class Risk:
+    symbols: List[str]
+    weights: np.ndarray
+    balance: float
+    currency: str
+    vol: float                                   # 1-day σ of the book, fraction of balance
+    parametric: Dict[float, Tuple[float, float]]   # level → (VaR, ES), fractions of balance
+    historical: Dict[float, Tuple[float, float]]
+    contributions: np.ndarray                    # share of parametric variance per symbol
+    window: int                                  # historical returns used
+    horizon: int = HORIZON
+    unpriced: List[str] = field(default_factory=list)
+    ms: float = 0.0
+
+
+def parametric(w: np.ndarray, cov: np.ndarray, levels: Sequence[float] = LEVELS,
+               horizon: int = HORIZON) -> Tuple[float, Dict[float, Tuple[float, float]]]:
+    sigma = math.sqrt(max(float(w @ cov @ w), 0.0) * horizon)
+    out = {}
+    for a in levels:
+        z = NormalDist().inv_cdf(a)
+        out[a] = (z * sigma, sigma * NormalDist().pdf(z) / (1 - a))
+    return sigma, out
+
+
+def historical(w: np.ndarray, rets: np.ndarray, levels: Sequence[float] = LEVELS,
+               horizon: int = HORIZON) -> Dict[float, Tuple[float, float]]:
+    pnl = rets @ w * np.sqrt(horizon)
+    out = {}
+    for a in levels:
+        var = -float(np.quantile(pnl, 1 - a))
+        tail = pnl[pnl <= -var]
+        out[a] = (var, -float(tail.mean()) if len(tail) else var)
+    return out
+
+
+def contributions(w: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """Component share of the book's variance (sums to 1)."""
+    marginal = cov @ w
+    total = float(w @ marginal)
+    return w * marginal / total if total > 0 else np.zeros_like(w)
+
+
+# --------------------------------------------------------------------------- #
+# Engine
+# --------------------------------------------------------------------------- #
+
+class RiskEngine:
+    def __init__(self, store: Optional[RateStore] = None, ewma: Optional[EwmaCovariance] = None,
+                 window: int = HIST_WINDOW):
+        self.store = default_store() if store is None else store
+        self.ewma = EwmaCovariance() if ewma is None else ewma
+        self.window = window
+
+    def _priced(self, symbols: Sequence[str]) -> Tuple[List[str], List[str]]:
+        ok, missing = [], []
+        for s in symbols:
+            self.store.sync(s)
+            (ok if len(self.store.read(s)) > 1 else missing).append(s)
+        return ok, missing
+
+    def refresh(self, symbols: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Bring the EWMA state up to date for ``symbols``; (priced, unpriced)."""
+        held, missing = self._priced(symbols)
+        if not held:
+            return held, missing
+        universe, _ = self._priced(self.ewma.symbols)
+        last = {s: int(self.store.read(s)["time"][-1]) for s in {*held, *universe}}
+        newest = max(last.values())
+        stale = {s for s, t in last.items() if newest - t > STALE_AFTER}
+        if stale:
+            missing += [s for s in held if s in stale]
+            held = [s for s in held if s not in stale]
+            if not held:
+                return held, missing
+        universe = [s for s in universe if s not in stale]
+        changed = universe != self.ewma.symbols
+        if changed:
+            self.ewma.keep(universe)        # unpriced / stale symbols leave the state
+        times = None
+        if universe and not set(held) - set(universe):
+            times, closes = self.store.closes(universe, count=self.window, sync=False)
+            if self.ewma.last and times[0] > self.ewma.last:
+                times = None                # gap longer than the window – start over
+        if times is None:
+            universe += [s for s in held if s not in universe]
+            self.ewma.seed(universe, *returns(*self.store.closes(universe, count=HISTORY_BARS,
+                                                                 sync=False)))
+            self.ewma.save()
+        elif self.ewma.update(*returns(times, closes)) or changed:
+            self.ewma.save()
+        return held, missing
+
+    def measure(self, weights: Dict[str, float], balance: float, currency: str = "",
+                levels: Sequence[float] = LEVELS, horizon: int = HORIZON) -> Risk:
+        t0 = time.perf_counter()
+        held, missing = self.refresh([s for s, x in weights.items() if x])
+        w = np.array([weights[s] for s in held])
+        cov = self.ewma.matrix(held) if held else np.zeros((0, 0))
+        sigma, par = parametric(w, cov, levels, horizon)
+        if held:
+            _, hist = returns(*self.store.closes(held, count=self.window + 1, sync=False))
+        else:
+            hist = np.zeros((1, 0))
+        return Risk(held, w, balance, currency, sigma, par, historical(w, hist, levels, horizon),
+                    contributions(w, cov), len(hist), horizon, missing,
+                    (time.perf_counter() - t0) * 1000)
+
+
+def book_weights() -> Tuple[Dict[str, float], float, str]:
+    """Net weight per symbol of the live book, unrounded."""
+    frame, balance, currency = position_exposures()
+    if not len(frame):
+        return {}, balance, currency
+    net = (frame["exposure"] * frame["direction"] / balance).groupby(frame["symbol"]).sum()
+    return net.to_dict(), balance, currency
+
+
+# --------------------------------------------------------------------------- #
+# Report
+# --------------------------------------------------------------------------- #
+
+def format_report(risk: Risk) -> str:
+    if not len(risk.symbols):
+        return "*(No open positions)*" if not risk.unpriced else \
+            f"*(No recent rate history for {', '.join(risk.unpriced)})*"
+    dt = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+    def money(x):
+        return f"{x * risk.balance:,.0f} {risk.currency}".rstrip()
+
+    lines = [
+        f"**Book risk** (UTC {dt}, {risk.horizon}-day, EWMA λ {LAMBDA}, "
+        f"{risk.window} days historical)",
+        "",
+        "| | " + " | ".join(f"{a:.0%}" for a in risk.parametric) + " |",
+        "|---|" + "---:|" * len(risk.parametric),
+    ]
+    for name, table, i in (("VaR parametric", risk.parametric, 0), ("ES parametric", risk.parametric, 1),
+                           ("VaR historical", risk.historical, 0), ("ES historical", risk.historical, 1)):
+        lines.append(f"| {name} | " + " | ".join(f"{v[i]:.2%} ({money(v[i])})" for v in table.values())
+                     + " |")
+    gross, net = float(np.abs(risk.weights).sum()), float(risk.weights.sum())
+    lines += ["", f"Vol (1-day σ): {risk.vol:.2%}   Gross {gross:.2f}x   Net {net:+.2f}x"]
+    order = np.argsort(-np.abs(risk.contributions))[:TOP]
+    lines.append("Top contributors: " + ", ".join(
+        f"{risk.symbols[i]} {risk.contributions[i]:.0%}" for i in order))
+    if risk.unpriced:
+        lines.append(f"No recent history (left out): {', '.join(risk.unpriced)}")
+    return "\n".join(lines)
+
+
+def risk_report() -> str:
+    weights, balance, currency = book_weights()
+    return format_report(RiskEngine().measure(weights, balance, currency))
+
+
+if __name__ == "__main__":
+    print(risk_report())
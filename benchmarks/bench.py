@@ -0,0 +1,252 @@
+"""
+bench.py – run the hot-path benchmarks, save JSON baselines, flag regressions.
+
+Every case (see cases.py) runs ``repeat`` times on a fixed, seeded dataset;
+the result keeps min / median / max seconds per run and the median cost per
+item.  Baselines are plain JSON under ``benchmarks/baselines/`` (a bare name
+means ``baselines/<name>.json``) together with the machine, Python and
+commit they were taken on – compare runs from the same machine only.
+
+A case counts as a regression when both its median and its best run are
+more than ``--threshold`` slower than the baseline; requiring both keeps a
+single noisy repeat from failing the check.  ``compare`` exits 1 on any
+regression, so it can gate a change.
+
+CLI:
+
+    python -m benchmarks.bench list
+    python -m benchmarks.bench run                       # everything, print only
+    python -m benchmarks.bench run --save main           # → baselines/main.json
+    python -m benchmarks.bench run -k dedup near_dup -n 10
+    python -m benchmarks.bench compare main              # run now vs. baseline
+    python -m benchmarks.bench compare main mybranch     # two saved results
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # project root
+from benchmarks.cases import CASES, Case
+from utils.headline_store import PROJECT_ROOT
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+THRESHOLD    = 0.10           # relative slowdown that counts as a regression
+
+# --------------------------------------------------------------------------- #
+# Running
+# --------------------------------------------------------------------------- #
+
+def select(patterns: Optional[List[str]]) -> List[Case]:
+    """Cases whose name matches any pattern (glob, or plain substring)."""
+    if not patterns:
+        return list(CASES.values())
+    return [c for c in CASES.values()
+            if any(p in c.name or fnmatch.fnmatch(c.name, p) for p in patterns)]
+
+
+def run_case(c: Case, n: Optional[int] = None, repeat: Optional[int] = None) -> dict:
+    n, repeat = n or c.n, repeat or c.repeat
+    tmp = Path(tempfile.mkdtemp(prefix="bench-"))
+    try:
+        try:
+            bench = c.setup(n, tmp)
+        except ImportError as e:
+            return {"skipped": f"{e.name or e} not installed"}
+        times = []
+        try:
+            for i in range(repeat + 1):          # first pass warms caches, not kept
+                if bench.reset:
+                    bench.reset()
+                t0 = time.perf_counter()
+                bench.run()
+                if i:
+                    times.append(time.perf_counter() - t0)
+        finally:
+            if bench.close:
+                bench.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    median = statistics.median(times)
+    return {"n": n, "items": bench.items, "digest": bench.digest, "repeat": repeat,
+            "min_s": min(times), "median_s": median, "max_s": max(times),
+            "per_item_us": median / bench.items * 1e6 if bench.items else None}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run(cases: List[Case], n: Optional[int] = None, repeat: Optional[int] = None,
+        sizes: Optional[Dict[str, int]] = None) -> dict:
+    """Run ``cases``; ``n`` overrides every dataset size, ``sizes`` per case."""
+    results: Dict[str, dict] = {}
+    for c in cases:
+        results[c.name] = r = run_case(c, n or (sizes or {}).get(c.name), repeat)
+        print(_row(c.name, r), flush=True)
+    return {"created": datetime.now().isoformat(timespec="seconds"), "commit": _commit(),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.node(), "processor": platform.processor() or platform.machine(),
+            "cases": results}
+
+
+# --------------------------------------------------------------------------- #
+# Baselines / comparison
+# --------------------------------------------------------------------------- #
+
+def baseline_path(name: str | Path) -> Path:
+    p = Path(name)
+    if p.suffix or len(p.parts) > 1:
+        return p
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save(result: dict, name: str | Path) -> Path:
+    path = baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def load(name: str | Path) -> dict:
+    path = baseline_path(name)
+    if not path.exists():
+        raise SystemExit(f"No baseline at {path}")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def verdict(base: Optional[dict], new: Optional[dict],
+            threshold: float = THRESHOLD) -> str:
+    if base is None or "skipped" in (base or {}):
+        return "new" if new and "skipped" not in new else "skipped"
+    if new is None:
+        return "missing"
+    if "skipped" in new:
+        return "skipped"
+    if base.get("digest") != new.get("digest") or base.get("n") != new.get("n"):
+        return "dataset changed"
+    if (new["median_s"] > base["median_s"] * (1 + threshold)
+            and new["min_s"] > base["min_s"] * (1 + threshold)):
+        return "REGRESSION"
+    if new["median_s"] < base["median_s"] * (1 - threshold):
+        return "faster"
+    return "ok"
+
+
+def compare(base: dict, new: dict, threshold: float = THRESHOLD) -> tuple[str, int]:
+    """Comparison table and the number of regressions."""
+    lines = []
+    if base.get("machine") != new.get("machine") or base.get("python") != new.get("python"):
+        lines.append(f"warning: baseline from {base.get('machine')} / Python {base.get('python')}, "
+                     f"this run {new.get('machine')} / Python {new.get('python')}")
+    lines.append(f"baseline {base.get('created', '?')} @ {base.get('commit') or '?'}   "
+                 f"vs   {new.get('created', '?')} @ {new.get('commit') or '?'}   "
+                 f"(threshold {threshold:.0%})")
+    lines.append(f"{'case':<24} {'base':>10} {'new':>10} {'change':>8}   verdict")
+    regressions = 0
+    bc, nc = base.get("cases", {}), new.get("cases", {})
+    for name in list(bc) + [k for k in nc if k not in bc]:
+        b, n = bc.get(name), nc.get(name)
+        v = verdict(b, n, threshold)
+        regressions += v == "REGRESSION"
+        bt = _ms(b["median_s"]) if b and "median_s" in b else "-"
+        nt = _ms(n["median_s"]) if n and "median_s" in n else "-"
+        ch = (f"{n['median_s'] / b['median_s'] - 1:+.1%}"
+              if b and n and "median_s" in b and "median_s" in n else "")
+        lines.append(f"{name:<24} {bt:>10} {nt:>10} {ch:>8}   {v}")
+    lines.append(f"\n{regressions} regression(s)" if regressions else "\nno regressions")
+    return "\n".join(lines), regressions
+
+
+def _ms(s: float) -> str:
+    return f"{s * 1000:.2f}ms" if s < 10 else f"{s:.1f}s"
+
+
+def _row(name: str, r: dict) -> str:
+    if "skipped" in r:
+        return f"{name:<24} skipped – {r['skipped']}"
+    per = f"{r['per_item_us']:.2f}µs/item" if r["per_item_us"] is not None else ""
+    return (f"{name:<24} median {_ms(r['median_s']):>10}  min {_ms(r['min_s']):>10}  "
+            f"{per:>16}  ({r['items']:,} items × {r['repeat']})")
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Hot-path benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("list", help="benchmark cases")
+
+    def selection(p):
+        p.add_argument("-k", nargs="+", metavar="PATTERN", help="only cases matching")
+        p.add_argument("-n", "--repeat", type=int, help="repeats per case (default per case)")
+        p.add_argument("--size", type=int, help="dataset size for every case (default per case)")
+
+    r = sub.add_parser("run", help="run cases, optionally save the result")
+    selection(r)
+    r.add_argument("--save", metavar="NAME", help="baseline name or .json path")
+
+    c = sub.add_parser("compare", help="compare with a baseline, exit 1 on regressions")
+    c.add_argument("base", help="baseline name or .json path")
+    c.add_argument("new", nargs="?", help="second saved result (default: run now)")
+    selection(c)
+    c.add_argument("--threshold", type=float, default=THRESHOLD)
+    c.add_argument("--save", metavar="NAME", help="also save this run")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "list":
+        for case in CASES.values():
+            print(f"{case.name:<24} n={case.n:<7,} ×{case.repeat}  {case.doc}")
+        return 0
+
+    if args.cmd == "compare":
+        base = load(args.base)
+        if args.k:
+            keep = {c.name for c in select(args.k)}
+            base["cases"] = {k: v for k, v in base.get("cases", {}).items() if k in keep}
+        if args.new:
+            new = load(args.new)
+            new["cases"] = {k: v for k, v in new.get("cases", {}).items()
+                            if k in base["cases"] or not args.k}
+        else:
+            cases = [CASES[k] for k in base["cases"] if k in CASES]
+            # same dataset sizes as the baseline unless told otherwise
+            sizes = {k: v.get("n") for k, v in base.get("cases", {}).items()}
+            new = run(cases, args.size, args.repeat, sizes=sizes)
+            if args.save:
+                print(f"saved {save(new, args.save)}")
+        table, regressions = compare(base, new, args.threshold)
+        print(table)
+        return 1 if regressions else 0
+
+    result = run(select(args.k), args.size, args.repeat)
+    if args.save:
+        print(f"saved {save(result, args.save)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
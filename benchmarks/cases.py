@@ -0,0 +1,371 @@
+"""
+cases.py – the benchmarked hot paths.
+
+Each case is a setup function registered with ``@case``.  Setup builds its
+dataset (see datasets.py) and returns a ``Bench``: ``run()`` is what gets
+timed, ``reset()`` (untimed) puts stateful structures back to empty before
+each repeat, ``items`` is what one ``run()`` processes, for per-item cost.
+
+A case whose code needs a package that is not installed (bs4 for the Fly
+parser, requests for riskmgr…) raises ImportError in setup and is reported
+as skipped, never faked – the one exception is MetaTrader5, which the risk
+case replaces on purpose with ``fake_mt5``.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import datasets
+from benchmarks.fake_mt5 import installed
+
+# --------------------------------------------------------------------------- #
+# Registry
+# --------------------------------------------------------------------------- #
+
+@dataclass
+class Bench:
+    run: Callable[[], object]
+    items: int
+    digest: str = ""
+    reset: Optional[Callable[[], None]] = None
+    close: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[int, Path], Bench]
+    n: int                          # default dataset size
+    repeat: int                     # default repeats
+    doc: str = ""
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, n: int, repeat: int = 7):
+    def register(fn: Callable[[int, Path], Bench]):
+        CASES[name] = Case(name, fn, n, repeat, (fn.__doc__ or "").strip().splitlines()[0])
+        return fn
+    return register
+
+
+# --------------------------------------------------------------------------- #
+# Store / bus record parsing
+# --------------------------------------------------------------------------- #
+# publisher_v2 used to re-parse headlines.csv lines with TS_RE / SRC_RE; it now
+# receives records from the headline bus, so the per-line parsing cost lives
+# in decode_record (segment lines) and decode_event (bus lines).
+
+@case("store.decode_record", n=20_000)
+def store_decode(n: int, tmp: Path) -> Bench:
+    """headline_store.decode_record over segment lines"""
+    from utils.headline_store import Cursor, decode_record
+    lines = datasets.store_lines(n)
+    cursors, off = [], 0
+    for raw in lines:
+        cursors.append(Cursor("20250623", off))
+        off += len(raw) + 1
+    pairs = list(zip(lines, cursors))
+
+    def run():
+        for raw, cur in pairs:
+            decode_record(raw, cur)
+    return Bench(run, n, datasets.digest(lines))
+
+
+@case("bus.decode_event", n=20_000)
+def bus_decode(n: int, tmp: Path) -> Bench:
+    """headline_bus event line → Headline (json.loads + decode_event)"""
+    from utils.headline_bus import decode_event
+    lines = datasets.bus_lines(n)
+
+    def run():
+        for raw in lines:
+            decode_event(json.loads(raw))
+    return Bench(run, n, datasets.digest(lines))
+
+
+@case("bus.encode_event", n=20_000)
+def bus_encode(n: int, tmp: Path) -> Bench:
+    """headline_bus.encode_event for records read from a segment"""
+    from utils.headline_store import Cursor, decode_record
+    from utils.headline_bus import encode_event
+    lines = datasets.store_lines(n)
+    recs = [decode_record(raw, Cursor("20250623", 0)) for raw in lines]
+
+    def run():
+        for rec in recs:
+            encode_event(rec)
+    return Bench(run, n, datasets.digest(lines))
+
+
+# --------------------------------------------------------------------------- #
+# FIATFEED extraction
+# --------------------------------------------------------------------------- #
+
+@case("feed.extract_headline", n=500, repeat=5)
+def feed_extract(n: int, tmp: Path) -> Bench:
+    """newsfeeder.extract_headline on a control text of n items, 200 updates"""
+    # newsfeeder connects to the live bus and dedup index on import, so this
+    # runs its one-line body over the same tokenizer
+    from monitors.feed_delta import tokenize
+
+    def extract_headline(full_text):
+        return next((i.headline for i in tokenize(full_text) if i.accepted), None)
+
+    items = datasets.feed_items(n)
+    texts = []
+    for new in datasets.feed_items(200, start=n):
+        items.insert(0, new)
+        items.pop()
+        texts.append("\n".join(items))
+
+    def run():
+        for t in texts:
+            extract_headline(t)
+    return Bench(run, len(texts), datasets.digest(texts))
+
+
+@case("feed.delta_tokens", n=5_000, repeat=5)
+def feed_delta(n: int, tmp: Path) -> Bench:
+    """FeedDelta.update + HeadlineTokenizer.feed, n-item window, 200 updates"""
+    from monitors.feed_delta import FeedDelta, HeadlineTokenizer
+    items = datasets.feed_items(n)
+    initial = "\n".join(items)
+    texts = []
+    for new in datasets.feed_items(200, start=n):
+        items.insert(0, new)
+        items.pop()
+        texts.append("\n".join(items))
+    state = {}
+
+    def reset():
+        state["delta"], state["tokens"] = FeedDelta(window=n * 4), HeadlineTokenizer()
+        state["delta"].prime(initial)
+
+    def run():
+        delta, tokens = state["delta"], state["tokens"]
+        for t in texts:
+            tokens.feed(delta.update(t).text)
+    return Bench(run, len(texts), datasets.digest(texts), reset)
+
+
+# --------------------------------------------------------------------------- #
+# Fly HTML
+# --------------------------------------------------------------------------- #
+
+@case("fly.parse_headlines", n=200, repeat=5)
+def fly_parse(n: int, tmp: Path) -> Bench:
+    """flyboty.parse_headlines on a Breaking News page, 20 parses"""
+    from monitors.flyboty import parse_headlines
+    page = datasets.fly_html(n)
+    found = len(parse_headlines(page))
+    if found != datasets.fly_titles(page):
+        raise RuntimeError(f"parse_headlines found {found} of {datasets.fly_titles(page)} titles")
+
+    def run():
+        for _ in range(20):
+            parse_headlines(page)
+    return Bench(run, 20 * found, datasets.digest([page]))
+
+
+# --------------------------------------------------------------------------- #
+# Dedup structures
+# --------------------------------------------------------------------------- #
+
+def _with_repeats(n: int) -> List[str]:
+    """n headlines where about a third repeat an earlier one."""
+    r = datasets.rng("repeats")
+    out = []
+    for h in datasets.headlines(n):
+        out.append(out[r.randrange(len(out))] if out and r.random() < 0.33 else h)
+    return out
+
+
+def _near_variants(n: int) -> List[str]:
+    """n headlines plus about half as many reworded copies (suffix, dropped
+    word, case)."""
+    r = datasets.rng("variants")
+    out = []
+    for h in datasets.distinct_headlines(n):
+        out.append(h)
+        if r.random() < 0.5:
+            words = out[r.randrange(len(out))].split()
+            kind = r.randrange(3)
+            if kind == 0:
+                words.append(r.choice(("- SOURCE", "- REUTERS", "- BBG")))
+            elif kind == 1 and len(words) > 6:
+                del words[r.randrange(len(words))]
+            else:
+                words = [w.lower() for w in words]
+            out.append(" ".join(words))
+    return out
+
+
+@case("dedup.seen", n=20_000)
+def dedup_seen(n: int, tmp: Path) -> Bench:
+    """DedupIndex.seen on n headlines, a third exact repeats"""
+    from utils.dedup_index import DedupIndex
+    texts = _with_repeats(n)
+    state = {"k": 0}
+
+    def reset():
+        if "index" in state:
+            state["index"].close()
+        state["k"] += 1
+        state["index"] = DedupIndex(f"bench{state['k']}", tmp)
+
+    def run():
+        seen = state["index"].seen
+        for t in texts:
+            seen(t)
+
+    def close():
+        state.pop("index").close()
+    return Bench(run, n, datasets.digest(texts), reset, close)
+
+
+@case("near_dup.seen", n=1_500, repeat=5)
+def near_dup_seen(n: int, tmp: Path) -> Bench:
+    """NearDupIndex.seen on n headlines plus ~n/2 reworded copies"""
+    from utils.near_dup import NearDupIndex
+    texts = _near_variants(n)
+    state = {"k": 0}
+
+    def reset():
+        if "index" in state:
+            state["index"].close()
+        state["k"] += 1
+        state["index"] = NearDupIndex(f"bench{state['k']}", tmp)
+
+    def run():
+        seen = state["index"].seen
+        for t in texts:
+            seen(t)
+
+    def close():
+        state.pop("index").close()
+    return Bench(run, len(texts), datasets.digest(texts), reset, close)
+
+
+@case("near_dup.minhash", n=20_000)
+def near_dup_minhash(n: int, tmp: Path) -> Bench:
+    """near_dup.normalize + minhash signatures"""
+    from utils.near_dup import minhash, normalize
+    texts = datasets.headlines(n)
+
+    def run():
+        for t in texts:
+            minhash(normalize(t))
+    return Bench(run, n, datasets.digest(texts))
+
+
+# --------------------------------------------------------------------------- #
+# Risk aggregation
+# --------------------------------------------------------------------------- #
+
+@case("risk.positions_weight", n=10_000, repeat=3)
+def risk_weights(n: int, tmp: Path) -> Bench:
+    """riskmgr.get_open_positions_weight against a fake MT5 with n positions"""
+    ctx = installed(positions=n)
+    fake = ctx.__enter__()
+    try:
+        from RISKCODE.riskmgr import get_open_positions_weight
+        frame = get_open_positions_weight()
+    except BaseException:
+        ctx.__exit__(None, None, None)
+        raise
+    if len(frame) != n:
+        ctx.__exit__(None, None, None)
+        raise RuntimeError(f"get_open_positions_weight returned {len(frame)} of {n} rows")
+    fingerprint = datasets.digest(f"{p.symbol}:{p.type}:{p.volume}:{p.price_open}"
+                                  for p in fake.positions_get())
+    return Bench(get_open_positions_weight, n, fingerprint,
+                 close=lambda: ctx.__exit__(None, None, None))
+
+
+@case("risk.exposures", n=10_000)
+def risk_exposures(n: int, tmp: Path) -> Bench:
+    """exposure.exposures (vectorized book) on a fake MT5 snapshot of n positions"""
+    ctx = installed(positions=n)
+    fake = ctx.__enter__()
+    try:
+        from RISKCODE.exposure import account_snapshot, exposures
+        snapshot = account_snapshot()
+    except BaseException:
+        ctx.__exit__(None, None, None)
+        raise
+    fingerprint = datasets.digest(f"{p.symbol}:{p.type}:{p.volume}:{p.price_open}"
+                                  for p in fake.positions_get())
+    return Bench(lambda: exposures(*snapshot), n, fingerprint,
+                 close=lambda: ctx.__exit__(None, None, None))
+
+
+@case("risk.fx_convert", n=100_000)
+def risk_fx_convert(n: int, tmp: Path) -> Bench:
+    """fx.FxGraph.convert of an n-row P&L column in mixed currencies to JPY"""
+    import numpy as np
+    ctx = installed(positions=0)
+    ctx.__enter__()
+    try:
+        from RISKCODE.fx import FxGraph
+        graph = FxGraph()
+    except BaseException:
+        ctx.__exit__(None, None, None)
+        raise
+    r = datasets.rng("fx")
+    ccys = [r.choice(("USD", "EUR", "GBP", "CHF", "SEK", "NOK", "CAD", "AUD")) for _ in range(n)]
+    amounts = np.array([round(r.uniform(-5_000, 5_000), 2) for _ in range(n)])
+    return Bench(lambda: graph.convert(amounts, ccys, "JPY"), n, datasets.digest(ccys),
+                 close=lambda: ctx.__exit__(None, None, None))
+
+
+@case("risk.portfolio_beta", n=756)
+def risk_portfolio_beta(n: int, tmp: Path) -> Bench:
+    """history.portfolio_beta over every fake symbol, n cached daily bars"""
+    from benchmarks.fake_mt5 import SYMBOLS
+    ctx = installed(positions=0)
+    ctx.__enter__()
+    try:
+        from RISKCODE.history import RateStore, portfolio_beta
+        store = RateStore(tmp, history=n)
+        weights = {s: 0.01 * (i + 1) for i, s in enumerate(SYMBOLS)}
+        portfolio_beta(weights, store, count=n)                 # first sync, untimed
+    except BaseException:
+        ctx.__exit__(None, None, None)
+        raise
+    return Bench(lambda: portfolio_beta(weights, store, count=n), len(weights),
+                 datasets.digest(weights), close=lambda: ctx.__exit__(None, None, None))
+
+
+@case("risk.var", n=50)
+def risk_var(n: int, tmp: Path) -> Bench:
+    """var.RiskEngine.measure on an n-symbol book, warm EWMA state and rate cache"""
+    import numpy as np
+    ctx = installed(positions=0)
+    ctx.__enter__()
+    try:
+        from RISKCODE.history import RATE_DTYPE, RateStore
+        from RISKCODE.var import EwmaCovariance, RiskEngine
+        store = RateStore(tmp / "rates", min_sync=float("inf"))   # cached history only
+        g = np.random.default_rng(7)
+        market = g.normal(0, 0.01, 757)
+        symbols = [f"SYM{i:02d}" for i in range(n)]
+        for s in symbols:
+            bars = np.zeros(757, RATE_DTYPE)
+            bars["time"] = 1_685_000_000 + 86_400 * np.arange(757)
+            bars["close"] = 100 * np.exp(np.cumsum(0.8 * market + g.normal(0, 0.01, 757)))
+            bars.tofile(store.path(s))
+        weights = dict(zip(symbols, g.normal(0, 0.1, n)))
+        engine = RiskEngine(store, EwmaCovariance(path=tmp / "ewma.npz"))
+        engine.measure(weights, 100_000.0)                  # seeds the EWMA state, untimed
+    except BaseException:
+        ctx.__exit__(None, None, None)
+        raise
+    return Bench(lambda: engine.measure(weights, 100_000.0), n, datasets.digest(symbols),
+                 close=lambda: ctx.__exit__(None, None, None))
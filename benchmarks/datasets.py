@@ -0,0 +1,189 @@
+"""
+datasets.py – reproducible inputs for the benchmark cases.
+
+Every dataset is built from the headline CSVs checked into the repo (the
+"fixtures") plus a seeded ``random.Random``, so two runs on any machine see
+byte-identical input.  ``digest()`` fingerprints a dataset; baselines store
+it so ``compare`` can tell a slower hot path from a different workload.
+
+    headlines(n)         n headlines cycled from the CSVs, tagged with #i so
+                         they are unique (dedup cases need that)
+    distinct_headlines(n) up to n untagged, pairwise different headlines
+    store_lines(n)       headline-store records as written to a segment
+    bus_lines(n)         the same records as headline-bus event lines
+    feed_text(n)         a FIATFEED control text with n ``HH:MM:SS`` items
+    fly_html(n)          a Fly "Breaking News" page with n a.newsTitleLink rows;
+                         a real capture in fixtures/fly.html is used instead
+                         when present
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import html
+import random
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from utils.headline_store import PROJECT_ROOT, Cursor, decode_record, encode_record
+from utils.headline_bus import encode_event
+
+FIXTURES     = Path(__file__).resolve().parent / "fixtures"
+CSV_FILES    = [PROJECT_ROOT / "monitors" / "flylines.csv",
+                PROJECT_ROOT / "monitors" / "headlines1.csv",
+                PROJECT_ROOT / "publishers" / "headlines.csv"]
+SEED         = 20250623
+BASE_TS_MS   = 1_750_680_000_000          # 2025-06-23, so segments are stable
+SOURCES      = ("RTRS", "FLY", "SQUAWK", "NWK")
+
+
+# --------------------------------------------------------------------------- #
+# Fixtures
+# --------------------------------------------------------------------------- #
+
+@lru_cache(maxsize=None)
+def corpus() -> Tuple[str, ...]:
+    """Every headline in the repo CSVs, file order, duplicates kept."""
+    out = []
+    for path in CSV_FILES:
+        with path.open(newline="", encoding="utf-8", errors="replace") as f:
+            out.extend(row[1].strip() for row in csv.reader(f) if len(row) > 1 and row[1].strip())
+    return tuple(out)
+
+
+def rng(salt: str = "") -> random.Random:
+    return random.Random(f"{SEED}:{salt}")
+
+
+def digest(items: Iterable[str | bytes]) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    for item in items:
+        h.update(item if isinstance(item, bytes) else item.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# --------------------------------------------------------------------------- #
+# Headlines / records
+# --------------------------------------------------------------------------- #
+
+def headlines(n: int, unique: bool = True) -> List[str]:
+    base = corpus()
+    order = list(range(len(base)))
+    rng("headlines").shuffle(order)
+    return [base[order[i % len(order)]] + (f" #{i}" if unique else "") for i in range(n)]
+
+
+def distinct_headlines(n: int) -> List[str]:
+    """Up to n different headlines from the CSVs, shuffled (no #i tags – the
+    near-dup cases would see tagged copies as rewordings of each other)."""
+    base = list(dict.fromkeys(corpus()))
+    rng("distinct").shuffle(base)
+    return base[:n]
+
+
+def records(n: int) -> List[Tuple[int, str, str, Tuple[str, ...]]]:
+    """``(ts_ms, source, text, extra)`` with realistic gaps and latency stamps."""
+    r = rng("records")
+    ts, out = BASE_TS_MS, []
+    for text in headlines(n):
+        ts += r.randint(50, 30_000)
+        capture = ts - r.randint(5, 2_000)
+        lat = f"lat=source:{capture - r.randint(0, 3_000)},capture:{capture},dedup:{capture + 1}"
+        out.append((ts, r.choice(SOURCES), text, (lat,)))
+    return out
+
+
+def store_lines(n: int) -> List[bytes]:
+    """Segment lines (newline stripped, as the segment reader hands them out)."""
+    return [encode_record(ts, src, text, *extra).rstrip(b"\n")
+            for ts, src, text, extra in records(n)]
+
+
+def bus_lines(n: int) -> List[bytes]:
+    out, off = [], 0
+    for raw in store_lines(n):
+        rec = decode_record(raw, Cursor("20250623", off))
+        out.append(encode_event(rec))
+        off = rec.end
+    return out
+
+
+# --------------------------------------------------------------------------- #
+# FIATFEED control text
+# --------------------------------------------------------------------------- #
+
+def feed_items(n: int, start: int = 0) -> List[str]:
+    """``HH:MM:SS`` + headline items, newest first, as the control shows them.
+
+    Roughly one in four is a mixed-case story line the tokenizer rejects."""
+    r = rng(f"feed:{start}")
+    base = [h for h in corpus() if h.isupper()] or list(corpus())
+    out = []
+    for i in range(start, start + n):
+        s = 86_399 - (i % 86_400)
+        text = base[i % len(base)] + f" #{i}"
+        if r.random() < 0.25:
+            text = text.capitalize()
+        out.append(f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}\n{text}")
+    return out
+
+
+def feed_text(n: int) -> str:
+    return "\n".join(feed_items(n))
+
+
+# --------------------------------------------------------------------------- #
+# Fly HTML
+# --------------------------------------------------------------------------- #
+
+_FLY_ROW = """\
+<tr class="tr_noticia {cls}" data-id="{id}" data-datenews="{date}">
+ <td class="news_tools"><div class="icons_container"><span class="icon_star"></span>
+  <a class="shareIcon" href="#" title="Share"></a></div></td>
+ <td class="story_header">
+  <div class="simbolos_wrapper"><span class="ticker fpo_overlay" data-ticker="{ticker}">{ticker}</span></div>
+  <a class="newsTitleLink" href="/news.php?id={id}">{title}</a>
+  <span class="time_date"><small class="timeType">{time}</small></span>
+  <p class="newsContent">{body}</p>
+ </td>
+</tr>
+"""
+
+_FLY_PAGE = """\
+<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Breaking News - The Fly</title>
+<link rel="stylesheet" href="/css/main.css"><script src="/js/jquery.min.js"></script></head>
+<body class="news_page"><div id="wrapper"><div id="header"><ul class="menu">
+<li><a href="/news.php">Breaking News</a></li><li><a href="/calendar.php">Calendars</a></li>
+</ul></div>
+<div id="news_container"><table class="news_table first_table"><tbody>
+{rows}</tbody></table></div></div></body></html>
+"""
+
+_CLASSES = ("", "hot", "recomendation", "general_news", "earnings", "periodicals")
+
+
+def fly_html(n: int) -> str:
+    """A Breaking News page with ``n`` rows (or the captured fixture)."""
+    captured = FIXTURES / "fly.html"
+    if captured.exists():
+        return captured.read_text(encoding="utf-8", errors="replace")
+    r = rng("fly")
+    titles = headlines(n, unique=False)
+    rows = []
+    for i, title in enumerate(titles):
+        ticker = "".join(r.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(r.randint(1, 4)))
+        rows.append(_FLY_ROW.format(
+            cls=r.choice(_CLASSES), id=1_000_000 + i, ticker=ticker,
+            date=f"2025-06-23 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+            time=f"{i // 60 % 12 + 1:02d}:{i % 60:02d}", title=html.escape(title),
+            body=html.escape(" ".join(r.sample(titles, 2)))))
+    return _FLY_PAGE.format(rows="".join(rows))
+
+
+def fly_titles(page: str) -> int:
+    """Number of headline links on ``page`` (sanity check for the parser case)."""
+    return page.count('class="newsTitleLink"')
@@ -0,0 +1,219 @@
+"""
+fake_mt5.py – an in-process stand-in for the ``MetaTrader5`` package.
+
+Only the calls the risk code makes are implemented, with the same return
+types (named tuples with ``_asdict``) so pandas builds the same frames:
+
+    initialize / shutdown / last_error
+    account_info()                  balance, equity, currency, leverage…
+    positions_get()                 ``positions`` seeded positions
+    symbols_get()                   every symbol's info
+    symbol_info(symbol)             contract size, base/profit currency
+    symbol_select(symbol, enable)
+    symbol_info_tick(symbol)        bid / ask
+    copy_rates_from_pos(symbol, timeframe, start, count)
+                                    seeded daily random walk (numpy record array)
+
+    with fake_mt5.installed(positions=10_000) as mt5:
+        from RISKCODE.riskmgr import get_open_positions_weight
+        get_open_positions_weight()
+
+``installed`` puts the fake in ``sys.modules`` and drops any module that
+imported the real package, so each block gets a fresh ``import``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+import types
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+ORDER_TYPE_BUY  = 0
+ORDER_TYPE_SELL = 1
+TIMEFRAME_D1    = 16408
+
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "time_msc", "time_update", "time_update_msc", "type", "magic",
+    "identifier", "reason", "volume", "price_open", "sl", "tp", "price_current", "swap",
+    "profit", "symbol", "comment", "external_id"])
+SymbolInfo = namedtuple("SymbolInfo", [
+    "name", "currency_base", "currency_profit", "currency_margin", "trade_contract_size",
+    "digits", "point", "bid", "ask"])
+Tick = namedtuple("Tick", ["time", "bid", "ask", "last", "volume", "time_msc", "flags",
+                           "volume_real"])
+AccountInfo = namedtuple("AccountInfo", [
+    "login", "leverage", "balance", "credit", "profit", "equity", "margin", "margin_free",
+    "currency", "server", "company"])
+
+# symbol → (base, profit currency, contract size, mid price, daily vol)
+SYMBOLS: Dict[str, tuple] = {
+    "EURUSD": ("EUR", "USD", 100_000, 1.0850, 0.005),
+    "GBPUSD": ("GBP", "USD", 100_000, 1.2700, 0.006),
+    "USDJPY": ("USD", "JPY", 100_000, 157.20, 0.006),
+    "USDCHF": ("USD", "CHF", 100_000, 0.8950, 0.005),
+    "AUDUSD": ("AUD", "USD", 100_000, 0.6650, 0.007),
+    "USDCAD": ("USD", "CAD", 100_000, 1.3700, 0.004),
+    "EURGBP": ("EUR", "GBP", 100_000, 0.8540, 0.004),
+    "EURJPY": ("EUR", "JPY", 100_000, 170.50, 0.007),
+    "USDSEK": ("USD", "SEK", 100_000, 10.450, 0.007),
+    "EURNOK": ("EUR", "NOK", 100_000, 11.600, 0.006),
+    "XAUUSD": ("XAU", "USD", 100, 2330.0, 0.010),
+    "US500":  ("US500", "USD", 1, 5450.0, 0.010),
+    "USTEC":  ("USTEC", "USD", 1, 19700.0, 0.013),
+    "GER40":  ("GER40", "EUR", 1, 18200.0, 0.011),
+    "UK100":  ("UK100", "GBP", 1, 8250.0, 0.009),
+    "JP225":  ("JP225", "JPY", 1, 38500.0, 0.013),
+    "AAPL":   ("AAPL", "USD", 1, 214.0, 0.018),
+    "NVDA":   ("NVDA", "USD", 1, 126.0, 0.032),
+}
+SPREAD = 2e-4                   # relative bid/ask spread
+
+
+class FakeMT5:
+    def __init__(self, positions: int = 10_000, balance: float = 250_000.0,
+                 currency: str = "USD", seed: int = 1):
+        self.ORDER_TYPE_BUY, self.ORDER_TYPE_SELL = ORDER_TYPE_BUY, ORDER_TYPE_SELL
+        self.TIMEFRAME_D1 = TIMEFRAME_D1
+        self.seed = seed
+        self.calls: Dict[str, int] = {}
+        self._error = (1, "Success")
+        self._account = AccountInfo(5_001_234, 100, balance, 0.0, 0.0, balance, 0.0, balance,
+                                    currency, "Fake-Server", "Fake Broker Ltd")
+        self._symbols = {s: SymbolInfo(s, base, profit, profit, size, 5 if size > 1 else 2,
+                                       1e-5 if size > 1 else 0.01,
+                                       mid * (1 - SPREAD / 2), mid * (1 + SPREAD / 2))
+                         for s, (base, profit, size, mid, _) in SYMBOLS.items()}
+        self._positions = self._make_positions(positions)
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _make_positions(self, n: int) -> tuple:
+        r = random.Random(self.seed)
+        names = list(SYMBOLS)
+        now = int(time.mktime((2025, 6, 23, 12, 0, 0, 0, 0, -1)))
+        out = []
+        for i in range(n):
+            sym = r.choice(names)
+            _, _, size, mid, vol = SYMBOLS[sym]
+            kind = r.choice((ORDER_TYPE_BUY, ORDER_TYPE_SELL))
+            opened = mid * (1 + r.gauss(0, vol * 3))
+            volume = round(r.uniform(0.01, 2.0) if size > 1 else r.uniform(0.1, 20.0), 2)
+            ts = now - r.randint(60, 30 * 86_400)
+            out.append(TradePosition(
+                100_000_000 + i, ts, ts * 1000, ts, ts * 1000, kind, 0, 100_000_000 + i, 0,
+                volume, round(opened, 5), 0.0, 0.0, mid, 0.0,
+                round((mid - opened) * volume * size * (1 if kind == ORDER_TYPE_BUY else -1), 2),
+                sym, "", ""))
+        return tuple(out)
+
+    # ------------------------------------------------------------------ #
+    # MetaTrader5 API
+    # ------------------------------------------------------------------ #
+    def initialize(self, *args, **kwargs) -> bool:
+        self._count("initialize")
+        return True
+
+    def shutdown(self):
+        self._count("shutdown")
+
+    def last_error(self):
+        return self._error
+
+    def account_info(self) -> AccountInfo:
+        self._count("account_info")
+        return self._account
+
+    def positions_get(self, symbol: Optional[str] = None, **kwargs):
+        self._count("positions_get")
+        if symbol is None:
+            return self._positions
+        return tuple(p for p in self._positions if p.symbol == symbol)
+
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        self._count("symbol_info")
+        info = self._symbols.get(symbol)
+        if info is None:
+            self._error = (-1, f"Unknown symbol {symbol}")
+        return info
+
+    def symbols_get(self, group: Optional[str] = None) -> tuple:
+        self._count("symbols_get")
+        return tuple(self._symbols.values())
+
+    def symbol_select(self, symbol: str, enable: bool = True) -> bool:
+        self._count("symbol_select")
+        return symbol in self._symbols
+
+    def symbol_info_tick(self, symbol: str) -> Optional[Tick]:
+        self._count("symbol_info_tick")
+        info = self._symbols.get(symbol)
+        if info is None:
+            self._error = (-1, f"Unknown symbol {symbol}")
+            return None
+        return Tick(0, info.bid, info.ask, 0.0, 0, 0, 6, 0.0)
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start: int, count: int):
+        self._count("copy_rates_from_pos")
+        if symbol not in SYMBOLS:
+            self._error = (-1, f"Unknown symbol {symbol}")
+            return None
+        _, _, _, mid, vol = SYMBOLS[symbol]
+        # one shared market factor plus an idiosyncratic part, so symbols correlate;
+        # the newest bar closes at the symbol's mid price
+        g = np.random.default_rng([self.seed, sum(map(ord, symbol))])
+        market = np.random.default_rng([self.seed, 0]).normal(0, 1, start + count)[start:]
+        rets = 0.6 * vol * market + g.normal(0, vol * 0.8, start + count)[start:]
+        path = np.cumsum(rets[::-1])[::-1]          # log distance back from the newest bar
+        close = mid * np.exp(-(path - rets[-1] if count else path))
+        day = 86_400
+        end = int(time.mktime((2025, 6, 23, 0, 0, 0, 0, 0, -1))) - start * day
+        rates = np.zeros(count, dtype=[("time", "<i8"), ("open", "<f8"), ("high", "<f8"),
+                                       ("low", "<f8"), ("close", "<f8"), ("tick_volume", "<u8"),
+                                       ("spread", "<i4"), ("real_volume", "<u8")])
+        rates["time"] = end - day * np.arange(count)[::-1]
+        rates["close"] = close
+        rates["open"] = np.concatenate(([close[0]], close[:-1]))
+        rates["high"] = np.maximum(rates["open"], close) * (1 + vol / 4)
+        rates["low"] = np.minimum(rates["open"], close) * (1 - vol / 4)
+        rates["tick_volume"] = g.integers(1_000, 50_000, count)
+        return rates
+
+
+def module(fake: FakeMT5) -> types.ModuleType:
+    """``fake`` dressed up as the ``MetaTrader5`` module."""
+    mod = types.ModuleType("MetaTrader5")
+    for name in ("initialize", "shutdown", "last_error", "account_info", "positions_get",
+                 "symbols_get", "symbol_info", "symbol_select", "symbol_info_tick",
+                 "copy_rates_from_pos"):
+        setattr(mod, name, getattr(fake, name))
+    mod.ORDER_TYPE_BUY, mod.ORDER_TYPE_SELL = ORDER_TYPE_BUY, ORDER_TYPE_SELL
+    mod.TIMEFRAME_D1 = TIMEFRAME_D1
+    mod.fake = fake
+    return mod
+
+
+@contextmanager
+def installed(**kwargs) -> Iterator[FakeMT5]:
+    """Run a block with ``import MetaTrader5`` resolving to a fresh fake."""
+    fake = FakeMT5(**kwargs)
+    saved = sys.modules.get("MetaTrader5")
+    stale = [m for m in sys.modules if m.startswith("RISKCODE")]
+    for m in stale:
+        del sys.modules[m]
+    sys.modules["MetaTrader5"] = module(fake)
+    try:
+        yield fake
+    finally:
+        for m in [m for m in sys.modules if m.startswith("RISKCODE")]:
+            del sys.modules[m]
+        if saved is None:
+            sys.modules.pop("MetaTrader5", None)
+        else:
+            sys.modules["MetaTrader5"] = saved
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# benchmarks/feed_extract.py
+
+"""
+Micro-benchmark: FIATFEED headline extraction cost vs. feed window size.
+
+For each window size N the control holds N items and one new item is
+inserted at the top.  Compared per update:
+
+  full-regex   the old newsfeeder.extract_headline over the whole text
+  delta+tokens FeedDelta.update(full text) + HeadlineTokenizer on the delta
+  tokens only  HeadlineTokenizer.feed on the inserted text
+
+Run:  python benchmarks/feed_extract.py [--sizes 50 500 5000] [-n 200]
+"""
+
+import argparse
+import csv
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from monitors.feed_delta import FeedDelta, HeadlineTokenizer
+
+_OLD_RE = re.compile(r'(\d{2}:\d{2}:\d{2})\s+((?:(?!\d{2}:\d{2}:\d{2}).)+)', re.DOTALL)
+
+
+def old_extract(full_text):
+    """Verbatim pre-tokenizer extract_headline (regex + two classifiers)."""
+    def is_all_upper(text):
+        filtered = ''.join(c for c in text if c.isalpha())
+        return bool(filtered) and filtered == filtered.upper()
+
+    def words_mostly_upper(text, threshold=0.75):
+        words = text.split()
+        count = sum(1 for word in words if word.isupper())
+        return count / len(words) >= threshold
+
+    for _, candidate in _OLD_RE.findall(full_text):
+        candidate = candidate.strip()
+        if len(candidate.split()) < 5:
+            continue
+        if is_all_upper(candidate) or words_mostly_upper(candidate):
+            return candidate
+    return None
+
+
+def load_headlines():
+    with (ROOT / "monitors" / "headlines1.csv").open(newline="", encoding="utf-8") as f:
+        return [row[1] for row in csv.reader(f) if len(row) > 1]
+
+
+def item(i, headlines):
+    h, m, s = (i // 3600) % 24, (i // 60) % 60, i % 60
+    return f"{h:02d}:{m:02d}:{s:02d}\n{headlines[i % len(headlines)]} #{i}"
+
+
+def run(size, repeat, headlines):
+    items = [item(i, headlines) for i in range(size)]
+    initial = "\n".join(items)
+    texts = []
+    for k in range(repeat):                      # newest at the top, window fixed
+        items.insert(0, item(size + k, headlines))
+        items.pop()
+        texts.append("\n".join(items))
+
+    t0 = time.perf_counter()
+    for t in texts:
+        old_extract(t)
+    t_old = (time.perf_counter() - t0) / repeat
+
+    delta, tokens = FeedDelta(window=size * 4), HeadlineTokenizer()
+    delta.prime(initial)
+    inserted = []
+    t0 = time.perf_counter()
+    for t in texts:
+        d = delta.update(t)
+        tokens.feed(d.text)
+        inserted.append(d.text)
+    t_delta = (time.perf_counter() - t0) / repeat
+
+    tokens = HeadlineTokenizer()
+    t0 = time.perf_counter()
+    for t in inserted:
+        tokens.feed(t)
+    t_tok = (time.perf_counter() - t0) / repeat
+    return t_old, t_delta, t_tok
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="FIATFEED extraction micro-benchmark")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 20000])
+    ap.add_argument("-n", "--repeat", type=int, default=100)
+    args = ap.parse_args(argv)
+
+    headlines = load_headlines()
+    print(f"{'window':>8} {'full-regex':>12} {'delta+tokens':>13} {'tokens only':>12}   (µs/update)")
+    for size in args.sizes:
+        t_old, t_delta, t_tok = run(size, args.repeat, headlines)
+        print(f"{size:>8,} {t_old * 1e6:>12.1f} {t_delta * 1e6:>13.1f} {t_tok * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,33 @@ discord_gateway.py  – the one-and-only Discord connection for Fiat_assist.
 Launch this in its own console:
 
     python discord_gateway.py
+
+Other processes send through it with ``gateway_client.send_message`` – the
+gateway listens on a local socket (see gateway_client.py for the protocol),
+keeps every text channel it can see in a warm cache, and funnels all sends
+through one bounded outbox with a sender task per channel.
+
+It also keeps the full-text headline index (utils/headline_search.py)
+following the store, for ``!search``.
 """
 
 import os
+import json
+import atexit
 import asyncio
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
 import discord
 from discord.ext import commands
 
 from utils import Keys                 # adjust if your secrets helper lives elsewhere
 import mt5                             # pure-MT5 utilities (see mt5.py)
-from typing import Optional  # already added with the other imports
+from gateway_client import default_address, encode
+from utils.headline_search import HeadlineSearch, format_page
+from typing import Deque, Dict, List, Optional, Tuple  # already added with the other imports
 # --------------------------------------------------------------------------- #
 # Configuration
 # --------------------------------------------------------------------------- #
@@ -30,17 +45,265 @@ intents.message_content = True               # needed if you want to read messag
 bot = commands.Bot(command_prefix="!", intents=intents)
 _ready = asyncio.Event()                     # signals when the bot is logged in
 
+OUTBOX_MAX = 1_000                           # queued sends across all channels
+SEARCH_PAGE_TIMEOUT = 600                    # seconds the ◀ ▶ buttons stay live
+
+
+# --------------------------------------------------------------------------- #
+# Channel cache – warmed on login, kept fresh by guild events
+# --------------------------------------------------------------------------- #
+
+class ChannelCache:
+    def __init__(self):
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self.misses = 0
+
+    def warm(self):
+        for guild in bot.guilds:
+            for ch in guild.text_channels:
+                self._channels[ch.id] = ch
+            for th in guild.threads:
+                self._channels[th.id] = th
+        logging.info("Channel cache warmed: %d channels", len(self._channels))
+
+    def forget(self, channel_id: int):
+        self._channels.pop(channel_id, None)
+
+    async def get(self, channel_id: int) -> discord.abc.Messageable:
+        ch = self._channels.get(channel_id) or bot.get_channel(channel_id)
+        if ch is None:                                  # DMs, new channels …
+            self.misses += 1
+            ch = await bot.fetch_channel(channel_id)
+        self._channels[channel_id] = ch
+        return ch
+
+
+channels = ChannelCache()
+
+
+# --------------------------------------------------------------------------- #
+# Outbox – bounded, one sender task per channel, drop/merge policies
+# --------------------------------------------------------------------------- #
+
+class OutboxFull(Exception):
+    pass
+
+
+@dataclass
+class Outgoing:
+    channel_id: int
+    content: Optional[str] = None
+    embed: Optional[dict] = None
+    key: Optional[str] = None
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class Outbox:
+    def __init__(self, maxsize: int = OUTBOX_MAX):
+        self.maxsize = maxsize
+        self.size = 0
+        self._lanes: Dict[int, Deque[Outgoing]] = {}
+        self._wake: Dict[int, asyncio.Event] = {}
+        self._merge: Dict[Tuple[int, str], Outgoing] = {}
+        self._space = asyncio.Condition()
+        self.sent = self.dropped = self.merged = self.failed = 0
+
+    async def put(self, item: Outgoing, policy: str = "block"):
+        if policy == "merge" and item.key:
+            queued = self._merge.get((item.channel_id, item.key))
+            if queued is not None:                    # latest version wins
+                queued.content, queued.embed = item.content, item.embed
+                queued.waiters.extend(item.waiters)
+                self.merged += 1
+                return
+        if self.size >= self.maxsize:
+            if policy == "drop":
+                self.dropped += 1
+                raise OutboxFull(f"outbox full ({self.maxsize}) – dropped")
+            async with self._space:
+                await self._space.wait_for(lambda: self.size < self.maxsize)
+        lane = self._lanes.get(item.channel_id)
+        if lane is None:
+            lane = self._lanes[item.channel_id] = deque()
+            self._wake[item.channel_id] = asyncio.Event()
+            asyncio.create_task(self._run(item.channel_id))
+        lane.append(item)
+        if policy == "merge" and item.key:
+            self._merge[(item.channel_id, item.key)] = item
+        self.size += 1
+        self._wake[item.channel_id].set()
+
+    async def _run(self, channel_id: int):
+        lane, wake = self._lanes[channel_id], self._wake[channel_id]
+        while True:
+            if not lane:
+                wake.clear()
+                await wake.wait()
+                continue
+            item = lane.popleft()
+            if item.key:
+                self._merge.pop((channel_id, item.key), None)
+            self.size -= 1
+            async with self._space:
+                self._space.notify()
+            try:
+                await _ready.wait()                    # wait until login completes
+                ch = await channels.get(channel_id)
+                embed = discord.Embed.from_dict(item.embed) if item.embed else None
+                msg = await ch.send(content=item.content, embed=embed)
+            except Exception as e:
+                self.failed += 1
+                logging.warning("Send to %s failed: %s", channel_id, e)
+                for w in item.waiters:
+                    if not w.done():
+                        w.set_exception(e)
+                continue
+            self.sent += 1
+            for w in item.waiters:
+                if not w.done():
+                    w.set_result(msg.id)
+
+    def stats(self) -> str:
+        return (f"outbox {self.size}/{self.maxsize}, sent {self.sent}, merged {self.merged}, "
+                f"dropped {self.dropped}, failed {self.failed}, channel misses {channels.misses}")
+
+
+outbox: Optional[Outbox] = None              # created on the bot's loop
+
+
+async def enqueue(channel_id: int, content: Optional[str] = None, embed: Optional[dict] = None,
+                  policy: str = "block", key: Optional[str] = None) -> asyncio.Future:
+    """Queue a send on the bot's loop; the returned future gets the message id."""
+    fut = asyncio.get_running_loop().create_future()
+    await outbox.put(Outgoing(channel_id, content, embed, key, [fut]), policy)
+    return fut
+
+
+# --------------------------------------------------------------------------- #
+# IPC endpoint – gateway_client.py is the other end
+# --------------------------------------------------------------------------- #
+
+async def _ipc_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    name = "?"
+
+    def ack(msg_id, fut: asyncio.Future):
+        if writer.is_closing():
+            return
+        if fut.cancelled() or fut.exception() is not None:
+            err = "cancelled" if fut.cancelled() else f"{type(fut.exception()).__name__}: {fut.exception()}"
+            writer.write(encode({"op": "ack", "id": msg_id, "ok": False, "error": err}))
+        else:
+            writer.write(encode({"op": "ack", "id": msg_id, "ok": True, "message_id": fut.result()}))
+
+    try:
+        async for raw in reader:
+            try:
+                req = json.loads(raw)
+            except ValueError:
+                continue
+            if req.get("op") == "hello":
+                name = req.get("client", "?")
+                logging.info("IPC client connected: %s", name)
+                continue
+            if req.get("op") != "send":
+                continue
+            msg_id = req.get("id")
+            try:
+                # "block" waits here, so this client is not read until there is room
+                fut = await enqueue(int(req["channel"]), req.get("content"), req.get("embed"),
+                                    req.get("policy", "block"), req.get("key"))
+            except (OutboxFull, KeyError, ValueError) as e:
+                writer.write(encode({"op": "ack", "id": msg_id, "ok": False, "error": str(e)}))
+                continue
+            fut.add_done_callback(lambda f, i=msg_id: ack(i, f))
+    except ConnectionError:
+        pass
+    finally:
+        logging.info("IPC client gone: %s", name)
+        writer.close()
+
+
+async def serve_ipc():
+    address = default_address()
+    if isinstance(address, str):
+        os.makedirs(os.path.dirname(address), exist_ok=True)
+        if os.path.exists(address):
+            os.unlink(address)                         # stale socket from a previous run
+        server = await asyncio.start_unix_server(_ipc_client, path=address)
+    else:
+        server = await asyncio.start_server(_ipc_client, *address)
+    logging.info("IPC endpoint on %s", address)
+    return server
+
+
+# --------------------------------------------------------------------------- #
+# Headline search – inverted index kept current from the bus
+# --------------------------------------------------------------------------- #
+
+search: Optional[HeadlineSearch] = None      # created on the bot's loop
+
+
+class SearchPages(discord.ui.View):
+    """◀ ▶ buttons under a ``!search`` reply; the hits stay in memory."""
+
+    def __init__(self, result):
+        super().__init__(timeout=SEARCH_PAGE_TIMEOUT)
+        self.result = result
+        self.page = min(result.query.page, result.pages)
+        self._sync()
+
+    def render(self) -> str:
+        return f"```\n{format_page(search, self.result, self.page, width=150)}\n```"
+
+    def _sync(self):
+        self.prev.disabled = self.page <= 1
+        self.next.disabled = self.page >= self.result.pages
+
+    async def _turn(self, interaction: discord.Interaction, step: int):
+        self.page += step
+        self._sync()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def prev(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, -1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, +1)
+
 
 # --------------------------------------------------------------------------- #
 # Events
 # --------------------------------------------------------------------------- #
 
+@bot.event
+async def setup_hook():
+    global outbox, search
+    outbox = Outbox()
+    await serve_ipc()                          # clients may queue before login completes
+    search = HeadlineSearch()                  # snapshot; the rest is caught up in the task
+    asyncio.create_task(search.follow())
+    atexit.register(search.save)
+
+
 @bot.event
 async def on_ready():
     logging.info("Gateway logged in as %s (ID %s)", bot.user, bot.user.id)
+    channels.warm()
     _ready.set()
 
 
+@bot.event
+async def on_guild_channel_delete(channel):
+    channels.forget(channel.id)
+
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    channels.forget(before.id)
+
+
 # --------------------------------------------------------------------------- #
 # Public helper – thread-safe “fire-and-forget” send
 # --------------------------------------------------------------------------- #
@@ -48,13 +311,11 @@ async def on_ready():
 def send_message(channel_id: int,
                  content: Optional[str] = None,
                  embed: Optional[discord.Embed] = None):
-    """Send a message via the single bot from *any* sync or async context."""
+    """Send a message via the single bot from any thread *inside this process*
+    (other processes: ``gateway_client.send_message``)."""
     async def _send():
-        await _ready.wait()                            # wait until login completes
-        channel = bot.get_channel(channel_id)          # try cache
-        if channel is None:
-            channel = await bot.fetch_channel(channel_id)  # fallback API call
-        await channel.send(content=content, embed=embed)
+        fut = await enqueue(channel_id, content, embed.to_dict() if embed else None)
+        return await fut
 
     # run the coroutine on the bot’s event-loop
     return asyncio.run_coroutine_threadsafe(_send(), bot.loop)
@@ -64,20 +325,68 @@ def send_message(channel_id: int,
 # Bot commands (extend here as needed)
 # --------------------------------------------------------------------------- #
 
+@bot.command(name="outbox")
+async def outbox_stats(ctx):
+    """`!outbox` – gateway send queue and cache counters."""
+    await ctx.send(outbox.stats())
+
+
+@bot.command(name="search")
+async def search_headlines(ctx, *, query: str = ""):
+    """`!search qatar source:rtrs since:7d` – headline history, newest first.
+
+    Words must all match; `-word` excludes, `source:`/`src:` filters (comma
+    separated), `since:`/`until:` take 7d, 12h, 30m or YYYY-MM-DD, `page:N`.
+    """
+    if not query.strip():
+        await ctx.send("usage: `!search words [-word] [source:RTRS,FLY] [since:7d] [until:…] [page:N]`")
+        return
+    try:
+        result = search.search(query)
+    except ValueError as e:                    # bad since:/until:
+        await ctx.send(str(e))
+        return
+    if not result.total:
+        await ctx.send(f"no headlines match `{result.query}` ({len(search):,} indexed)")
+        return
+    pages = SearchPages(result)
+    await ctx.send(pages.render(), view=pages if result.pages > 1 else None)
+
+
+# The MetaTrader5 package is not thread-safe: every call into it goes through
+# this one worker, so commands queue behind each other instead of
+# overlapping, and a slow one (!risk pulling years of bars) keeps the loop free.
+MT5_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+
+
+async def in_mt5(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(MT5_EXECUTOR, fn, *args)
+
+
 @bot.command(name="positions")
 async def positions(ctx):
     """`!positions` – show current MT5 open positions."""
-    report = mt5.get_open_positions_report()
+    report = await in_mt5(mt5.get_open_positions_report)
     await ctx.send(report)
 
 
 @bot.command(name="weighted")
 async def weighted(ctx):
     """`!weighted` – net long/short lots by symbol."""
-    summary = mt5.get_weighted_positions_report()
+    summary = await in_mt5(mt5.get_weighted_positions_report)
     await ctx.send(summary)
 
 
+@bot.command(name="risk")
+async def risk(ctx):
+    """`!risk` – parametric and historical VaR / ES of the open book."""
+    try:
+        report = await in_mt5(mt5.get_risk_report)
+    except (RuntimeError, ValueError) as e:
+        report = f"risk failed: {e}"
+    await ctx.send(report)
+
+
 # --------------------------------------------------------------------------- #
 # Main entry-point
 # --------------------------------------------------------------------------- #
@@ -87,7 +396,7 @@ def main():
         level=logging.INFO,
         format="[%(asctime)s] %(levelname)s %(name)s: %(message)s",
     )
-    mt5.initialise()          # optional: connect so first command is instant
+    MT5_EXECUTOR.submit(mt5.initialise).result()   # optional: connect so first command is instant
     bot.run(TOKEN)
 
 
@@ -0,0 +1,205 @@
+"""
+gateway_client.py  – send through the running discord_gateway from any script.
+
+``discord_gateway.send_message`` only works inside the gateway process;
+importing it elsewhere starts a second bot.  The gateway instead listens on
+a local socket (Unix-domain where available, TCP loopback on Windows) and
+this module talks to it without importing discord at all:
+
+    from gateway_client import send_message
+    fut = send_message(855359994547011604, "hello")          # returns once written
+    fut.result(10)                                           # → message id
+
+Messages are JSON lines.  Every ``send`` carries a client-side id and is
+answered with an ``ack`` for that id once Discord accepted (or the gateway
+rejected) it, so each client knows exactly what went out.  The gateway's
+outbound queue is bounded; ``policy`` says what happens when it is full:
+
+    block   the gateway stops reading this client until there is room
+            (default – ``send`` then blocks in ``sendall`` once the socket
+            buffer is full, and the ``Future`` waits for the ack)
+    drop    rejected at once with ``ok: false``
+    merge   replaces a queued message with the same ``(channel, key)`` –
+            for status lines where only the latest matters, even when
+            the queue is not full; without one it behaves like block
+
+Address: ``DISCORD_GATEWAY`` env (``unix:/path`` or ``tcp:host:port``),
+else ``data/gateway.sock`` / ``127.0.0.1:8766``.
+
+CLI:
+
+    python gateway_client.py 855359994547011604 "test message"
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+SOCKET_PATH  = PROJECT_ROOT / "data" / "gateway.sock"
+TCP_ADDR     = ("127.0.0.1", 8766)
+RECONNECT    = 2.0            # seconds before retrying a refused connection
+POLICIES     = ("block", "drop", "merge")
+
+Address = Union[str, Tuple[str, int]]
+
+
+class GatewayError(Exception):
+    """The gateway is unreachable or refused the message."""
+
+
+def default_address() -> Address:
+    spec = os.environ.get("DISCORD_GATEWAY", "")
+    if spec.startswith("unix:"):
+        return spec[5:]
+    if spec.startswith("tcp:"):
+        host, _, port = spec[4:].rpartition(":")
+        return host, int(port)
+    return str(SOCKET_PATH) if hasattr(socket, "AF_UNIX") else TCP_ADDR
+
+
+def encode(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# --------------------------------------------------------------------------- #
+# Client
+# --------------------------------------------------------------------------- #
+
+class GatewayClient:
+    """One connection to the gateway; acks are matched to futures by id."""
+
+    def __init__(self, address: Optional[Address] = None, name: Optional[str] = None):
+        self.address = address or default_address()
+        self.name = name or Path(sys.argv[0] or "python").stem
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()   # one request on the stream at a time
+        self._sock: Optional[socket.socket] = None
+        self._retry_at = 0.0
+
+    def _connect(self) -> socket.socket:
+        if self._sock is not None:
+            return self._sock
+        if time.monotonic() < self._retry_at:
+            raise GatewayError(f"gateway at {self.address} unreachable")
+        try:
+            if isinstance(self.address, str):
+                s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            s.settimeout(5)
+            s.connect(self.address)
+            s.settimeout(None)
+            s.sendall(encode({"op": "hello", "client": self.name}))
+        except OSError as e:
+            self._retry_at = time.monotonic() + RECONNECT
+            raise GatewayError(f"gateway at {self.address} unreachable: {e}") from e
+        self._sock = s
+        threading.Thread(target=self._read, args=(s,), name="gateway-acks", daemon=True).start()
+        return s
+
+    def _read(self, sock: socket.socket):
+        with sock.makefile("rb") as rfile:
+            for raw in rfile:
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    continue
+                with self._lock:
+                    fut = self._pending.pop(msg.get("id"), None)
+                if fut is None:
+                    continue
+                if msg.get("ok"):
+                    fut.set_result(msg.get("message_id"))
+                else:
+                    fut.set_exception(GatewayError(msg.get("error", "rejected")))
+        self._lost(sock)
+
+    def _lost(self, sock: socket.socket):
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+                self._retry_at = time.monotonic() + RECONNECT
+            pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            # unacked: it may or may not have gone out, the caller decides
+            fut.set_exception(GatewayError("connection to gateway lost before ack"))
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def send(self, channel_id: int, content: Optional[str] = None, embed=None,
+             policy: str = "block", key: Optional[str] = None) -> Future:
+        """Write a message to the gateway; the Future resolves to the message id.
+
+        Returns once the request is written – with ``policy="block"`` that can
+        wait while the gateway's queue is full.  ``embed`` is a dict (or
+        anything with ``to_dict()``, e.g. discord.Embed).
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        if embed is not None and hasattr(embed, "to_dict"):
+            embed = embed.to_dict()
+        fut: Future = Future()
+        msg_id = next(self._ids)
+        req = {"op": "send", "id": msg_id, "channel": int(channel_id), "content": content,
+               "embed": embed, "policy": policy, "key": key}
+        with self._lock:
+            try:
+                sock = self._connect()
+            except GatewayError as e:
+                fut.set_exception(e)
+                return fut
+            self._pending[msg_id] = fut
+        try:
+            with self._send_lock:           # whole lines only – sendall may write in parts
+                sock.sendall(encode(req))
+        except OSError:
+            self._lost(sock)
+        return fut
+
+    def close(self):
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+_client: Optional[GatewayClient] = None
+_client_lock = threading.Lock()
+
+
+def send_message(channel_id: int, content: Optional[str] = None, embed=None,
+                 policy: str = "block", key: Optional[str] = None) -> Future:
+    """Same call as ``discord_gateway.send_message``, from any process."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GatewayClient()
+    return _client.send(channel_id, content, embed, policy, key)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python gateway_client.py CHANNEL_ID MESSAGE")
+    print("sent, id", send_message(int(sys.argv[1]), sys.argv[2]).result(30))
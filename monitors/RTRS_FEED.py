@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 # RTRS_FEED.py  –  Reuters Workspace live-headline streamer + Discord push
 
-import csv, re, sys, time, traceback, winsound, pythoncom, requests
-from collections import OrderedDict
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from pathlib import Path
+import sys, time, traceback, winsound, pythoncom
 from typing import List, Optional, Tuple
 
-from utils.Keys import DISCORD_BOT_TOKEN          # your token
+from utils.discord_sender import URGENT, get_sender
+from utils.headline_bus import BusPublisher
+from utils.dedup_index import DedupIndex
+from utils.latency import Stamps, source_time
+from monitors.rtrs_engine import Candidate, Node, select_headline
 import comtypes.client
 from comtypes.gen import UIAutomationClient as uia_defs
 from pywinauto import Desktop
@@ -17,30 +17,17 @@ from pywinauto.controls.uiawrapper import UIAWrapper
 # ─── USER SETTINGS ────────────────────────────────────────────────────────
 WIN_SUBSTR          = sys.argv[1] if len(sys.argv) > 1 else "FIATFEED"
 DOC_NAME            = "NEWS2.0"
-CSV_PATH            = Path("headlines.csv")
 DISCORD_CHANNEL_ID  = "855359994547011604"        # <-- put your channel ID here
-CACHE_SIZE          = 800
-TIME_RE             = re.compile(r"^\d{2}:\d{2}:\d{2}$")   # HH:MM:SS
 EMBED_COLOUR        = 0xFFA500                      # orange
 # ───────────────────────────────────────────────────────────────────────────
 
 # ─── Discord helper ───────────────────────────────────────────────────────
 def post_to_discord(channel_id: str, content: str):
-    url = f"https://discord.com/api/channels/{channel_id}/messages"
-    headers = {
-        "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
+    """Queued on the shared sender – returns at once, retried on 429/5xx."""
     embed = {"description": content, "color": EMBED_COLOUR}
-    resp = requests.post(url, headers=headers, json={"embeds": [embed]})
-    if resp.status_code not in (200, 201):
-        print(f"Discord error {resp.status_code}: {resp.text}", flush=True)
-
-# ─── UI-Automation plumbing (unchanged logic) ─────────────────────────────
-@dataclass
-class Candidate:
-    idx: int; ts: str; headline: str; top: int; offscreen: bool
+    get_sender().post(channel_id, embed=embed, priority=URGENT)
 
+# ─── UI-Automation plumbing ───────────────────────────────────────────────
 def locate_container(retries: int = 20, delay: float = .5
                      ) -> Tuple[UIAWrapper, UIAWrapper]:
     for _ in range(retries):
@@ -55,56 +42,52 @@ def locate_container(retries: int = 20, delay: float = .5
             time.sleep(delay)
     raise RuntimeError(f"Window '{WIN_SUBSTR}' or Document '{DOC_NAME}' not found")
 
+_cache_req = None
+_text_cond = None
+
+def snapshot(container: UIAWrapper) -> List[Node]:
+    """All Text descendants as (text, top, visible) in ONE cached UIA call."""
+    global _cache_req, _text_cond
+    if _cache_req is None:
+        _cache_req = uia.CreateCacheRequest()
+        for pid in (uia_defs.UIA_NamePropertyId,
+                    uia_defs.UIA_BoundingRectanglePropertyId,
+                    uia_defs.UIA_IsOffscreenPropertyId):
+            _cache_req.AddProperty(pid)
+        _text_cond = uia.CreatePropertyCondition(uia_defs.UIA_ControlTypePropertyId,
+                                                 uia_defs.UIA_TextControlTypeId)
+    found = container.element_info.element.FindAllBuildCache(
+        uia_defs.TreeScope_Descendants, _text_cond, _cache_req)
+    nodes: List[Node] = []
+    for i in range(found.Length):
+        el = found.GetElement(i)
+        nodes.append((el.CachedName or "", el.CachedBoundingRectangle.top,
+                      not el.CachedIsOffscreen))
+    return nodes
+
 def visible_headline(container: UIAWrapper) -> Optional[Candidate]:
-    nodes: List[UIAWrapper] = list(container.descendants(control_type="Text"))
-    cands: List[Candidate] = []
-    for i, ctrl in enumerate(nodes):
-        txt = ctrl.window_text().strip()
-        if not txt or TIME_RE.fullmatch(txt):
-            continue
-        ts = next((b.window_text().strip()
-                  for b in reversed(nodes[:i])
-                  if TIME_RE.fullmatch(b.window_text().strip())), "")
-        if not ts:
-            continue
-        cands.append(Candidate(i, ts, txt,
-                               ctrl.element_info.rectangle.top,
-                               not ctrl.is_visible()))
-    if not cands:
-        return None
-    onscreen = [c for c in cands if not c.offscreen]
-    return min(onscreen or cands, key=lambda c: c.top)
-
-# ─── CSV / dedup / alert / Discord ────────────────────────────────────────
-CSV_PATH.touch(exist_ok=True)
-csv_out = CSV_PATH.open("a", newline="", encoding="utf-8")
-csv_writer = csv.writer(csv_out)
-_seen = OrderedDict()
-
-def to_full_ts(raw: str) -> str:
-    now = datetime.now()
-    h, m, s = map(int, raw.split(":"))
-    ts = now.replace(hour=h, minute=m, second=s, microsecond=0)
-    if ts > now:
-        ts -= timedelta(days=1)
-    return ts.strftime("%Y-%m-%d %H:%M:%S"), ts.strftime("%H:%M")
-
-def emit(ts_raw: str, headline: str):
-    if headline in _seen:                           # dedup
+    return select_headline(snapshot(container))
+
+# ─── Store / dedup / alert / Discord ──────────────────────────────────────
+store = BusPublisher()                              # headline bus → store
+dedup = DedupIndex()                                # shared with other monitors
+
+def emit(ts_raw: str, headline: str, captured: Optional[float] = None):
+    stamps = Stamps().mark("capture", captured)
+    if dedup.seen(headline):                        # dedup
         return
-    _seen[headline] = None
-    if len(_seen) > CACHE_SIZE:
-        _seen.popitem(last=False)
+    stamps.mark("dedup")
 
-    full_ts, hhmm = to_full_ts(ts_raw)
-    print(f"{full_ts} | {headline}", flush=True)
-    csv_writer.writerow([full_ts, headline, "RTRS"]); csv_out.flush()
+    src = source_time(ts_raw)                       # keep the feed's seconds
+    stamps.mark("source", src.timestamp())
+    print(f"{src:%Y-%m-%d %H:%M:%S} | {headline}", flush=True)
+    store.append(headline, "RTRS", None, stamps.field())
 
     # beep
     winsound.Beep(1500, 400)
 
     # Discord
-    post_to_discord(DISCORD_CHANNEL_ID, f"**{hhmm} | {headline}**")
+    post_to_discord(DISCORD_CHANNEL_ID, f"**{src:%H:%M} | {headline}**")
 
 # ─── UIA event glue ───────────────────────────────────────────────────────
 uia = comtypes.client.CreateObject(uia_defs.CUIAutomation8,
@@ -114,8 +97,9 @@ class Handler(comtypes.COMObject):
     _com_interfaces_ = [uia_defs.IUIAutomationEventHandler]
     def __init__(self, box): super().__init__(); self.box = box
     def HandleAutomationEvent(self, *_):
+        t = time.time()                             # before the UIA round trip
         cand = visible_headline(self.box)
-        if cand: emit(cand.ts, cand.headline)
+        if cand: emit(cand.ts, cand.headline, t)
 
 # ─── Main loop ────────────────────────────────────────────────────────────
 def main():
@@ -141,7 +125,7 @@ def main():
         for eid in (uia_defs.UIA_StructureChangedEventId,
                     uia_defs.UIA_Text_TextChangedEventId):
             uia.RemoveAutomationEventHandler(eid, container.element_info.element, h)
-        csv_out.close()
+        store.close(); dedup.close()
 
 if __name__ == "__main__":
     try:
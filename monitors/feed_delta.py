@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# monitors/feed_delta.py
+
+"""
+Incremental diff engine for the FIATFEED control text.
+
+``FeedDelta.update(text)`` compares the new control text with the previous
+snapshot, narrows the change down to the lines between the common prefix and
+the common suffix, and returns only lines that are not already in a rolling
+LRU window of recently seen lines.  The window is a fixed number of line
+hashes, so memory stays flat no matter how long the monitor runs.  Bare
+``HH:MM:SS`` stamp lines never enter the window: the same stamp repeats
+(two headlines in one second, a daily 08:30:00 release) and dropping it
+would strip the next headline of its timestamp.
+
+``HeadlineTokenizer.feed(delta.text)`` then walks only that new text once,
+splitting it at ``HH:MM:SS`` stamps and classifying each headline as it goes,
+so the cost per update depends on what was inserted, not on the window size.
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+WINDOW_LINES = 5000      # how many recent lines count as "already seen"
+MIN_WORDS    = 5
+UPPER_RATIO  = 0.75
+
+TS_TOKEN = re.compile(r"\d{2}:\d{2}:\d{2}")
+
+
+def _is_stamp(line: str) -> bool:
+    return TS_TOKEN.fullmatch(line.strip()) is not None
+
+
+@dataclass
+class Delta:
+    lines: List[str] = field(default_factory=list)   # truly new lines, in order
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+
+class FeedDelta:
+    def __init__(self, window: int = WINDOW_LINES):
+        self._recent = OrderedDict()     # line hash -> None, least recent first
+        self._window = window
+        self._prev_text = ""
+        self._prev_lines: List[str] = []
+
+    # ------------------------------------------------------------------ #
+    def _remember(self, h: int) -> bool:
+        """Mark ``h`` as most recent; return True if it was not in the window."""
+        if h in self._recent:
+            self._recent.move_to_end(h)
+            return False
+        self._recent[h] = None
+        if len(self._recent) > self._window:
+            self._recent.popitem(last=False)
+        return True
+
+    def prime(self, text: str):
+        """Treat everything currently shown as already seen."""
+        self._prev_text = text
+        self._prev_lines = [ln for ln in text.splitlines() if ln.strip()]
+        for ln in self._prev_lines:
+            if not _is_stamp(ln):
+                self._remember(hash(ln))
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _changed_block(lines: List[str], prev: List[str]) -> List[str]:
+        """Lines of ``lines`` that are not simply carried over from ``prev``."""
+        if not prev:
+            return lines
+        # usual case – new items pushed in at the top, older ones fall off the
+        # bottom: find the old head and compare the overlap with C-level ops
+        try:
+            k = lines.index(prev[0])
+        except ValueError:
+            k = -1
+        if k >= 0:
+            m = min(len(lines) - k, len(prev))
+            if lines[k:k + m] == prev[:m]:
+                return lines[:k] + lines[k + m:]
+        # anything else – narrow to the block between common prefix and suffix
+        p, limit = 0, min(len(lines), len(prev))
+        while p < limit and lines[p] == prev[p]:
+            p += 1
+        s, limit = 0, limit - p
+        while s < limit and lines[-1 - s] == prev[-1 - s]:
+            s += 1
+        # a repeated stamp can match as common prefix – start the block at the
+        # stamp that owns its first line so the headline keeps its timestamp
+        if p < len(lines) - s and not _is_stamp(lines[p]):
+            q = p
+            while q > 0 and not _is_stamp(lines[q - 1]):
+                q -= 1
+            if q > 0:
+                p = q - 1
+        return lines[p:len(lines) - s]
+
+    def update(self, text: str) -> Delta:
+        if text == self._prev_text:                  # nothing changed
+            return Delta()
+        lines = [ln for ln in text.splitlines() if ln.strip()]
+        changed = self._changed_block(lines, self._prev_lines)
+        self._prev_text, self._prev_lines = text, lines
+        new: List[str] = []
+        for ln in changed:
+            if _is_stamp(ln) or self._remember(hash(ln)):   # scrolled-back lines are not new
+                new.append(ln)
+        return Delta(new)
+
+    def __len__(self):
+        return len(self._recent)
+
+
+# --------------------------------------------------------------------------- #
+# Streaming headline tokenizer
+# --------------------------------------------------------------------------- #
+
+@dataclass(frozen=True)
+class FeedItem:
+    ts: str                 # HH:MM:SS as shown in the feed
+    headline: str
+    kind: str               # "upper" | "mostly_upper" | "mixed" | "short"
+    upper_ratio: float
+
+    @property
+    def accepted(self) -> bool:
+        return self.kind in ("upper", "mostly_upper")
+
+
+def classify(text: str, min_words: int = MIN_WORDS,
+             threshold: float = UPPER_RATIO) -> tuple[str, float]:
+    """One pass over the words: (kind, share of fully upper-case words).
+
+    "upper" matches the old ``is_all_upper`` (no lower-case letter at all),
+    "mostly_upper" the old ``words_mostly_upper`` threshold.
+    """
+    words = upper = 0
+    has_lower = has_alpha = False
+    for w in text.split():
+        words += 1
+        if w.isupper():
+            upper += 1
+            has_alpha = True
+            continue
+        if w.upper() != w:                           # contains a lower-case letter
+            has_lower = True
+        if not has_alpha:
+            has_alpha = any(c.isalpha() for c in w)
+    ratio = upper / words if words else 0.0
+    if words < min_words:
+        return "short", ratio
+    if has_alpha and not has_lower:
+        return "upper", ratio
+    if ratio >= threshold:
+        return "mostly_upper", ratio
+    return "mixed", ratio
+
+
+def tokenize(text: str) -> Iterator[FeedItem]:
+    """Every (timestamp, headline) pair in ``text``, in order, single pass."""
+    prev: Optional[re.Match] = None
+    for m in TS_TOKEN.finditer(text):
+        if prev is not None:
+            yield _item(prev.group(), text[prev.end():m.start()])
+        prev = m
+    if prev is not None:
+        yield _item(prev.group(), text[prev.end():])
+
+
+def _item(ts: str, raw: str) -> FeedItem:
+    headline = raw.strip()
+    kind, ratio = classify(headline)
+    return FeedItem(ts, headline, kind, ratio)
+
+
+class HeadlineTokenizer:
+    """Feed newly inserted text; get back every complete new item.
+
+    A timestamp that arrives without any text after it (stamp and headline
+    landed in different updates) is carried over to the next ``feed``.
+    """
+
+    def __init__(self):
+        self._carry = ""
+
+    def feed(self, text: str) -> List[FeedItem]:
+        text = f"{self._carry}\n{text}" if self._carry else text
+        self._carry = ""
+        items = list(tokenize(text))
+        if items and not items[-1].headline:
+            self._carry = items.pop().ts
+        return [i for i in items if i.headline]
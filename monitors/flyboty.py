@@ -2,18 +2,61 @@
 # monitors/flylines_to_headlines.py
 
 """
-Monitor headlines from "Breaking News - The Fly" and log new items
-to headlines1.csv with timestamp format YYYY-MM-DD HH:MM:SS,HeadlineText,Source
+Monitor headlines from "Breaking News - The Fly" and append new items
+to the shared headline store (via utils/headline_bus.py) with Source="FLY"
+
+Default mode injects a MutationObserver into the page and streams every new
+a.newsTitleLink back over CDP (Runtime.addBinding), so nothing is reloaded or
+re-parsed while the page is live.  A reload only happens as a health check
+when the observer has been silent for STALE_AFTER seconds.
+
+    python monitors/flyboty.py          # event-driven (default)
+    python monitors/flyboty.py --poll   # legacy reload + full-HTML parse loop
 """
 
-import os
+import sys
 import time
+import queue
 import datetime
-import csv
 
 import pychrome
 from bs4 import BeautifulSoup
 
+from utils.headline_bus import BusPublisher
+from utils.dedup_index import DedupIndex
+from utils.latency import Stamps
+
+TAB_TITLE      = "Breaking News - The Fly"
+BINDING        = "__flyHeadline"
+HEALTH_INTERVAL = 15      # seconds between observer liveness checks
+STALE_AFTER    = 15 * 60  # reload the page if nothing arrived for this long
+
+# Installed once per document; re-running it is a no-op.  Existing links are
+# sent too so anything published while we were down is picked up (the shared
+# dedup index drops the ones we already have).
+OBSERVER_JS = f"""
+(() => {{
+  if (window.__flyObserver) return "present";
+  const sent = new Set();
+  const emit = (a) => {{
+    const t = (a.textContent || "").trim();
+    if (t && !sent.has(t)) {{ sent.add(t); window.{BINDING}(t); }}
+  }};
+  const scan = (n) => {{
+    if (n.nodeType !== 1) return;
+    if (n.matches("a.newsTitleLink")) emit(n);
+    n.querySelectorAll("a.newsTitleLink").forEach(emit);
+  }};
+  const obs = new MutationObserver((muts) => {{
+    for (const m of muts) m.addedNodes.forEach(scan);
+  }});
+  obs.observe(document.body, {{childList: true, subtree: true}});
+  window.__flyObserver = obs;
+  document.querySelectorAll("a.newsTitleLink").forEach(emit);
+  return "installed";
+}})()
+"""
+
 try:
     import winsound
     HAVE_WINSOUND = True
@@ -68,56 +111,104 @@ def parse_headlines(html_text):
         if link.get_text(strip=True)
     ]
 
-def load_existing(csv_filename):
-    existing = set()
-    if os.path.exists(csv_filename):
-        with open(csv_filename, "r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) >= 2:
-                    existing.add(row[1])
-    return existing
+def record(headline, store, dedup, captured=None):
+    stamps = Stamps().mark("capture", captured)
+    if dedup.seen(headline):
+        return
+    stamps.mark("dedup")
+    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] New headline: {headline}")
+    store.append(headline, "FLY", None, stamps.field())
+
+# ─── Event-driven mode ───────────────────────────────────────────────────
+def install_observer(tab):
+    result = tab.call_method("Runtime.evaluate", expression=OBSERVER_JS)
+    return result.get("result", {}).get("value", "")
+
+def observer_alive(tab):
+    result = tab.call_method("Runtime.evaluate",
+                             expression="!!window.__flyObserver", _timeout=5)
+    return bool(result.get("result", {}).get("value"))
+
+def stream_headlines(tab, store, dedup):
+    """Run until the tab dies; headlines arrive via the CDP binding."""
+    inbox = queue.Queue()
+
+    def on_binding(**kw):
+        if kw.get("name") == BINDING:
+            inbox.put((kw.get("payload", ""), time.time()))
+
+    def on_load(**_):
+        inbox.put(None)                      # new document – observer is gone
+
+    tab.set_listener("Runtime.bindingCalled", on_binding)
+    tab.set_listener("Page.loadEventFired", on_load)
+    tab.call_method("Page.enable")
+    tab.call_method("Runtime.addBinding", name=BINDING)
+    print(f"Observer {install_observer(tab)}.")
+
+    last_event = time.time()
+    last_check = time.time()
+    while True:
+        try:
+            item = inbox.get(timeout=HEALTH_INTERVAL)
+        except queue.Empty:
+            item = ""
+        if item is None:
+            print(f"Page reloaded – observer {install_observer(tab)}.")
+        elif item and item[0]:
+            headline, captured = item
+            last_event = time.time()
+            record(headline, store, dedup, captured)
+
+        now = time.time()
+        if now - last_check < HEALTH_INTERVAL:
+            continue
+        last_check = now
+        if not observer_alive(tab):
+            print(f"Observer missing – {install_observer(tab)}.")
+        elif now - last_event > STALE_AFTER:
+            print("No headlines for a while – health-check reload.")
+            tab.call_method("Page.reload", ignoreCache=True)
+            last_event = now
+
+# ─── Legacy polling mode ─────────────────────────────────────────────────
+def poll_headlines(tab, store, dedup):
+    while True:
+        refresh_page(tab)
+        html_text = dump_full_html(tab)
+        for headline in parse_headlines(html_text):
+            record(headline, store, dedup)
+        time.sleep(1)
 
 def main():
-    csv_file = os.path.join(os.path.dirname(__file__), "headlines1.csv")
+    watch = poll_headlines if "--poll" in sys.argv[1:] else stream_headlines
+    store = BusPublisher()        # headline bus → store
+    dedup = DedupIndex()          # shared with every other monitor
 
     browser = pychrome.Browser(url="http://127.0.0.1:9222")
     try:
-        tab = attach_to_tab(browser, "Breaking News - The Fly")
+        tab = attach_to_tab(browser, TAB_TITLE)
     except RuntimeError as e:
         print(f"Error: {e}")
         beep_error()
         return
 
-    seen = load_existing(csv_file)
-    print(f"Loaded {len(seen)} existing headlines.")
-
     try:
         while True:
             try:
-                refresh_page(tab)
-                html_text = dump_full_html(tab)
-                headlines = parse_headlines(html_text)
-                new_items = [h for h in headlines if h not in seen]
-
-                if new_items:
-                    with open(csv_file, "a", newline="", encoding="utf-8") as f:
-                        writer = csv.writer(f)
-                        for headline in new_items:
-                            seen.add(headline)
-                            ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            print(f"[{ts}] New headline: {headline}")
-                            # Add Source="FLY"
-                            writer.writerow([ts, headline, "FLY"])
-
-                time.sleep(1)
+                watch(tab, store, dedup)
 
             except pychrome.exceptions.RuntimeException as re:
                 print(f"Runtime error: {re}")
                 beep_error()
                 time.sleep(5)
                 try:
-                    tab = attach_to_tab(browser, "Breaking News - The Fly")
+                    tab.stop()
+                except:
+                    pass
+                try:
+                    tab = attach_to_tab(browser, TAB_TITLE)
                 except RuntimeError as e:
                     print(e)
                     beep_error()
@@ -132,6 +223,8 @@ def main():
         print("Monitoring stopped.")
 
     finally:
+        store.close()
+        dedup.close()
         try:
             tab.stop()
         except:
@@ -1,21 +1,28 @@
+import io
 import time
 import csv
 import datetime
 import logging
-import re
-import requests
 from pywinauto import Desktop, Application
-from utils.Keys import DISCORD_BOT_TOKEN, NOTEBOOK_CHANNEL_ID
+from utils.Keys import NOTEBOOK_CHANNEL_ID
+from utils.discord_sender import get_sender
+from utils.headline_bus import BusPublisher
+from utils.dedup_index import DedupIndex
+from utils.latency import Stamps, source_time
+from utils.rotating_log import compressed_rotating_handler, dump_logger
+from monitors.feed_delta import FeedDelta, HeadlineTokenizer, tokenize
 
 POLL_INTERVAL = 1
 WINDOW_TITLE = "FIATFEED"
 MAX_ATTEMPTS = 10
+DUMP_FILE = "control_dump_v2.csv"          # rotated + gzipped, new lines only
 
 logging.basicConfig(
-    filename="fiatfeed_monitor.log",
+    handlers=[compressed_rotating_handler("fiatfeed_monitor.log",
+                                          fmt="%(asctime)s - %(message)s")],
     level=logging.INFO,
-    format="%(asctime)s - %(message)s"
 )
+DUMP = dump_logger("fiatfeed.dump", DUMP_FILE)
 
 def log_message(message):
     ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -40,52 +47,36 @@ def find_window_pid():
             continue
     return None
 
-def is_all_upper(text):
-    filtered = ''.join(c for c in text if c.isalpha())
-    return bool(filtered) and filtered == filtered.upper()
-
-def words_mostly_upper(text, threshold=0.75):
-    words = text.split()
-    if not words:
-        return False, 0.0
-    count = sum(1 for word in words if word.isupper())
-    ratio = count / len(words)
-    return ratio >= threshold, ratio
-
 def extract_headline(full_text):
-    pattern = re.compile(r'(\d{2}:\d{2}:\d{2})\s+((?:(?!\d{2}:\d{2}:\d{2}).)+)', re.DOTALL)
-    for _, candidate in pattern.findall(full_text):
-        candidate = candidate.strip()
-        if len(candidate.split()) < 5:
-            continue
-        if is_all_upper(candidate):
-            return candidate
-        passes, _ = words_mostly_upper(candidate)
-        if passes:
-            return candidate
-    return None
+    """First accepted headline in ``full_text`` (one-shot helper; the monitor
+    itself streams deltas through HeadlineTokenizer)."""
+    return next((i.headline for i in tokenize(full_text) if i.accepted), None)
 
 def post_to_discord(message):
-    url = f"https://discord.com/api/v9/channels/{NOTEBOOK_CHANNEL_ID}/messages"
-    headers = {"Authorization": f"Bot {DISCORD_BOT_TOKEN}", "Content-Type": "application/json"}
-    payload = {"content": message}
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-    except Exception as e:
-        log_message(f"Discord post failed: {e}")
+    fut = get_sender().post(NOTEBOOK_CHANNEL_ID, content=message)
+    fut.add_done_callback(lambda f: f.exception() and log_message(f"Discord post failed: {f.exception()}"))
+
+STORE = BusPublisher()                     # headline bus → store
+DEDUP = DedupIndex()                       # headlines, shared by all monitors
+
+def log_headline(headline, stamps=None):
+    # append to the shared headline store, with Source="RTRS"
+    STORE.append(headline, "RTRS", None, *([stamps.field()] if stamps else []))
 
-def log_headline_csv(headline):
+def dump_lines(lines):
     ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    # append to the unified headlines1.csv, with Source="RTRS"
-    with open("headlines1.csv", "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([ts, headline, "RTRS"])
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for line in lines:
+        writer.writerow([ts, line])
+    DUMP.info(buf.getvalue().rstrip("\n"))
 
 def monitor_control(control, main_window):
     spinner = ['|', '/', '-', '\\']
     index = 0
-    seen = set(control.window_text().splitlines())
+    delta = FeedDelta()
+    tokens = HeadlineTokenizer()
+    delta.prime(control.window_text())
     log_message("Monitoring control for updates...")
     while True:
         time.sleep(POLL_INTERVAL)
@@ -93,30 +84,28 @@ def monitor_control(control, main_window):
             log_message(f"Window '{WINDOW_TITLE}' no longer exists.")
             break
         try:
+            captured = time.time()
             current_text = control.window_text()
         except Exception as e:
             log_message(f"Error reading control: {e}")
             break
-        current_lines = [line for line in current_text.splitlines() if line.strip()]
-        new_lines = [ln for ln in current_lines if ln not in seen]
-        for ln in new_lines:
-            seen.add(ln)
+        new_lines = delta.update(current_text)
         if new_lines:
             beep()
             try:
-                with open("control_dump_v2.csv", "a", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow([datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
-                    for line in current_text.splitlines():
-                        writer.writerow([line])
-                    writer.writerow([])
+                dump_lines(new_lines.lines)
             except Exception as e:
                 log_message(f"Dump error: {e}")
-            headline = extract_headline(current_text)
-            if headline:
-                log_message(f"Extracted headline: {headline}")
-                log_headline_csv(headline)
-            else:
+            items = [i for i in tokens.feed(new_lines.text) if i.accepted]
+            for item in items:
+                stamps = Stamps().mark("capture", captured)
+                if DEDUP.seen(item.headline):
+                    log_message(f"Duplicate headline skipped: {item.headline}")
+                else:
+                    stamps.mark("dedup").mark("source", source_time(item.ts).timestamp())
+                    log_message(f"Extracted headline ({item.kind}, {item.ts}): {item.headline}")
+                    log_headline(item.headline, stamps)
+            if not items:
                 log_message("No valid headline extracted.")
         else:
             print(f"Monitoring {spinner[index]}", end='\r', flush=True)
@@ -1,22 +1,29 @@
 #!/usr/bin/env python3
 # monitors/newsquawk_recorder.py
 
-import os
+import argparse
 import sys
 import time
 import json
-import tempfile
-import wave
-import datetime
 import logging
-import csv
+import queue
+import threading
 
 import requests
 import websocket
 import numpy as np
 import pyaudiowpatch as pyaudio
-from openai import OpenAI
-from utils import Keys  # your local credentials helper
+from utils.headline_bus import BusPublisher
+from utils.dedup_index import DedupIndex
+from utils.latency import Stamps
+from utils.discord_sender import URGENT, get_sender
+from monitors.squawk_audio import SPEECH_RATE, encode_wav, to_speech_rate
+from monitors.squawk_vad import FrameVad, Segment, VadConfig
+from monitors.transcribe import FixtureBackend, Transcriber, TranscriptCache, make_backend
+from monitors.squawk_text import (BINDING, HEADLINE_SELECTOR, MATCH_THRESHOLD, CdpSession,
+                                   RecentText, TextGate, install_observer)
+from monitors.squawk_pipeline import (AudioRing, MetricsReporter, OrderedPublisher,
+                                       StageQueue, Transcript, Utterance, WorkerPool)
 
 # ── Logging setup ────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -26,32 +33,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# ── Credentials ─────────────────────────────────────────────────────────
+# ── Discord ─────────────────────────────────────────────────────────────
 DISCORD_CHANNEL = 855359994547011604
-OPENAI_CLIENT = OpenAI(api_key=Keys.OPENAI_API)
-DISCORD_URL = (
-    f"https://discord.com/api/v10/channels/"
-    f"{DISCORD_CHANNEL}/messages"
-)
-DISCORD_HEADERS = {
-    "Authorization": f"Bot {Keys.DISCORD_BOT_TOKEN}",
-    "Content-Type": "application/json"
-}
 
 # ── Chrome/CDP settings ──────────────────────────────────────────────────
 DEBUG_PORT = 9222
 TARGET_URL = "https://newsquawk.com/headlines/list"
 
 # ── VAD & audio parameters ───────────────────────────────────────────────
-POLL_INTERVAL = 0.5  # seconds per chunk
-SKIP_DURATION = 0.2 # skip clips < 170ms
-RMS_THRESHOLD = 500  # speech threshold
-SILENCE_DEBOUNCE = 2.5  # seconds of silence to end utterance
+# thresholds live in squawk_vad.VadConfig / vad_profiles.json (per device);
+# tune them offline with `python monitors/squawk_vad.py recording.wav`
+VAD_BLOCK = 0.1  # seconds of audio handed to the VAD per ring read
 MIN_WORDS = 5  # require at least 5 words before posting
-# --- new: skip any WAV file smaller than ~32 KB (tune as needed) ---
-MIN_FILE_SIZE_BYTES = 32_000
+# skip any WAV smaller than ~0.17 s of 16 kHz mono (the old 32 KB at 48 kHz stereo)
+MIN_FILE_SIZE_BYTES = 5_400
+
+# ── Pipeline sizing ──────────────────────────────────────────────────────
+CAPTURE_CHUNK = 0.05     # seconds per stream.read – small, so the driver never overflows
+RING_SECONDS = 120       # audio the VAD may fall behind before frames are lost
+CLIP_QUEUE = 32          # clips held by the text gate
+UTTERANCE_QUEUE = 16     # clips waiting for a transcription worker
+TRANSCRIBE_WORKERS = 3
+TRANSCRIBE_BACKENDS = ["openai"]   # primary first; see monitors/transcribe.py for specs
+PUBLISH_QUEUE = 64
+METRICS_INTERVAL = 60    # seconds between queue-depth log lines
 
-CSV_PATH = os.path.join(os.path.dirname(__file__), "headlines1.csv")
+STORE = BusPublisher()    # headline bus → store (direct if the broker is down)
+DEDUP = DedupIndex()      # the squawk repeats headlines other feeds already had
+RECENT = RecentText()     # Newsquawk's own text headlines, for matching transcripts
+# text_loop and the OrderedPublisher thread both dedup and append – one at a time,
+# so neither can take the other's bus ack or pass the same headline as new
+PUBLISH_LOCK = threading.Lock()
 
 def get_ws_url():
     logger.debug("Fetching Chrome tabs on port %d…", DEBUG_PORT)
@@ -69,154 +81,259 @@ def get_ws_url():
 
 # ── Discord posting ───────────────────────────────────────────────────────
 def post_to_discord(text: str):
-    payload = {
-        "embeds": [{"description": text, "color": 0x32CD32}]
-    }
     logger.debug("Posting to Discord channel %s: %r", DISCORD_CHANNEL, text)
-    r = requests.post(DISCORD_URL, json=payload, headers=DISCORD_HEADERS)
-    if r.status_code not in (200, 204):
-        logger.warning("Discord post failed: %s %s", r.status_code, r.text)
+    get_sender().post(DISCORD_CHANNEL, embed={"description": text, "color": 0x32CD32},
+                      priority=URGENT)
 
 # ── 1) Connect to Chrome DevTools ────────────────────────────────────────
-ws_url = get_ws_url()
-logger.info("✅ Connecting to CDP…")
-ws = websocket.create_connection(ws_url, origin=f"http://127.0.0.1:{DEBUG_PORT}")
-msg_id = 1
-ws.send(json.dumps({"id": msg_id, "method": "Runtime.enable"}))
-while True:
-    m = json.loads(ws.recv())
-    if m.get("id") == msg_id:
-        logger.debug("CDP Runtime.enable acknowledged")
-        break
-msg_id += 1
+def connect_cdp(inbox: "queue.Queue"):
+    """Attach to the headlines tab; DOM headlines and reloads land in ``inbox``."""
+    ws_url = get_ws_url()
+    logger.info("✅ Connecting to CDP…")
+    ws = websocket.create_connection(ws_url, origin=f"http://127.0.0.1:{DEBUG_PORT}")
+    cdp = CdpSession(ws)
 
-# ── 2) Set up WASAPI loopback ───────────────────────────────────────────
-pa = pyaudio.PyAudio()
-api_info = pa.get_host_api_info_by_type(pyaudio.paWASAPI)
-out_idx = api_info["defaultOutputDevice"]
-dev_info = pa.get_device_info_by_index(out_idx)
-if not dev_info.get("isLoopbackDevice"):
-    for i in range(pa.get_device_count()):
-        d = pa.get_device_info_by_index(i)
-        if d.get("isLoopbackDevice") and dev_info["name"] in d["name"]:
-            dev_info = d
-            break
-
-SAMPLE_RATE = int(dev_info["defaultSampleRate"])
-CHANNELS = dev_info["maxInputChannels"]
-CHUNK = int(SAMPLE_RATE * POLL_INTERVAL)
-
-logger.info(
-    "🎧 Capturing via %s (rate=%d, channels=%d, chunk=%d)",
-    dev_info["name"], SAMPLE_RATE, CHANNELS, CHUNK
-)
+    def on_binding(params):
+        if params.get("name") == BINDING:
+            inbox.put(params.get("payload", ""))
 
-stream = pa.open(
-    format=pyaudio.paInt16,
-    channels=CHANNELS,
-    rate=SAMPLE_RATE,
-    input=True,
-    frames_per_buffer=CHUNK,
-    input_device_index=dev_info["index"]
-)
+    cdp.on("Runtime.bindingCalled", on_binding)
+    cdp.on("Page.loadEventFired", lambda _: inbox.put(None))   # observer is gone
+    cdp.call("Runtime.enable")
+    cdp.call("Page.enable")
+    cdp.call("Runtime.addBinding", name=BINDING)
+    logger.debug("CDP Runtime/Page enabled, binding %s added", BINDING)
+    return cdp
 
-# ── 3) Main loop: pure RMS‐based VAD ────────────────────────────────────
-logger.info("▶️ Monitoring for speech… Ctrl-C to stop")
-try:
-    recording = False
-    frames = []
-    silent_at = None
-    start_t = None
-
-    logger.debug(
-        "Parameters: RMS_THRESHOLD=%d, SKIP_DURATION=%.3fs, SILENCE_DEBOUNCE=%.3fs, MIN_WORDS=%d",
-        RMS_THRESHOLD, SKIP_DURATION, SILENCE_DEBOUNCE, MIN_WORDS
+
+def text_loop(cdp: CdpSession, inbox: "queue.Queue", selector: str, stop: threading.Event):
+    """Newsquawk's text headlines → store (Source="NWK") and the match window."""
+    logger.info("📰 Text observer %s (%s)", install_observer(cdp, selector), selector)
+    while not stop.is_set():
+        try:
+            payload = inbox.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        if payload is None:                       # page reloaded – re-inject
+            time.sleep(1)
+            logger.info("📰 Page reloaded, observer %s", install_observer(cdp, selector))
+            continue
+        try:
+            item = json.loads(payload)
+        except ValueError:
+            continue
+        text = " ".join(item.get("text", "").split())
+        if not text:
+            continue
+        now = time.time()
+        # headlines already on the page can be matched but must not excuse a
+        # clip from transcription – nobody is reading them out right now
+        RECENT.add(text, int(now * 1000), now, claimed=bool(item.get("initial")))
+        stamps = Stamps().mark("capture", now)
+        with PUBLISH_LOCK:
+            if DEDUP.seen(text):
+                continue
+            # ts=None: the wall clock at append, like every live writer
+            STORE.append(text, "NWK", None, stamps.mark("dedup").field())
+        logger.info("📰 %s", text)
+
+
+# ── 2) Set up WASAPI loopback ───────────────────────────────────────────
+def open_loopback():
+    pa = pyaudio.PyAudio()
+    api_info = pa.get_host_api_info_by_type(pyaudio.paWASAPI)
+    out_idx = api_info["defaultOutputDevice"]
+    dev_info = pa.get_device_info_by_index(out_idx)
+    if not dev_info.get("isLoopbackDevice"):
+        for i in range(pa.get_device_count()):
+            d = pa.get_device_info_by_index(i)
+            if d.get("isLoopbackDevice") and dev_info["name"] in d["name"]:
+                dev_info = d
+                break
+
+    rate = int(dev_info["defaultSampleRate"])
+    channels = dev_info["maxInputChannels"]
+    chunk = int(rate * CAPTURE_CHUNK)
+    logger.info(
+        "🎧 Capturing via %s (rate=%d, channels=%d, chunk=%d)",
+        dev_info["name"], rate, channels, chunk
+    )
+    stream = pa.open(
+        format=pyaudio.paInt16,
+        channels=channels,
+        rate=rate,
+        input=True,
+        frames_per_buffer=chunk,
+        input_device_index=dev_info["index"]
     )
+    return pa, stream, dev_info["name"], rate, channels, chunk
+
+
+# ── 3) Pipeline stages ──────────────────────────────────────────────────
+def capture_loop(stream, chunk: int, ring: AudioRing, stop: threading.Event):
+    """Only reads the device and copies into the ring – nothing here may block."""
+    while not stop.is_set():
+        raw = stream.read(chunk, exception_on_overflow=False)
+        ring.write(np.frombuffer(raw, dtype=np.int16))
+
+
+class VadStage:
+    """Runs ``FrameVad`` over VAD_BLOCK reads from the ring.
+
+    Times come from the ring's frame counter, not the wall clock, so a VAD
+    that is running behind still stamps clips correctly.
+    """
+
+    def __init__(self, ring: AudioRing, config: VadConfig, out: StageQueue,
+                 publisher: OrderedPublisher):
+        self.ring, self.out, self.publisher = ring, out, publisher
+        self.vad = FrameVad(ring.rate, ring.channels, config)
+        self.block = int(ring.rate * VAD_BLOCK)
+        self.seq = 0
+        self._base = None                 # ring frame the detector's frame 0 maps to
+        self._next = None
+
+    def run(self, stop: threading.Event):
+        logger.debug("VAD parameters: %s, MIN_WORDS=%d", self.vad.cfg, MIN_WORDS)
+        while not stop.is_set():
+            got = self.ring.read(self.block, timeout=1.0)
+            if got is None:
+                continue
+            pos, pcm = got
+            if self._base is None:
+                self._base = self._next = pos
+            elif pos != self._next:            # ring overrun: audio was skipped
+                self._base += pos - self._next
+            self._next = pos + len(pcm)
+            for seg in self.vad.process(pcm):
+                self.emit(seg)
+
+    def emit(self, seg: Segment):
+        start_t = self.ring.time_of(self._base + seg.start)
+        logger.info("🔴 Speech %.3f → %.3f (%.2fs, noise floor %.0f)",
+                    start_t, start_t + seg.duration, seg.duration, self.vad.floor)
+        # seg.pcm is a view into the detector's reusable buffer – this
+        # downmixed 16 kHz copy is the only audio that leaves the thread
+        pcm = to_speech_rate(seg.pcm, self.ring.rate)
+        utt = Utterance(self.seq, start_t, seg.duration, pcm, SPEECH_RATE, 1)
+        if not self.out.offer(utt):
+            self.publisher.skip(self.seq)      # keep the publisher's sequence gap-free
+        self.seq += 1
+
+
+def transcribe(stt: Transcriber, utt: Utterance):
+    """Worker-pool job: WAV-encode one clip and hand it to the backend."""
+    buf = encode_wav(utt.pcm, utt.rate, utt.channels)
+    file_size = buf.getbuffer().nbytes
+    logger.info("🟢 Encoded clip #%d (%.2fs, %d bytes)", utt.seq, utt.duration, file_size)
+    if file_size < MIN_FILE_SIZE_BYTES:
+        logger.warning("Skipped too‐small clip (%d bytes)", file_size)
+        return None
+    text = stt.transcribe(buf.getvalue())
+    logger.info("Transcription result: %r", text)
+    return text
+
+
+def publish(item: Transcript):
+    text = item.text
+    # source = speech start, capture = clip end; transcription shows up as capture→dedup
+    stamps = Stamps().mark("source", item.start_t).mark("capture", item.end_t)
+    score, ref = RECENT.match(text)
+    if len(text.split()) < MIN_WORDS:
+        logger.warning("Too few words (%d), skipping: %r", len(text.split()), text)
+        return
+    with PUBLISH_LOCK:
+        if ref is not None and score >= MATCH_THRESHOLD:
+            # already have it as text – keep the audio version, linked, but don't post
+            logger.info("🔗 Squawk matches text headline (%.2f): %r", score, ref.text)
+            STORE.append(text, "SQUAWK", None, f"ref=NWK@{ref.ts_ms}",
+                         stamps.mark("dedup").field())
+            return
+        if DEDUP.seen(text):
+            logger.info("Duplicate headline skipped: %r", text)
+            return
+        # append with Source="SQUAWK"
+        STORE.append(text, "SQUAWK", None, stamps.mark("dedup").field())
+    post_to_discord(text)
+
+
+# ── 4) Main ─────────────────────────────────────────────────────────────
+def build_transcriber(specs, fixture_latency: float = 0.0) -> Transcriber:
+    backends = [make_backend(s, **({"latency": fixture_latency} if s.startswith("fixture") else {}))
+                for s in specs]
+    # fixture text must never land in the real cache file
+    fixture = any(isinstance(b, FixtureBackend) for b in backends)
+    cache = TranscriptCache(None) if fixture else TranscriptCache()
+    logger.info("🗣️ Transcription via %s", ", ".join(b.name for b in backends))
+    return Transcriber(backends, cache, max_workers=TRANSCRIBE_WORKERS * 2)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Newsquawk audio → headlines")
+    ap.add_argument("--stt", action="append",
+                    help="transcription backend spec, repeat for fallbacks "
+                         "(openai | local:URL[#model] | fixture[:map.json])")
+    ap.add_argument("--fixture-latency", type=float, default=0.0,
+                    help="simulated delay for the fixture backend (load tests)")
+    ap.add_argument("--selector", default=HEADLINE_SELECTOR,
+                    help="CSS selector of a headline element on the Newsquawk page")
+    ap.add_argument("--transcribe-all", action="store_true",
+                    help="send every clip to transcription even if text covered it")
+    args = ap.parse_args(argv)
+    stt = build_transcriber(args.stt or TRANSCRIBE_BACKENDS, args.fixture_latency)
+
+    text_inbox = queue.Queue()
+    cdp = connect_cdp(text_inbox)
+    pa, stream, device, rate, channels, chunk = open_loopback()
+
+    stop = threading.Event()
+    ring = AudioRing(RING_SECONDS, rate, channels)
+    clips = StageQueue("clips", CLIP_QUEUE)
+    utterances = StageQueue("utterances", UTTERANCE_QUEUE)
+    transcripts = StageQueue("transcripts", PUBLISH_QUEUE)
+    publisher = OrderedPublisher(transcripts, publish)
+    gate = TextGate(clips, utterances, RECENT, publisher, skip_covered=not args.transcribe_all)
+    pool = WorkerPool("stt", TRANSCRIBE_WORKERS, utterances, transcripts,
+                      lambda utt: transcribe(stt, utt))
+    vad = VadStage(ring, VadConfig.for_device(device), clips, publisher)
+
+    threads = [
+        threading.Thread(target=capture_loop, args=(stream, chunk, ring, stop),
+                         name="capture", daemon=True),
+        threading.Thread(target=vad.run, args=(stop,), name="vad", daemon=True),
+        threading.Thread(target=text_loop, args=(cdp, text_inbox, args.selector, stop),
+                         name="text", daemon=True),
+    ]
+    publisher.start()
+    pool.start()
+    gate.start()
+    for t in threads:
+        t.start()
+    MetricsReporter(METRICS_INTERVAL, ring, clips, gate, utterances, pool, stt,
+                    transcripts, publisher).start()
+
+    logger.info("▶️ Monitoring for speech… Ctrl-C to stop")
+    try:
+        while all(t.is_alive() for t in threads):
+            time.sleep(1)
+        logger.error("A pipeline thread died – exiting")
+    except KeyboardInterrupt:
+        logger.info("🛑 User stopped")
+    finally:
+        logger.info("💤 Cleaning up…")
+        stop.set()
+        for t in threads:
+            t.join(timeout=2)
+        stream.stop_stream()
+        stream.close()
+        pa.terminate()
+        cdp.ws.close()
+        stt.close()
+        with PUBLISH_LOCK:                  # a thread that outlived join() may be mid-append
+            STORE.close()
+            DEDUP.close()
+        logger.info("💤 Exiting")
+
 
-    while True:
-        raw = stream.read(CHUNK, exception_on_overflow=False)
-        pcm = np.frombuffer(raw, dtype=np.int16)
-        rms = int(np.sqrt(np.mean(pcm.astype(np.float32) ** 2)))
-        # only log RMS when above threshold
-        if rms >= RMS_THRESHOLD:
-            logger.info("RMS=%d", rms)
-
-        if not recording:
-            if rms >= RMS_THRESHOLD:
-                recording = True
-                frames = [raw]
-                start_t = time.time()
-                silent_at = None
-                logger.info("🔴 Started recording at %.3f", start_t)
-        else:
-            frames.append(raw)
-            if rms < RMS_THRESHOLD:
-                if silent_at is None:
-                    silent_at = time.time()
-                    logger.debug("Silence detected, debounce starts at %.3f", silent_at)
-                elif time.time() - silent_at >= SILENCE_DEBOUNCE:
-                    end_t = time.time()
-                    duration = end_t - start_t
-                    logger.info("Silence debounce passed—stopping at %.3f (%.3fs)", end_t, duration)
-                    if duration < SKIP_DURATION:
-                        logger.warning("Skipped too-short clip (%.3fs < %.3fs)", duration, SKIP_DURATION)
-                    else:
-                        tmp = os.path.join(tempfile.gettempdir(), f"nwk_{int(start_t)}.wav")
-                        with wave.open(tmp, 'wb') as wf:
-                            wf.setnchannels(CHANNELS)
-                            wf.setsampwidth(pa.get_sample_size(pyaudio.paInt16))
-                            wf.setframerate(SAMPLE_RATE)
-                            wf.writeframes(b''.join(frames))
-                            file_size = os.path.getsize(tmp)
-                        logger.info("🟢 Saved clip (%.2fs) → %s", duration, tmp)
-                        if file_size < MIN_FILE_SIZE_BYTES:
-                            logger.warning("Skipped too‐small clip (%d bytes)", file_size)
-                        else:
-                            # transcribe
-                            logger.debug("Calling Whisper for transcription…")
-                        # transcribe
-                        try:
-                            logger.debug("Calling Whisper for transcription…")
-                            with open(tmp, "rb") as f:
-                                resp = OPENAI_CLIENT.audio.transcriptions.create(
-                                    model="whisper-1",
-                                    file=f,
-                                    language="en",
-                                    prompt="This is an announcer squawking financial headlines and events, transcribe accurately"
-                                )
-                            text = resp.text.strip()
-                            logger.info("Transcription result: %r", text)
-                            if len(text.split()) < MIN_WORDS:
-                                logger.warning("Too few words (%d), skipping: %r", len(text.split()), text)
-                            else:
-                                ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
-                                # append with Source="Squawk"
-                                with open(CSV_PATH, "a", newline="", encoding="utf-8") as csvf:
-                                    writer = csv.writer(csvf)
-                                    writer.writerow([ts, text, "Squawk"])
-                                post_to_discord(text)
-                        except Exception as e:
-                            logger.error("⚠️ Transcription error: %s", e)
-
-                        try:
-                            os.remove(tmp)
-                            logger.debug("Deleted temp file %s", tmp)
-                        except OSError as e:
-                            logger.warning("Could not delete temp file: %s", e)
-
-                    recording = False
-                    silent_at = None
-
-        time.sleep(POLL_INTERVAL)
-
-except KeyboardInterrupt:
-    logger.info("🛑 User stopped")
-
-finally:
-    logger.info("💤 Cleaning up…")
-    stream.stop_stream()
-    stream.close()
-    pa.terminate()
-    ws.close()
-    logger.info("💤 Exiting")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# rtrs_engine.py  –  platform-independent headline picking for RTRS_FEED
+
+"""
+Pure logic behind ``RTRS_FEED``: given one snapshot of the Workspace news
+list as ``(text, top, visible)`` tuples in document order, pair each headline
+with the timestamp that precedes it and pick the top-most visible one.
+
+Nothing here touches UI Automation, so the engine runs (and is benchmarked)
+on any platform against recorded ``dump_controls.py`` CSVs – see
+``rtrs_replay.py``.
+"""
+
+import csv
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+TIME_RE = re.compile(r"^\d{2}:\d{2}:\d{2}$")   # HH:MM:SS
+RECT_RE = re.compile(r"\(L(-?\d+), T(-?\d+), R(-?\d+), B(-?\d+)\)")
+
+Node = Tuple[str, int, bool]                    # (text, top, visible)
+
+
+@dataclass
+class Candidate:
+    idx: int; ts: str; headline: str; top: int; offscreen: bool
+
+
+# ─── Engine ───────────────────────────────────────────────────────────────
+def pair_headlines(nodes: Iterable[Node]) -> List[Candidate]:
+    """Every non-timestamp Text node that follows a timestamp, in one pass."""
+    cands: List[Candidate] = []
+    last_ts = ""
+    for i, (text, top, visible) in enumerate(nodes):
+        txt = text.strip()
+        if not txt:
+            continue
+        if TIME_RE.fullmatch(txt):
+            last_ts = txt
+            continue
+        if last_ts:
+            cands.append(Candidate(i, last_ts, txt, top, not visible))
+    return cands
+
+
+def select_headline(nodes: Iterable[Node]) -> Optional[Candidate]:
+    """Top-most on-screen candidate (falls back to top-most overall)."""
+    best_on: Optional[Candidate] = None
+    best_any: Optional[Candidate] = None
+    for c in pair_headlines(nodes):
+        if best_any is None or c.top < best_any.top:
+            best_any = c
+        if not c.offscreen and (best_on is None or c.top < best_on.top):
+            best_on = c
+    return best_on or best_any
+
+
+# ─── Recorded dumps ───────────────────────────────────────────────────────
+def load_dump(path: Path) -> List[Node]:
+    """Text nodes of a ``dump_controls.py`` CSV as an engine snapshot.
+
+    The dump carries no visibility flag; UIA reports off-screen elements
+    with an empty rectangle, so a zero-area rect is treated as not visible.
+    """
+    nodes: List[Node] = []
+    with Path(path).open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["control_type"] != "Text":
+                continue
+            m = RECT_RE.match(row["rect"])
+            l, t, r, b = map(int, m.groups()) if m else (0, 0, 0, 0)
+            nodes.append((row["name"] or "", t, r > l and b > t))
+    return nodes
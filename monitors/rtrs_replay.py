@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# rtrs_replay.py  –  replay recorded UIA dumps through rtrs_engine
+
+"""
+Feed recorded ``dump_controls.py`` CSVs through the RTRS headline engine,
+check the answer against the original quadratic implementation and report
+throughput – no Workspace / Windows needed.
+
+Run:  python monitors/rtrs_replay.py                          # fiatfeed_controls.csv
+   or: python monitors/rtrs_replay.py dump1.csv dump2.csv -n 2000
+   or: python monitors/rtrs_replay.py --scale 50              # 50x longer list
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # project root
+from monitors.rtrs_engine import TIME_RE, Candidate, Node, load_dump, select_headline
+
+DEFAULT_DUMP = Path(__file__).resolve().parent / "fiatfeed_controls.csv"
+
+
+def reference_select(nodes: List[Node]) -> Optional[Candidate]:
+    """The pre-engine algorithm (backwards walk per node), kept as an oracle."""
+    cands: List[Candidate] = []
+    for i, (text, top, visible) in enumerate(nodes):
+        txt = text.strip()
+        if not txt or TIME_RE.fullmatch(txt):
+            continue
+        ts = next((b.strip() for b, _, _ in reversed(nodes[:i])
+                   if TIME_RE.fullmatch(b.strip())), "")
+        if not ts:
+            continue
+        cands.append(Candidate(i, ts, txt, top, not visible))
+    if not cands:
+        return None
+    onscreen = [c for c in cands if not c.offscreen]
+    return min(onscreen or cands, key=lambda c: c.top)
+
+
+def bench(fn, nodes: List[Node], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(nodes)
+    return (time.perf_counter() - t0) / repeat
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("dumps", nargs="*", type=Path, default=[DEFAULT_DUMP])
+    ap.add_argument("-n", "--repeat", type=int, default=500)
+    ap.add_argument("--scale", type=int, default=1,
+                    help="repeat each snapshot's nodes N times (longer feed)")
+    args = ap.parse_args(argv)
+
+    ok = True
+    for path in args.dumps:
+        nodes = load_dump(path) * args.scale
+        got, want = select_headline(nodes), reference_select(nodes)
+        same = got == want
+        ok &= same
+        t_eng = bench(select_headline, nodes, args.repeat)
+        t_ref = bench(reference_select, nodes, max(1, args.repeat // 50))
+        print(f"{path.name}: {len(nodes):,} text nodes")
+        print(f"  pick      : {got.ts + ' | ' + got.headline if got else '<none>'}")
+        print(f"  matches reference: {'yes' if same else 'NO'}")
+        print(f"  engine    : {t_eng * 1e6:9.1f} µs/snapshot "
+              f"({len(nodes) / t_eng:,.0f} nodes/s)")
+        print(f"  reference : {t_ref * 1e6:9.1f} µs/snapshot "
+              f"(x{t_ref / t_eng:,.0f} slower)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
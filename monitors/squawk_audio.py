@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# monitors/squawk_audio.py  –  clip buffers and upload encoding for the recorder
+
+"""
+Whisper resamples everything to 16 kHz mono anyway, so uploading the device's
+native 48 kHz stereo just ships six times the bytes.  This module:
+
+  * ``ClipBuffer`` – one preallocated int16 buffer the VAD writes speech into,
+    reused for every clip (no per-chunk lists, no ``b''.join``)
+  * ``to_speech_rate`` – downmix + anti-aliased resample to 16 kHz straight
+    out of that buffer, producing the only copy that leaves the VAD thread
+  * ``encode_wav`` – 16-bit WAV in a ``BytesIO`` ready for the API client
+
+    pcm16 = to_speech_rate(seg.pcm, 48000)      # (n,) int16 @ 16 kHz
+    upload = encode_wav(pcm16)                   # BytesIO named "clip.wav"
+"""
+
+import io
+import wave
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SPEECH_RATE = 16_000
+FILTER_TAPS = 63
+
+
+class ClipBuffer:
+    """Preallocated (frames, channels) int16 buffer with an append cursor."""
+
+    def __init__(self, max_frames: int, channels: int):
+        self._buf = np.empty((max_frames, channels), dtype=np.int16)
+        self.n = 0
+
+    def extend(self, pcm: np.ndarray):
+        k = min(len(pcm), len(self._buf) - self.n)
+        self._buf[self.n:self.n + k] = pcm[:k]
+        self.n += k
+
+    def view(self, frames: int = None) -> np.ndarray:
+        """The recorded frames – a view, valid until the next ``reset``."""
+        return self._buf[:self.n if frames is None else min(frames, self.n)]
+
+    def reset(self):
+        self.n = 0
+
+    @property
+    def full(self) -> bool:
+        return self.n >= len(self._buf)
+
+
+@lru_cache(maxsize=8)
+def _lowpass(src: int, dst: int, taps: int = FILTER_TAPS) -> np.ndarray:
+    """Hann-windowed sinc, cut-off just under the target Nyquist."""
+    cutoff = 0.45 * dst / src                       # cycles per input sample
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+def to_speech_rate(pcm: np.ndarray, rate: int, target: int = SPEECH_RATE) -> np.ndarray:
+    """Downmix to mono and resample to ``target`` Hz; returns a new int16 array."""
+    mono = pcm.mean(axis=1, dtype=np.float32) if pcm.ndim == 2 else pcm.astype(np.float32)
+    if rate == target:
+        return mono.astype(np.int16)
+    if rate < target:                               # 8k / 11k devices: linear upsample, no filter
+        t = np.arange(int(len(mono) * target / rate)) * (rate / target)
+        return np.interp(t, np.arange(len(mono)), mono).astype(np.int16)
+
+    h = _lowpass(rate, target)
+    pad = len(h) // 2
+    x = np.pad(mono, (pad, pad), mode="edge")
+    g = gcd(rate, target)
+    step = rate // target
+    if target * step == rate:                       # 48k → 16k: FIR only the kept samples
+        y = sliding_window_view(x, len(h))[::step] @ h
+    else:                                           # 44.1k → 16k: filter, then interpolate
+        y = np.convolve(x, h, mode="valid")
+        t = np.arange(len(mono) * (target // g) // (rate // g)) * (rate / target)
+        y = np.interp(t, np.arange(len(y)), y)
+    return np.clip(y, -32768, 32767).astype(np.int16)
+
+
+def encode_wav(pcm16: np.ndarray, rate: int = SPEECH_RATE, channels: int = 1,
+               name: str = "clip.wav") -> io.BytesIO:
+    """16-bit PCM WAV in memory, rewound, with a filename the API can sniff."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(memoryview(np.ascontiguousarray(pcm16)).cast("B"))
+    buf.seek(0)
+    buf.name = name
+    return buf
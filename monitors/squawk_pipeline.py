@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# monitors/squawk_pipeline.py
+
+"""
+Building blocks for the staged Newsquawk recorder:
+
+    capture thread ──► AudioRing ──► VAD thread ──► StageQueue ──► transcription
+                                                                 worker pool
+                                  publish thread ◄── StageQueue ◄──┘
+
+Each stage only ever blocks on its own input, so a 30 s Whisper call never
+stalls capture.  Every queue and the ring keep counters (depth, high-water
+mark, drops) that ``MetricsReporter`` logs periodically.
+"""
+
+import heapq
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# ── Ring buffer between capture and VAD ─────────────────────────────────
+class AudioRing:
+    """Single-producer / single-consumer int16 ring of interleaved samples.
+
+    Positions are absolute frame counts since capture start, so the reader
+    can turn them into timestamps and tell exactly how much it lost if it
+    ever falls a full ring behind.
+    """
+
+    def __init__(self, seconds: float, rate: int, channels: int):
+        self.rate, self.channels = rate, channels
+        self.capacity = int(seconds * rate)                 # frames
+        self._buf = np.zeros((self.capacity, channels), dtype=np.int16)
+        self._written = 0                                    # frames, absolute
+        self._read = 0
+        self._cond = threading.Condition()
+        self.started_at = None                               # wall time of frame 0
+        self.overruns = 0                                    # frames lost
+        self.max_lag = 0
+
+    def write(self, pcm: np.ndarray):
+        frames = pcm.reshape(-1, self.channels)
+        n = len(frames)
+        with self._cond:
+            if self.started_at is None:
+                self.started_at = time.time()
+            if n > self.capacity:                            # only the tail survives
+                self._written += n - self.capacity
+                frames, n = frames[-self.capacity:], self.capacity
+            start = self._written % self.capacity
+            first = min(n, self.capacity - start)
+            self._buf[start:start + first] = frames[:first]
+            if first < n:
+                self._buf[:n - first] = frames[first:]
+            self._written += n
+            self._cond.notify()
+
+    def read(self, frames: int, timeout: Optional[float] = None
+             ) -> Optional[Tuple[int, np.ndarray]]:
+        """Block until ``frames`` are available; return (start_frame, copy)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._written - self._read >= frames,
+                                       timeout):
+                return None
+            lag = self._written - self._read
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.capacity:                          # reader fell behind
+                lost = lag - self.capacity
+                self.overruns += lost
+                self._read += lost
+                logger.warning("Audio ring overrun – %d frames lost", lost)
+            start = self._read
+            idx = (np.arange(start, start + frames) % self.capacity)
+            out = self._buf[idx]
+            self._read += frames
+            return start, out
+
+    def time_of(self, frame: int) -> float:
+        return (self.started_at or time.time()) + frame / self.rate
+
+    def lag(self) -> int:
+        return self._written - self._read
+
+    def stats(self) -> str:
+        return (f"ring lag {self.lag() / self.rate:.2f}s "
+                f"(max {self.max_lag / self.rate:.2f}s, overruns {self.overruns})")
+
+
+# ── Bounded queues with metrics ─────────────────────────────────────────
+class StageQueue(queue.Queue):
+    """Bounded queue that counts depth, high-water mark and drops."""
+
+    def __init__(self, name: str, maxsize: int):
+        super().__init__(maxsize)
+        self.name = name
+        self.high_water = 0
+        self.dropped = 0
+        self.passed = 0
+
+    def offer(self, item, timeout: float = 0.0) -> bool:
+        """Put without blocking the producer for long; count a drop if full."""
+        try:
+            self.put(item, timeout=timeout) if timeout else self.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("%s queue full – dropped item", self.name)
+            return False
+        self.passed += 1
+        self.high_water = max(self.high_water, self.qsize())
+        return True
+
+    def stats(self) -> str:
+        return (f"{self.name} depth {self.qsize()}/{self.maxsize} "
+                f"(max {self.high_water}, in {self.passed}, dropped {self.dropped})")
+
+
+# ── Work items ──────────────────────────────────────────────────────────
+@dataclass
+class Utterance:
+    seq: int
+    start_t: float              # wall clock of the first sample
+    duration: float
+    pcm: np.ndarray             # int16 at ``rate`` (the recorder sends 16 kHz mono)
+    rate: int
+    channels: int
+
+
+@dataclass(order=True)
+class Transcript:
+    seq: int
+    start_t: float = field(compare=False)
+    text: Optional[str] = field(compare=False, default=None)   # None = nothing to post
+    latency: float = field(compare=False, default=0.0)
+    end_t: float = field(compare=False, default=0.0)
+
+
+# ── Transcription worker pool ───────────────────────────────────────────
+class WorkerPool:
+    """N threads pulling Utterances and pushing exactly one Transcript each."""
+
+    def __init__(self, name: str, workers: int, inbox: StageQueue,
+                 outbox: StageQueue, fn: Callable[[Utterance], Optional[str]]):
+        self.name, self.inbox, self.outbox, self.fn = name, inbox, outbox, fn
+        self.busy = 0
+        self.done = 0
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, name=f"{name}-{i}",
+                                          daemon=True) for i in range(workers)]
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+
+    def _run(self):
+        while True:
+            utt = self.inbox.get()
+            with self._lock:
+                self.busy += 1
+            t0 = time.time()
+            try:
+                text = self.fn(utt)
+            except Exception as e:
+                logger.error("⚠️ %s failed on clip #%d: %s", self.name, utt.seq, e)
+                text = None
+            with self._lock:
+                self.busy -= 1
+                self.done += 1
+            # always hand something on so the publisher never waits on a gap
+            self.outbox.put(Transcript(utt.seq, utt.start_t, text, time.time() - t0,
+                                       utt.start_t + utt.duration))
+
+    def stats(self) -> str:
+        return f"{self.name} busy {self.busy}/{len(self._threads)} (done {self.done})"
+
+
+# ── In-order publisher ──────────────────────────────────────────────────
+class OrderedPublisher(threading.Thread):
+    """Releases transcripts in capture order even if workers finish out of order."""
+
+    def __init__(self, inbox: StageQueue, fn: Callable[[Transcript], None]):
+        super().__init__(name="publish", daemon=True)
+        self.inbox, self.fn = inbox, fn
+        self._next = 0
+        self._held: List[Transcript] = []
+        self.published = 0
+
+    def run(self):
+        while True:
+            heapq.heappush(self._held, self.inbox.get())
+            while self._held and self._held[0].seq == self._next:
+                item = heapq.heappop(self._held)
+                self._next += 1
+                if item.text is None:
+                    continue
+                try:
+                    self.fn(item)
+                    self.published += 1
+                except Exception as e:
+                    logger.error("Publish failed: %s", e)
+
+    def skip(self, seq: int):
+        """Account for a clip that never reached the pool (dropped upstream)."""
+        self.inbox.put(Transcript(seq, 0.0))
+
+    def stats(self) -> str:
+        return f"publish held {len(self._held)} (published {self.published})"
+
+
+# ── Periodic metrics log ────────────────────────────────────────────────
+class MetricsReporter(threading.Thread):
+    def __init__(self, interval: float, *sources):
+        super().__init__(name="metrics", daemon=True)
+        self.interval, self.sources = interval, sources
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            logger.info("📊 %s", " | ".join(s.stats() for s in self.sources))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# monitors/squawk_text.py  –  Newsquawk text headlines and audio/text matching
+
+"""
+The Newsquawk tab the recorder is attached to already shows every headline
+the squawk reads out, usually within seconds.  This module uses that:
+
+  * ``CdpSession`` – the recorder's CDP websocket with a reader thread, so
+    commands and events (``Runtime.bindingCalled``) can share it
+  * ``OBSERVER_JS`` – a MutationObserver that pushes each new headline
+    element (``HEADLINE_SELECTOR``, configurable) through a CDP binding
+  * ``RecentText`` – the text headlines of the last few minutes, with a
+    fuzzy ``match(transcript)`` (word-set containment + difflib ratio)
+  * ``TextGate`` – a pipeline stage between the VAD and transcription that
+    holds every clip for ``hold`` seconds after it ends.  A clip whose
+    speaking time is covered by text headlines that arrived around it is
+    not transcribed at all; the rest go on to the worker pool.
+
+A squawk that does get transcribed is matched again afterwards; if it
+repeats a text headline it is linked to it in the store instead of being
+posted.
+"""
+
+import difflib
+import itertools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from monitors.squawk_pipeline import OrderedPublisher, StageQueue, Utterance
+
+logger = logging.getLogger(__name__)
+
+BINDING           = "__nwkHeadline"
+HEADLINE_SELECTOR = ".headline-title, .news-item .title, [data-headline]"
+TEXT_WINDOW       = 5 * 60   # seconds of text headlines kept for matching
+MATCH_THRESHOLD   = 0.6      # fuzzy score at which a transcript is "the same"
+HOLD              = 8.0      # seconds a clip waits for its text counterpart
+LEAD              = 20.0     # text may arrive this long before the clip starts
+WORDS_PER_SEC     = 2.8      # squawk reading pace, for "is this clip covered?"
+READ_PAD          = 1.5      # seconds of intro/pauses per headline read out
+
+# Installed once per document.  Headlines already on the page are sent too
+# (flagged initial) so anything published while we were down is picked up –
+# the shared dedup index drops the ones we already have.
+OBSERVER_JS = """
+((selector) => {{
+  if (window.__nwkObserver) return "present";
+  const sent = new Set();
+  const emit = (el, initial) => {{
+    const t = (el.textContent || "").trim();
+    if (t && !sent.has(t)) {{
+      sent.add(t);
+      window.{binding}(JSON.stringify({{text: t, initial: initial}}));
+    }}
+  }};
+  const scan = (n) => {{
+    if (n.nodeType !== 1) return;
+    if (n.matches(selector)) emit(n, false);
+    n.querySelectorAll(selector).forEach((el) => emit(el, false));
+  }};
+  const obs = new MutationObserver((muts) => {{
+    for (const m of muts) m.addedNodes.forEach(scan);
+  }});
+  obs.observe(document.body, {{childList: true, subtree: true}});
+  window.__nwkObserver = obs;
+  document.querySelectorAll(selector).forEach((el) => emit(el, true));
+  return "installed";
+}})({selector})
+"""
+
+
+# ── CDP over the recorder's websocket ───────────────────────────────────
+class CdpSession:
+    """Request/response plus event dispatch on one websocket-client connection."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._handlers: Dict[str, List[Callable[[dict], None]]] = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, name="cdp", daemon=True)
+        self._reader.start()
+
+    def on(self, method: str, fn: Callable[[dict], None]):
+        self._handlers.setdefault(method, []).append(fn)
+
+    def call(self, method: str, timeout: float = 10.0, **params) -> dict:
+        fut: Future = Future()
+        with self._lock:
+            msg_id = next(self._ids)
+            self._pending[msg_id] = fut
+        self.ws.send(json.dumps({"id": msg_id, "method": method, "params": params}))
+        return fut.result(timeout)
+
+    def alive(self) -> bool:
+        return self._reader.is_alive()
+
+    def _read(self):
+        while True:
+            try:
+                m = json.loads(self.ws.recv())
+            except Exception as e:           # socket closed / tab gone
+                logger.warning("CDP connection closed: %s", e)
+                break
+            if "id" in m:
+                with self._lock:
+                    fut = self._pending.pop(m["id"], None)
+                if fut is not None:
+                    if "error" in m:
+                        fut.set_exception(RuntimeError(m["error"].get("message")))
+                    else:
+                        fut.set_result(m.get("result", {}))
+                continue
+            for fn in self._handlers.get(m.get("method"), ()):
+                try:
+                    fn(m.get("params", {}))
+                except Exception as e:
+                    logger.error("CDP handler for %s failed: %s", m.get("method"), e)
+        with self._lock:
+            for fut in self._pending.values():
+                fut.set_exception(ConnectionError("CDP connection closed"))
+            self._pending.clear()
+
+
+def install_observer(cdp: CdpSession, selector: str = HEADLINE_SELECTOR) -> str:
+    js = OBSERVER_JS.format(binding=BINDING, selector=json.dumps(selector))
+    result = cdp.call("Runtime.evaluate", expression=js)
+    return result.get("result", {}).get("value", "")
+
+
+# ── Recent text headlines + fuzzy matching ──────────────────────────────
+_WORD = re.compile(r"[a-z0-9%.$€£]+")
+_STOP = frozenset("the a an of to in on and for at by is are be as from with it its says "
+                  "said has have will".split())
+
+
+def _words(text: str) -> List[str]:
+    return [w.strip(".") for w in _WORD.findall(text.lower()) if w.strip(".") not in _STOP]
+
+
+@dataclass
+class TextHeadline:
+    arrived: float
+    text: str
+    ts_ms: int
+    words: frozenset = field(default=frozenset())
+    read_time: float = 0.0            # estimated seconds to squawk it
+    claimed: bool = False             # already accounted for by a held clip
+
+
+class RecentText:
+    def __init__(self, window: float = TEXT_WINDOW):
+        self.window = window
+        self._items: Deque[TextHeadline] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, text: str, ts_ms: int, arrived: Optional[float] = None,
+            claimed: bool = False) -> TextHeadline:
+        """``claimed=True`` for headlines that were already on the page – they
+        can still be matched but must not excuse a clip from transcription."""
+        words = _words(text)
+        item = TextHeadline(arrived or time.time(), text, ts_ms, frozenset(words),
+                            len(text.split()) / WORDS_PER_SEC + READ_PAD, claimed)
+        with self._lock:
+            self._items.append(item)
+            self._expire(item.arrived)
+        return item
+
+    def _expire(self, now: float):
+        while self._items and now - self._items[0].arrived > self.window:
+            self._items.popleft()
+
+    def match(self, transcript: str) -> Tuple[float, Optional[TextHeadline]]:
+        """Best (score, headline) for a transcript; score in [0, 1]."""
+        tw = set(_words(transcript))
+        if not tw:
+            return 0.0, None
+        low = transcript.lower()
+        best, best_item = 0.0, None
+        with self._lock:
+            self._expire(time.time())
+            items = list(self._items)
+        for item in items:
+            if not item.words:
+                continue
+            # share of the headline's words the announcer said – robust to
+            # "Newsquawk:" intros and several headlines in one clip
+            contain = len(item.words & tw) / len(item.words)
+            if contain < 0.3:                       # cheap pre-filter
+                continue
+            ratio = difflib.SequenceMatcher(None, item.text.lower(), low).ratio()
+            score = max(contain, ratio)
+            if score > best:
+                best, best_item = score, item
+        return best, best_item
+
+    def claim_between(self, start: float, end: float, needed: float) -> bool:
+        """Mark unclaimed headlines that arrived in [start, end] as read out by a
+        clip of ``needed`` seconds; True if they cover it."""
+        with self._lock:
+            cands = [i for i in self._items if start <= i.arrived <= end and not i.claimed]
+            covered = sum(i.read_time for i in cands)
+            if not cands or covered < needed:
+                return False
+            for i in cands:
+                i.claimed = True
+            return True
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ── Hold-and-decide stage between VAD and transcription ─────────────────
+class TextGate(threading.Thread):
+    """Hold each clip until ``hold`` s after it ended, then transcribe or skip."""
+
+    def __init__(self, inbox: StageQueue, outbox: StageQueue, text: RecentText,
+                 publisher: OrderedPublisher, hold: float = HOLD, lead: float = LEAD,
+                 skip_covered: bool = True):
+        super().__init__(name="text-gate", daemon=True)
+        self.inbox, self.outbox, self.text, self.publisher = inbox, outbox, text, publisher
+        self.hold, self.lead, self.skip_covered = hold, lead, skip_covered
+        self._held: Deque[Utterance] = deque()      # clips arrive in capture order
+        self.skipped = self.forwarded = 0
+
+    def run(self):
+        while True:
+            timeout = None
+            if self._held:
+                first = self._held[0]
+                timeout = max(0.0, first.start_t + first.duration + self.hold - time.time())
+            try:
+                self._held.append(self.inbox.get(timeout=timeout))
+            except queue.Empty:                     # the head clip is due
+                pass
+            now = time.time()
+            while self._held and self._held[0].start_t + self._held[0].duration + self.hold <= now:
+                self._decide(self._held.popleft())
+
+    def _decide(self, utt: Utterance):
+        end = utt.start_t + utt.duration
+        if self.skip_covered and self.text.claim_between(
+                utt.start_t - self.lead, end + self.hold, utt.duration):
+            self.skipped += 1
+            logger.info("📰 Clip #%d (%.1fs) covered by text headlines – not transcribed",
+                        utt.seq, utt.duration)
+            self.publisher.skip(utt.seq)
+            return
+        if self.outbox.offer(utt):
+            self.forwarded += 1
+        else:
+            self.publisher.skip(utt.seq)
+
+    def stats(self) -> str:
+        return (f"text-gate held {len(self._held)} (forwarded {self.forwarded}, "
+                f"covered by text {self.skipped}, text window {len(self.text)})")
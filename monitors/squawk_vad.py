@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# monitors/squawk_vad.py  –  frame-level VAD for the Newsquawk recorder
+
+"""
+Voice-activity detection on 20 ms frames instead of one RMS per 0.5 s chunk.
+
+Per frame (vectorised over every whole frame in a block):
+  * RMS energy, compared against an adaptive noise floor
+    (falls fast, rises slowly, only learns from non-speech frames)
+  * zero-crossing rate, so broadband hiss with enough energy is not speech
+
+A segment opens after ``onset_ms`` of speech frames and is back-dated by
+``preroll_ms`` so the first syllable survives; it closes ``hangover_ms``
+after the last speech frame (the old SILENCE_DEBOUNCE) to the frame, not to
+the next chunk boundary.
+
+Thresholds can be tuned per capture device in ``vad_profiles.json``
+(keys are substrings of the device name) and offline with the replay CLI:
+
+Run:  python monitors/squawk_vad.py clip.wav [clip2.wav …]
+   or: python monitors/squawk_vad.py clip.wav --energy-ratio 4 --hangover-ms 1500
+   or: python monitors/squawk_vad.py clip.wav --device "Speakers (Realtek" --legacy
+"""
+
+import argparse
+import json
+import sys
+import time
+import wave
+from collections import deque
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # project root
+from monitors.squawk_audio import ClipBuffer
+
+PROFILE_FILE = Path(__file__).resolve().parent / "vad_profiles.json"
+
+
+@dataclass(frozen=True)
+class VadConfig:
+    frame_ms: int = 20
+    min_rms: float = 300.0        # absolute floor – never speech below this
+    energy_ratio: float = 3.0     # speech = rms ≥ noise floor × ratio (~ +9.5 dB)
+    zcr_max: float = 0.35         # crossings per sample above which a frame is noise…
+    zcr_override: float = 2.0     # …unless it is this many times over threshold
+    floor_up: float = 0.01        # noise-floor adaptation per frame, rising
+    floor_down: float = 0.3       # and falling
+    onset_ms: int = 60            # speech needed to open a segment
+    preroll_ms: int = 300
+    hangover_ms: int = 2500       # silence needed to close a segment
+    min_speech_ms: int = 200      # shorter segments are dropped (old SKIP_DURATION)
+    max_segment_s: float = 60.0   # force a cut in never-ending audio
+
+    @classmethod
+    def for_device(cls, name: str, path: Path = PROFILE_FILE, **overrides) -> "VadConfig":
+        """Defaults, then the first profile whose key is in ``name``, then overrides."""
+        cfg = cls()
+        if path.exists():
+            profiles = json.loads(path.read_text(encoding="utf-8"))
+            for key, values in profiles.items():
+                if key != "default" and key.lower() in (name or "").lower():
+                    break
+            else:
+                values = profiles.get("default", {})
+            cfg = replace(cfg, **values)
+        return replace(cfg, **{k: v for k, v in overrides.items() if v is not None})
+
+
+@dataclass
+class Segment:
+    start: int                    # absolute sample frame (pre-roll included)
+    end: int                      # exclusive
+    rate: int
+    pcm: Optional[np.ndarray] = None   # view into the detector's ClipBuffer – valid
+                                       # only until the next process()/flush()
+
+    @property
+    def start_s(self) -> float:
+        return self.start / self.rate
+
+    @property
+    def end_s(self) -> float:
+        return self.end / self.rate
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / self.rate
+
+
+def frame_features(pcm: np.ndarray, frame_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(rms, zcr) for every whole frame of an int16 (frames, channels) block."""
+    mono = pcm.mean(axis=1, dtype=np.float32) if pcm.ndim == 2 else pcm.astype(np.float32)
+    n = len(mono) // frame_len
+    x = mono[:n * frame_len].reshape(n, frame_len)
+    rms = np.sqrt(np.einsum("ij,ij->i", x, x) / frame_len)
+    signs = np.signbit(x)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_len
+    return rms, zcr
+
+
+class FrameVad:
+    """Streaming detector: feed arbitrary blocks, get finished ``Segment``s."""
+
+    def __init__(self, rate: int, channels: int = 1, config: VadConfig = VadConfig(),
+                 keep_audio: bool = True):
+        self.rate, self.channels, self.cfg = rate, channels, config
+        self.keep_audio = keep_audio
+        self.frame_len = max(1, rate * config.frame_ms // 1000)
+        ms = lambda v: max(1, int(round(v / config.frame_ms)))
+        self._onset, self._hang = ms(config.onset_ms), ms(config.hangover_ms)
+        self._min_frames = ms(config.min_speech_ms)
+        self._tail = ms(config.preroll_ms)           # keep as much after speech as before
+        self._max_frames = ms(config.max_segment_s * 1000)
+        self._preroll = deque(maxlen=ms(config.preroll_ms) + self._onset)
+        self._rest = np.zeros((0, channels), dtype=np.int16)   # partial frame
+        self._pos = 0                                          # frame index of next frame
+        self.floor = float(config.min_rms) / config.energy_ratio
+        self._run = 0                     # consecutive speech frames while idle
+        self._silence = 0                 # consecutive non-speech frames while active
+        self._active = False
+        self._clip = ClipBuffer(self._max_frames * self.frame_len, channels) if keep_audio else None
+        self._start = 0                   # first frame incl. pre-roll
+        self._onset_at = 0                # first speech frame
+        self._last_speech = 0
+
+    # ------------------------------------------------------------------ #
+    def process(self, pcm: np.ndarray) -> List[Segment]:
+        pcm = pcm.reshape(-1, self.channels)
+        if len(self._rest):
+            pcm = np.concatenate((self._rest, pcm))
+        n = len(pcm) // self.frame_len
+        self._rest = pcm[n * self.frame_len:]
+        if not n:
+            return []
+        rms, zcr = frame_features(pcm[:n * self.frame_len], self.frame_len)
+        blocks = pcm[:n * self.frame_len].reshape(n, self.frame_len, self.channels)
+        out: List[Segment] = []
+        cfg = self.cfg
+        for i in range(n):
+            e, z = rms[i], zcr[i]
+            thr = max(cfg.min_rms, self.floor * cfg.energy_ratio)
+            speech = e >= thr and (z <= cfg.zcr_max or e >= thr * cfg.zcr_override)
+            if not speech:                                 # learn the floor from noise only
+                a = cfg.floor_down if e < self.floor else cfg.floor_up
+                self.floor += a * (e - self.floor)
+            seg = self._step(speech, blocks[i])
+            if seg is not None:
+                out.append(seg)
+            self._pos += 1
+        return out
+
+    def flush(self) -> List[Segment]:
+        """Close an open segment at end of input."""
+        if not self._active:
+            return []
+        seg = self._close(self._last_speech + 1)
+        return [seg] if seg else []
+
+    # ------------------------------------------------------------------ #
+    def _step(self, speech: bool, frame: np.ndarray) -> Optional[Segment]:
+        if not self._active:
+            self._preroll.append(frame)
+            self._run = self._run + 1 if speech else 0
+            if self._run >= self._onset:
+                self._active = True
+                self._start = self._pos + 1 - len(self._preroll)
+                if self.keep_audio:
+                    self._clip.reset()
+                    for f in self._preroll:
+                        self._clip.extend(f)
+                self._onset_at = self._pos + 1 - self._onset
+                self._last_speech, self._silence = self._pos, 0
+                self._preroll.clear()
+            return None
+
+        if self.keep_audio:
+            self._clip.extend(frame)
+        if speech:
+            self._last_speech, self._silence = self._pos, 0
+        else:
+            self._silence += 1
+        if self._silence >= self._hang or self._pos + 1 - self._start >= self._max_frames:
+            return self._close(min(self._pos + 1, self._last_speech + 1 + self._tail))
+        return None
+
+    def _close(self, end: int) -> Optional[Segment]:
+        start = self._start
+        self._active, self._run, self._silence = False, 0, 0
+        if self._last_speech + 1 - self._onset_at < self._min_frames:
+            return None
+        pcm = self._clip.view((end - start) * self.frame_len) if self.keep_audio else None
+        return Segment(start * self.frame_len, end * self.frame_len, self.rate, pcm)
+
+
+# --------------------------------------------------------------------------- #
+# Offline replay
+# --------------------------------------------------------------------------- #
+
+def read_wav(path: Path) -> Tuple[np.ndarray, int, int]:
+    with wave.open(str(path), "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return pcm.reshape(-1, channels), rate, channels
+
+
+def legacy_segments(pcm: np.ndarray, rate: int, threshold: float = 500,
+                    chunk_s: float = 0.5, debounce: float = 2.5,
+                    skip: float = 0.2) -> List[Tuple[float, float]]:
+    """The recorder's original one-RMS-per-chunk rules, for comparison."""
+    chunk = int(rate * chunk_s)
+    out, start, silent_at = [], None, None
+    for k in range(len(pcm) // chunk):
+        c = pcm[k * chunk:(k + 1) * chunk].astype(np.float32)
+        rms, now = np.sqrt(np.mean(c ** 2)), (k + 1) * chunk_s
+        if start is None:
+            if rms >= threshold:
+                start, silent_at = k * chunk_s, None
+        elif rms < threshold:
+            if silent_at is None:
+                silent_at = now
+            elif now - silent_at >= debounce:
+                if now - start >= skip:
+                    out.append((start, now))
+                start = None
+        # (the old loop never reset silent_at when speech resumed)
+    return out
+
+
+def replay(path: Path, cfg: VadConfig, block_ms: int = 100):
+    pcm, rate, channels = read_wav(path)
+    vad = FrameVad(rate, channels, cfg, keep_audio=False)
+    block = rate * block_ms // 1000
+    t0 = time.perf_counter()
+    segs = []
+    for i in range(0, len(pcm), block):
+        segs += vad.process(pcm[i:i + block])
+    segs += vad.flush()
+    elapsed = time.perf_counter() - t0
+    return segs, len(pcm) / rate, elapsed, pcm, rate
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay WAV files through the squawk VAD")
+    ap.add_argument("wavs", nargs="+", type=Path)
+    ap.add_argument("--device", default="", help="use this device's vad_profiles.json entry")
+    ap.add_argument("--block-ms", type=int, default=100, help="feed size, like the live ring reads")
+    ap.add_argument("--legacy", action="store_true", help="also show the old 0.5 s RMS segments")
+    for f in fields(VadConfig):
+        ap.add_argument("--" + f.name.replace("_", "-"), type=type(f.default), default=None)
+    args = ap.parse_args(argv)
+
+    cfg = VadConfig.for_device(args.device, **{f.name: getattr(args, f.name)
+                                               for f in fields(VadConfig)})
+    print("config:", json.dumps(asdict(cfg)))
+    for path in args.wavs:
+        segs, audio_s, elapsed, pcm, rate = replay(path, cfg, args.block_ms)
+        print(f"\n{path.name}: {audio_s:.1f}s audio, {len(segs)} segment(s), "
+              f"{elapsed * 1e3:.1f} ms  (x{audio_s / elapsed:,.0f} real time)")
+        for s in segs:
+            print(f"  {s.start_s:8.2f}s – {s.end_s:8.2f}s  ({s.duration:5.2f}s)")
+        if args.legacy:
+            old = legacy_segments(pcm, rate)
+            print(f"  legacy 0.5 s RMS: {len(old)} segment(s)")
+            for a, b in old:
+                print(f"  {a:8.2f}s – {b:8.2f}s  ({b - a:5.2f}s)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
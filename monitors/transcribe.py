@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# monitors/transcribe.py  –  speech-to-text backends for the squawk recorder
+
+"""
+One interface in front of every way we turn a WAV clip into text:
+
+    openai                          Whisper on api.openai.com
+    local:http://127.0.0.1:8000/v1  any OpenAI-compatible server
+                                    (faster-whisper-server, whisper.cpp, LocalAI…)
+    local:http://host:port/v1#model   …with an explicit model name
+    fixture[:path.json]             deterministic, no network – offline load tests
+
+``Transcriber`` wraps a primary backend (plus optional fallbacks) with:
+  * a per-call timeout handed to the backend
+  * hedging – if the first attempt has not answered after ``hedge_after``
+    seconds a second one is started (on the next backend if there is one)
+    and whichever answers first wins
+  * retries with back-off when every attempt failed
+  * a cache keyed by a hash of the WAV bytes, persisted to
+    ``data/transcripts/cache.jsonl``, so a clip that has been paid for once
+    (re-queued after a crash, replayed, fed twice by a test) never is again
+
+Run:  python monitors/transcribe.py clip.wav [more.wav …] --backend fixture
+   or: python monitors/transcribe.py clip.wav --backend local:http://127.0.0.1:8000/v1
+   or: python monitors/transcribe.py data/*.wav --backend fixture --latency 2 --repeat 20 -j 3
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CACHE_FILE = PROJECT_ROOT / "data" / "transcripts" / "cache.jsonl"
+
+PROMPT = "This is an announcer squawking financial headlines and events, transcribe accurately"
+TIMEOUT = 30.0
+HEDGE_AFTER = 6.0
+RETRIES = 2
+CACHE_ENTRIES = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+def audio_key(wav: bytes) -> str:
+    return hashlib.blake2b(wav, digest_size=16).hexdigest()
+
+
+# ── Backends ────────────────────────────────────────────────────────────
+class Backend(ABC):
+    name = "backend"
+
+    @abstractmethod
+    def transcribe(self, wav: bytes, timeout: float) -> str:
+        """Text spoken in ``wav``; any exception counts as a failed attempt."""
+
+
+class OpenAIBackend(Backend):
+    """OpenAI's endpoint, or any server speaking the same API via ``base_url``."""
+
+    def __init__(self, model: str = "whisper-1", base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, language: str = "en", prompt: str = PROMPT):
+        from openai import OpenAI
+        if api_key is None:
+            if base_url:                       # local servers ignore the key
+                api_key = os.environ.get("OPENAI_API_KEY", "local")
+            else:
+                from utils import Keys
+                api_key = os.environ.get("OPENAI_API_KEY", Keys.OPENAI_API)
+        # retries are ours (hedged), not the SDK's
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.model, self.language, self.prompt = model, language, prompt
+        self.name = f"{model}@{base_url or 'openai'}"
+
+    def transcribe(self, wav: bytes, timeout: float) -> str:
+        resp = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=("clip.wav", wav),            # a fresh file per attempt – hedges run in parallel
+            language=self.language,
+            prompt=self.prompt,
+            timeout=timeout,
+        )
+        return resp.text.strip()
+
+
+class FixtureBackend(Backend):
+    """Deterministic stand-in: known clips from a JSON map, others synthesised.
+
+    ``latency`` (seconds) and ``fail_every`` (fail every Nth distinct clip)
+    let load tests exercise the worker pool, timeouts and hedging offline.
+    """
+
+    def __init__(self, path: Optional[Path] = None, latency: float = 0.0,
+                 fail_every: int = 0):
+        self.name = f"fixture:{path}" if path else "fixture"
+        self.known: Dict[str, str] = {}
+        if path and Path(path).exists():
+            self.known = json.loads(Path(path).read_text(encoding="utf-8"))
+        self.latency, self.fail_every = latency, fail_every
+
+    def transcribe(self, wav: bytes, timeout: float) -> str:
+        key = audio_key(wav)
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+            if self.latency > timeout:
+                raise TimeoutError(f"fixture latency {self.latency}s > timeout {timeout}s")
+        if self.fail_every and int(key[:8], 16) % self.fail_every == 0:
+            raise TranscriptionError(f"fixture failure for {key[:8]}")
+        if key in self.known:
+            return self.known[key]
+        return f"FIXTURE HEADLINE {key[:8].upper()} FROM {len(wav):,} BYTE CLIP"
+
+
+def make_backend(spec: str, **kw) -> Backend:
+    """Build a backend from a short spec string (see module docstring)."""
+    kind, _, rest = spec.partition(":")
+    if kind == "openai":
+        return OpenAIBackend(model=rest or "whisper-1")
+    if kind == "local":
+        url, _, model = rest.partition("#")
+        return OpenAIBackend(model=model or "whisper-1", base_url=url)
+    if kind == "fixture":
+        return FixtureBackend(Path(rest) if rest else None, **kw)
+    raise ValueError(f"unknown transcription backend {spec!r}")
+
+
+# ── Content-hash cache ──────────────────────────────────────────────────
+class TranscriptCache:
+    """LRU of audio hash → text, appended to a JSONL file and reloaded on start."""
+
+    def __init__(self, path: Optional[Path] = CACHE_FILE, entries: int = CACHE_ENTRIES):
+        self.path, self.entries = path, entries
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fh = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                lines = 0
+                with path.open(encoding="utf-8") as f:
+                    for lines, line in enumerate(f, 1):
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            continue                 # torn last line
+                        self._put(rec["key"], rec["text"])
+                if len(self._lru) < lines // 2:      # mostly evicted / superseded
+                    self._compact()
+            self._fh = path.open("a", encoding="utf-8")
+
+    def _put(self, key: str, text: str):
+        self._lru[key] = text
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.entries:
+            self._lru.popitem(last=False)
+
+    def _compact(self):
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for k, t in self._lru.items():
+                f.write(json.dumps({"key": k, "text": t}) + "\n")
+        os.replace(tmp, self.path)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._lru.get(key)
+            if text is not None:
+                self._lru.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            self._put(key, text)
+            if self._fh:
+                self._fh.write(json.dumps({"key": key, "text": text}) + "\n")
+                self._fh.flush()
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def __len__(self):
+        return len(self._lru)
+
+
+# ── Hedged, cached front end ────────────────────────────────────────────
+class Transcriber:
+    def __init__(self, backends: Sequence[Backend], cache: Optional[TranscriptCache] = None,
+                 timeout: float = TIMEOUT, hedge_after: Optional[float] = HEDGE_AFTER,
+                 retries: int = RETRIES, max_workers: int = 8):
+        if not backends:
+            raise ValueError("need at least one backend")
+        self.backends = list(backends)
+        self.cache = cache
+        self.timeout, self.hedge_after, self.retries = timeout, hedge_after, retries
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt")
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}    # same clip submitted twice at once
+        self.calls = self.cache_hits = self.hedges = self.hedge_wins = self.failures = 0
+
+    def _count(self, attr: str):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def transcribe(self, wav: bytes) -> str:
+        key = audio_key(wav)
+        if self.cache is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                self._count("cache_hits")
+                logger.debug("Transcript cache hit %s", key[:8])
+                return text
+        with self._lock:
+            running = self._inflight.get(key)
+            if running is None:
+                mine = self._inflight[key] = Future()
+        if running is not None:                    # ride along on the call in flight
+            self._count("cache_hits")
+            return running.result()
+        try:
+            text = self._transcribe(key, wav)
+        except BaseException as e:
+            mine.set_exception(e)
+            raise
+        else:
+            mine.set_result(text)
+            return text
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _transcribe(self, key: str, wav: bytes) -> str:
+        self._count("calls")
+        last: Optional[BaseException] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(2 ** attempt, 10))
+            try:
+                text = self._hedged(wav, attempt)
+            except Exception as e:
+                last = e
+                logger.warning("Transcription attempt %d failed: %s", attempt + 1, e)
+                continue
+            if self.cache is not None:
+                self.cache.put(key, text)
+            return text
+        self._count("failures")
+        raise TranscriptionError(f"all {self.retries + 1} attempts failed") from last
+
+    def _hedged(self, wav: bytes, attempt: int) -> str:
+        first = self.backends[attempt % len(self.backends)]
+        futures = {self._pool.submit(first.transcribe, wav, self.timeout): first}
+        deadline = time.monotonic() + self.timeout
+        hedged = False
+        errors = []
+        while futures:
+            wait_for = deadline - time.monotonic()
+            if not hedged and self.hedge_after is not None:
+                wait_for = min(wait_for, self.hedge_after)
+            done, _ = wait(futures, timeout=max(0.0, wait_for), return_when=FIRST_COMPLETED)
+            for fut in done:
+                backend = futures.pop(fut)
+                try:
+                    text = fut.result()
+                except Exception as e:
+                    errors.append(f"{backend.name}: {e}")
+                    continue
+                if hedged and backend is not first:
+                    self._count("hedge_wins")
+                return text
+            if time.monotonic() >= deadline:
+                break
+            if not hedged and self.hedge_after is not None:
+                hedged = True
+                second = self.backends[(attempt + 1) % len(self.backends)]
+                self._count("hedges")
+                if futures:
+                    logger.info("⏱️ %s slow after %.1fs – hedging on %s",
+                                first.name, self.hedge_after, second.name)
+                else:
+                    logger.info("%s failed – failing over to %s", first.name, second.name)
+                futures[self._pool.submit(second.transcribe, wav, self.timeout)] = second
+        for fut in futures:
+            fut.cancel()                       # a still-running call just finishes unseen
+        raise TranscriptionError("; ".join(errors) or f"timed out after {self.timeout}s")
+
+    def stats(self) -> str:
+        return (f"stt calls {self.calls} (cache hits {self.cache_hits}, hedges {self.hedges}, "
+                f"hedge wins {self.hedge_wins}, failures {self.failures})")
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+
+
+# --------------------------------------------------------------------------- #
+# CLI – transcribe files or load-test a backend
+# --------------------------------------------------------------------------- #
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Transcribe WAV clips through a backend")
+    ap.add_argument("wavs", nargs="+", type=Path)
+    ap.add_argument("--backend", action="append",
+                    help="backend spec, repeat for fallbacks (default: fixture)")
+    ap.add_argument("--latency", type=float, default=0.0, help="fixture backend delay (s)")
+    ap.add_argument("--fail-every", type=int, default=0, help="fixture: fail every Nth clip")
+    ap.add_argument("--timeout", type=float, default=TIMEOUT)
+    ap.add_argument("--hedge-after", type=float, default=HEDGE_AFTER)
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--repeat", type=int, default=1, help="submit every clip N times")
+    ap.add_argument("-j", "--jobs", type=int, default=3, help="concurrent clips, like the recorder pool")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-7s %(message)s",
+                        datefmt="%H:%M:%S")
+
+    fixture_kw = {"latency": args.latency, "fail_every": args.fail_every}
+    backends = [make_backend(s, **(fixture_kw if s.startswith("fixture") else {}))
+                for s in (args.backend or ["fixture"])]
+    # fixture text must never land in the real cache file
+    persist = not any(isinstance(b, FixtureBackend) for b in backends)
+    cache = None if args.no_cache else TranscriptCache(CACHE_FILE if persist else None)
+    stt = Transcriber(backends, cache, timeout=args.timeout, hedge_after=args.hedge_after,
+                      max_workers=args.jobs * 2)
+
+    clips = [(p, p.read_bytes()) for p in args.wavs] * args.repeat
+    t0 = time.perf_counter()
+    lat: List[float] = []
+
+    def one(item):
+        path, wav = item
+        t = time.perf_counter()
+        try:
+            text = stt.transcribe(wav)
+        except TranscriptionError as e:
+            text = f"<failed: {e}>"
+        lat.append(time.perf_counter() - t)
+        return path, text
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as ex:
+        for path, text in ex.map(one, clips):
+            if args.repeat == 1:
+                print(f"{path.name}: {text}")
+    elapsed = time.perf_counter() - t0
+    lat.sort()
+    print(f"\n{len(clips)} clip(s) in {elapsed:.2f}s ({len(clips) / elapsed:.1f}/s), "
+          f"p50 {lat[len(lat) // 2] * 1e3:.0f} ms, max {lat[-1] * 1e3:.0f} ms")
+    print(stt.stats())
+    stt.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,8 @@ from datetime import datetime
 
 import MetaTrader5 as mt5
 
+from RISKCODE.var import risk_report
+
 
 # --------------------------------------------------------------------------- #
 # Connection helpers
@@ -90,6 +92,12 @@ def get_weighted_positions_report() -> str:
     return "\n".join(lines)
 
 
+def get_risk_report() -> str:
+    """VaR / expected shortfall of the book (see RISKCODE/var.py)."""
+    _ensure()
+    return risk_report()
+
+
 # --------------------------------------------------------------------------- #
 # Re-export public names
 # --------------------------------------------------------------------------- #
@@ -99,4 +107,5 @@ __all__ = [
     "get_open_positions",
     "get_open_positions_report",
     "get_weighted_positions_report",
+    "get_risk_report",
 ]
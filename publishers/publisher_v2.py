@@ -1,128 +1,157 @@
 #!/usr/bin/env python3
-# publisher_discord_lastrow.py – watch headlines1.csv and push newest row to Discord
-
-import asyncio, os, re, datetime, collections, sys
-from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# ── YOUR ORIGINAL helper ──────────────────────────────────────────────────
-# (verbatim copy – nothing changed)
-import requests
-from utils.Keys import DISCORD_BOT_TOKEN
-
-def post_to_discord(channel_id, message=None, embed=None):
-    url = f"https://discord.com/api/channels/{channel_id}/messages"
-    headers = {
-        "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    payload = {"content": message} if embed is None else {"embeds": [embed]}
-    resp = requests.post(url, headers=headers, json=payload)
-    if resp.status_code not in (200, 201):
-        print(f"Discord error {resp.status_code}: {resp.text}", flush=True)
+# publisher_v2.py – subscribe to the headline bus and push every new row to Discord
+#   python publishers/publisher_v2.py --redrive   re-publish posts that failed after retries
+
+import asyncio, datetime, json, os, sys, time
+from collections import Counter
+
+from utils.discord_sender import URGENT, DiscordError, DiscordSender
+from utils.headline_bus import BusPublisher, BusSubscriber
+from utils.headline_store import PROJECT_ROOT
+from utils.dedup_index import DedupIndex
+from utils.near_dup import NearDupIndex, normalize, similarity
+from utils.latency import LatencyRecorder, Stamps
 
 # ─── Configuration ───────────────────────────────────────────────────────
-PROJECT_ROOT       = Path(__file__).resolve().parents[1]      # …/Fiat_assist
-CSV_FILE           = PROJECT_ROOT / "monitors" / "headlines1.csv"
 DISCORD_CHANNEL_ID = 855359994547011604
 
-COLOR_MAP  = {"RTRS": 0xFFA500, "FLY": 0x0000FF, "SQUAWK": 0x32CD32}
+COLOR_MAP  = {"RTRS": 0xFFA500, "FLY": 0x0000FF, "SQUAWK": 0x32CD32, "NWK": 0x228B22}
 EMBED_BOLD = True
-DEDUP_MAX  = 40_000
+DEDUP_NAME = "publisher"        # own namespace – monitors already fill "headlines"
 
-TS_RE  = re.compile(r'^\d{4}-\d{2}-\d{2}[T\s]\d{2}:\d{2}:\d{2}(?:\.\d+)?,\s*')
-SRC_RE = re.compile(r',\s*([^,]+)$')
+CHECKPOINT_NAME = "publisher_v2"  # data/checkpoints/publisher_v2.json
+QUEUE_MAX       = 10_000          # backpressure on the tailer during bursts
+IN_FLIGHT_MAX   = 200             # submitted to the sender, not yet acknowledged
+DEAD_LETTER     = PROJECT_ROOT / "data" / "deadletter" / "publisher_v2.jsonl"
+                                  # posts that failed after retries – `--redrive` re-publishes
+
+VERBOSE = True                    # per-headline lines; replay.py turns them off
+STATS   = Counter()               # posted / failed / duplicate / near_duplicate / linked
 
 def dbg(msg):
+    if not VERBOSE:
+        return
     now = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
     print(f"[{now}] {msg}", flush=True)
 
-# ─── Watchdog handler ────────────────────────────────────────────────────
-class HeadlinesHandler(FileSystemEventHandler):
-    def __init__(self, loop, queue, dedup):
-        self.loop   = loop
-        self.queue  = queue
-        self.dedup  = dedup
-        self.offset = CSV_FILE.stat().st_size if CSV_FILE.exists() else 0
-        dbg(f"Start offset {self.offset:,} bytes")
-
-    def on_modified(self, ev):
-        if ev.is_directory or Path(ev.src_path) != CSV_FILE:
-            return
-        self._read_tail()
-
-    # --------------------------------------------------------------------
-    def _read_tail(self):
-        size = CSV_FILE.stat().st_size
-        if size < self.offset:                 # file rotated/truncated
-            dbg("Rotation detected → jump to end")
-            self.offset = size
-            self.dedup.clear()
-            return
-
-        if size == self.offset:
-            return
-
-        with CSV_FILE.open("r", encoding="utf-8") as f:
-            f.seek(self.offset)
-            chunk = f.read()
-        self.offset = size
-
-        # -------- process only the very last non-blank line -------------
-        lines = [l.strip() for l in chunk.splitlines() if l.strip()]
-        if not lines:
-            return
-        line = lines[-1]
-
-        line = TS_RE.sub("", line)
-        m = SRC_RE.search(line)
-        headline, source = (line[:m.start()].strip(), m.group(1).upper()) if m else (line, "")
-
-        if headline in self.dedup:
-            dbg("Duplicate skipped")
-            return
-        self.dedup.append(headline)
-
-        now  = datetime.datetime.now().strftime("%H:%M")
-        text = f"[{now}] {headline}"
-        if EMBED_BOLD:
-            text = f"**{text}**"
-        embed = {"description": text, "color": COLOR_MAP.get(source, 0)}
-
-        dbg(f"Queued: {headline[:80]}…")
-        asyncio.run_coroutine_threadsafe(self.queue.put(embed), self.loop)
-
-# ─── Discord worker (async) – uses your helper in a thread ---------------
-async def discord_worker(queue):
+def make_embed(headline, source):
+    now  = datetime.datetime.now().strftime("%H:%M")
+    text = f"[{now}] {headline}"
+    if EMBED_BOLD:
+        text = f"**{text}**"
+    return {"description": text, "color": COLOR_MAP.get(source, 0)}
+
+def near_repeat(text, near, pending):
+    """Edited / truncated re-send of a posted or still-queued headline?"""
+    m = near.check(text)
+    if m is not None:
+        return m.text
+    norm = normalize(text)
+    return next((p for p in pending.values() if similarity(norm, p) >= near.threshold), None)
+
+# ─── Bus subscriber (async) – every new record, in store order ───────────
+async def tail_worker(sub, queue, dedup, near, pending):
+    dbg(f"Subscribing from {sub.position.segment}@{sub.position.offset:,}")
+    async for rec in sub.events():
+        skip = rec.ref or rec.text in pending or rec.text in dedup
+        if skip:
+            STATS["linked" if rec.ref else "duplicate"] += 1
+        else:
+            skip = near_repeat(rec.text, near, pending)
+            if skip:
+                STATS["near_duplicate"] += 1
+                dbg(f"Near-duplicate skipped: {rec.text[:60]} ≈ {skip[:60]}")
+        if skip:
+            # nothing to post, but the checkpoint must still move past it –
+            # in queue order, so it never overtakes an unposted headline
+            await queue.put((None, rec, None))
+            continue
+        pending[rec.text] = normalize(rec.text)
+        stamps = Stamps.parse(rec).mark("queue")
+        await queue.put((make_embed(rec.text, rec.source), rec, stamps))
+
+# ─── Dead letters – failed posts are kept, not dropped ──────────────────
+def dead_letter(path, rec, error):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = {"failed_at": time.time(), "ts_ms": rec.ts_ms, "source": rec.source,
+            "text": rec.text, "segment": rec.cursor.segment, "offset": rec.cursor.offset,
+            "error": str(error)}
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+def redrive(path=DEAD_LETTER):
+    """Put every dead-lettered headline back on the bus as a new record."""
+    if not path.exists():
+        print(f"No dead letters in {path}")
+        return 0
+    work = path.with_suffix(".redrive")
+    os.replace(path, work)               # new failures start a fresh file meanwhile
+    n = 0
+    with BusPublisher() as bus, work.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                d = json.loads(line)
+                bus.append(d["text"], d["source"])
+                n += 1
+    work.unlink()
+    print(f"Re-published {n:,} headline(s) from {path}")
+    return n
+
+# ─── Discord worker (async) – hands embeds to the shared sender ----------
+# The sender packs whatever is queued into 10-embed requests, so the worker
+# doesn't wait for each post; acks are collected in queue order instead.
+async def discord_worker(queue, acks, sender):
     dbg("Discord worker ready")
     while True:
-        embed = await queue.get()
-        await asyncio.to_thread(post_to_discord, DISCORD_CHANNEL_ID, embed=embed)
+        embed, rec, stamps = await queue.get()
+        fut = None
+        if embed is not None:
+            fut = sender.submit(DISCORD_CHANNEL_ID, embed=embed, priority=URGENT)
+        await acks.put((fut, rec, stamps))
         queue.task_done()
-        dbg("Posted ✓")
 
-# ─── Main async app -------------------------------------------------------
-async def app():
-    if not CSV_FILE.exists():
-        dbg(f"File not found: {CSV_FILE}")
-        sys.exit(1)
-
-    queue = asyncio.Queue()
-    dedup = collections.deque(maxlen=DEDUP_MAX)
+async def ack_worker(acks, sub, dedup, near, pending, latency, dead):
+    while True:
+        fut, rec, stamps = await acks.get()
+        if fut is not None:
+            try:
+                await fut
+                latency.observe(rec.source, stamps.mark("post"))
+                dedup.add(rec.text)
+                near.add(rec.text)
+                STATS["posted"] += 1
+                dbg(f"Posted ✓ {rec.text[:60]}")
+            except DiscordError as e:
+                STATS["failed"] += 1
+                dead_letter(dead, rec, e)   # kept for --redrive before the checkpoint moves on
+                dbg(f"Post failed ✗ {rec.text[:60]} ({e}) → {dead.name}")
+            pending.pop(rec.text, None)
+        sub.commit(rec.next_cursor)         # durable only once handled
 
-    loop = asyncio.get_running_loop()
-    handler = HeadlinesHandler(loop, queue, dedup)
-    obs = Observer(); obs.schedule(handler, str(CSV_FILE.parent)) ; obs.start()
-    dbg(f"Watching {CSV_FILE}")
+# ─── Main async app -------------------------------------------------------
+# Everything defaults to the live setup; replay.py passes throw-away ones.
+async def app(sub=None, sender=None, dedup=None, near=None, latency=None, dead=DEAD_LETTER):
+    sub    = BusSubscriber(CHECKPOINT_NAME) if sub is None else sub
+    queue  = asyncio.Queue(maxsize=QUEUE_MAX)
+    acks   = asyncio.Queue(maxsize=IN_FLIGHT_MAX)
+    dedup  = DedupIndex(DEDUP_NAME) if dedup is None else dedup
+    near   = NearDupIndex(DEDUP_NAME) if near is None else near   # edited / truncated re-sends
+    pending = {}                            # queued but not yet posted → normalized
+    latency = LatencyRecorder() if latency is None else latency   # data/metrics/latency.jsonl
+    sender = await (DiscordSender() if sender is None else sender).start()
 
     try:
-        await discord_worker(queue)            # runs forever
+        await asyncio.gather(tail_worker(sub, queue, dedup, near, pending),
+                             discord_worker(queue, acks, sender),
+                             ack_worker(acks, sub, dedup, near, pending, latency, dead))  # forever
     finally:
-        obs.stop(); obs.join()
+        await sender.close(); sub.close(); dedup.close(); near.close(); latency.close()
 
 # ─── Entry-point ----------------------------------------------------------
 if __name__ == "__main__":
+    if "--redrive" in sys.argv[1:]:      # re-publish failed posts, then exit
+        redrive()
+        sys.exit()
     try:
         asyncio.run(app())
     except KeyboardInterrupt:
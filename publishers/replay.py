@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# replay.py  –  push recorded headlines through publisher_v2 under controlled load
+
+"""
+Stream the legacy headline CSVs, in timestamp order, through the real
+publishing path – headline bus → publisher_v2 (dedup, near-dup, batching
+sender) → a local fake Discord – and report throughput, drops, dedup hits
+and per-stage latency.  Everything lives in a temp dir: store, bus socket,
+checkpoints, dedup indexes and metrics, so the live setup is never touched.
+
+    --speed 1     real time (gaps in the file longer than --max-gap are cut)
+    --speed 20    20x real time
+    --speed 0     as fast as the producer can publish
+
+Run:  python publishers/replay.py                                # the three CSVs, max speed
+   or: python publishers/replay.py monitors/flylines.csv --speed 50
+   or: python publishers/replay.py --repeat 5 --limit 5 --per 5 --error-rate 0.02
+   or: python publishers/replay.py --json before.json            # compare runs
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # project root
+import publishers.publisher_v2 as publisher
+from utils.dedup_index import DedupIndex
+from utils.discord_sender import DiscordSender
+from utils.fake_discord import FakeDiscord
+from utils.headline_bus import HAVE_UNIX, Broker, BusPublisher, BusSubscriber
+from utils.headline_store import PROJECT_ROOT, HeadlineStore, read_legacy_csv
+from utils.latency import LatencyRecorder, Stamps, report
+from utils.near_dup import NearDupIndex
+
+# ── Configuration ───────────────────────────────────────────────────────
+DEFAULT_FILES = [PROJECT_ROOT / "monitors" / "flylines.csv",
+                 PROJECT_ROOT / "monitors" / "headlines1.csv",
+                 PROJECT_ROOT / "publishers" / "headlines.csv"]
+MAX_GAP  = 5.0      # file seconds – longer quiet spells are cut to this
+STALL    = 60.0     # give up when nothing was handled for this long
+PROGRESS = 2.0      # seconds between progress lines
+
+
+def dbg(msg):
+    print(time.strftime("[%H:%M:%S] ") + msg, flush=True)
+
+
+def load(paths, repeat=1):
+    """``(ts, headline, source)`` from every file, oldest first; files without
+    a source column are FLY when named fly*, RTRS otherwise."""
+    rows = []
+    for path in paths:
+        default = "FLY" if path.name.lower().startswith("fly") else "RTRS"
+        rows.extend(read_legacy_csv(path, default))
+    rows.sort(key=lambda r: r[0])
+    return rows * repeat
+
+
+# ── Producer (thread – monitors are threaded scripts too) ───────────────
+class Producer(threading.Thread):
+    def __init__(self, rows, address, store, speed, max_gap):
+        super().__init__(name="replay-producer", daemon=True)
+        self.rows, self.address, self.store = rows, address, store
+        self.speed, self.max_gap = speed, max_gap
+        self.published = 0
+        self.behind = 0.0                   # worst lag behind the schedule, seconds
+        self.t0 = self.t1 = None
+
+    def run(self):
+        self.t0 = time.time()
+        due, prev = self.t0, None
+        with BusPublisher(self.address, self.store) as bus:
+            for ts, text, source in self.rows:
+                if self.speed:
+                    if prev is not None:
+                        gap = min(max((ts - prev).total_seconds(), 0.0), self.max_gap)
+                        due += gap / self.speed
+                    prev = ts
+                    wait = due - time.time()
+                    if wait > 0:
+                        time.sleep(wait)
+                    else:
+                        self.behind = max(self.behind, -wait)
+                stamps = Stamps().mark("source", due if self.speed else None).mark("capture")
+                bus.append(text, source, None, stamps.mark("dedup").field())
+                self.published += 1
+        self.t1 = time.time()
+
+
+# ── Pipeline under test ─────────────────────────────────────────────────
+def bus_address(tmp: Path):
+    if HAVE_UNIX:
+        return str(tmp / "bus.sock")
+    with socket.socket() as s:               # Windows: a free loopback port
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()
+
+
+async def wait_listening(address, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if isinstance(address, str):
+                _, w = await asyncio.open_unix_connection(address)
+            else:
+                _, w = await asyncio.open_connection(*address)
+            w.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def replay(args, tmp: Path) -> dict:
+    rows = load(args.files, args.repeat)
+    dbg(f"Replaying {len(rows):,} headlines from {', '.join(p.name for p in args.files)} "
+        f"at {'max speed' if not args.speed else f'{args.speed:g}x'}")
+
+    store = HeadlineStore(tmp / "headlines")
+    address = bus_address(tmp)
+    broker_task = asyncio.create_task(Broker(store, address).serve())
+    await wait_listening(address)
+
+    fake = FakeDiscord(args.limit, args.per, args.global_limit, args.latency, args.error_rate)
+    base = await fake.start()
+    publisher.VERBOSE = args.verbose
+    publisher.STATS.clear()
+    latency = LatencyRecorder(tmp / "latency.jsonl", interval=PROGRESS)
+    pub_task = asyncio.create_task(publisher.app(
+        BusSubscriber("replay", address, HeadlineStore(tmp / "headlines"), start_at_end=False,
+                      checkpoint_dir=tmp / "checkpoints"),
+        DiscordSender("replay", base),
+        DedupIndex("replay", tmp / "dedup"),
+        NearDupIndex("replay", tmp / "dedup"),
+        latency, tmp / "deadletter.jsonl"))
+
+    producer = Producer(rows, address, HeadlineStore(tmp / "headlines"), args.speed, args.max_gap)
+    producer.start()
+    stats = publisher.STATS
+    first_post = last_post = None
+    seen_embeds = handled = 0
+    stalled_at = next_line = time.monotonic()
+    while True:
+        await asyncio.sleep(0.05)
+        now = time.monotonic()
+        if fake.embeds != seen_embeds:
+            seen_embeds, last_post = fake.embeds, time.time()
+            first_post = first_post or last_post
+        if sum(stats.values()) != handled:
+            handled, stalled_at = sum(stats.values()), now
+        if not producer.is_alive() and (handled >= producer.published or pub_task.done()):
+            break
+        if now - stalled_at > STALL:
+            dbg(f"No progress for {STALL:g}s – giving up")
+            break
+        if now >= next_line:
+            next_line = now + PROGRESS
+            dbg(f"published {producer.published:,}  handled {handled:,}  posted {stats['posted']:,}  "
+                f"dup {stats['duplicate'] + stats['near_duplicate']:,}  discord: {fake.stats()}")
+
+    pub_task.cancel()
+    await asyncio.gather(pub_task, return_exceptions=True)   # closes sender, indexes, latency
+    broker_task.cancel()
+    await asyncio.gather(broker_task, return_exceptions=True)
+    await fake.stop()
+
+    published = producer.published
+    dups = stats["duplicate"] + stats["near_duplicate"]
+    pub_secs = max((producer.t1 or time.time()) - producer.t0, 1e-9)
+    post_secs = max((last_post or 0) - (first_post or 0), 1e-9)
+    return {
+        "files": [p.name for p in args.files], "speed": args.speed, "headlines": len(rows),
+        "published": published,
+        "publish_rate": published / pub_secs,
+        "posted": stats["posted"],
+        "post_rate": stats["posted"] / post_secs if stats["posted"] > 1 else 0.0,
+        "requests": fake.requests, "rate_limited": fake.limited, "server_errors": fake.errors,
+        "failed": stats["failed"],
+        "unhandled": max(published - sum(stats.values()), 0),
+        "duplicate": stats["duplicate"], "near_duplicate": stats["near_duplicate"],
+        "linked": stats["linked"],
+        "dedup_hit_rate": dups / published if published else 0.0,
+        "producer_behind_s": producer.behind,
+        "latency": report(tmp / "latency.jsonl", since_min=24 * 60),
+    }
+
+
+def summary(r: dict) -> str:
+    embeds = r["posted"] / r["requests"] if r["requests"] else 0
+    return "\n".join([
+        "",
+        f"Published   {r['published']:,} headlines at {r['publish_rate']:,.0f}/s"
+        + (f" (producer up to {r['producer_behind_s']:.2f}s behind schedule)"
+           if r["producer_behind_s"] > 0.1 else ""),
+        f"Posted      {r['posted']:,} at {r['post_rate']:,.1f}/s in {r['requests']:,} requests "
+        f"({embeds:.1f} embeds/request), {r['rate_limited']:,} × 429, {r['server_errors']:,} × 5xx",
+        f"Dropped     {r['failed']:,} failed after retries, {r['unhandled']:,} never handled",
+        f"Dedup       {r['dedup_hit_rate']:.1%} hit rate – {r['duplicate']:,} exact, "
+        f"{r['near_duplicate']:,} near, {r['linked']:,} linked records",
+        r["latency"],
+    ])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("files", nargs="*", type=Path, default=DEFAULT_FILES)
+    ap.add_argument("--speed", type=float, default=0,
+                    help="1 = real time, N = N times faster, 0 = max (default)")
+    ap.add_argument("--max-gap", type=float, default=MAX_GAP,
+                    help="cut quiet spells in the file to this many seconds")
+    ap.add_argument("--repeat", type=int, default=1,
+                    help="replay the files N times (later passes exercise dedup)")
+    ap.add_argument("--limit", type=int, default=5, help="fake Discord: requests per window")
+    ap.add_argument("--per", type=float, default=5.0, help="fake Discord: window seconds")
+    ap.add_argument("--global-limit", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.0, help="fake Discord: seconds per request")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fake Discord: share of 5xx")
+    ap.add_argument("--json", type=Path, help="also write the results here")
+    ap.add_argument("-v", "--verbose", action="store_true", help="publisher_v2's per-headline lines")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        try:
+            result = asyncio.run(replay(args, Path(tmp)))
+        except KeyboardInterrupt:
+            return 1
+    print(summary(result))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return 0 if not result["unhandled"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,8 +8,11 @@ $ProjectRoot = "C:\Users\User\PycharmProjects\Fiat_assist"
 # Path to your venv python within that root
 $Python = Join-Path $ProjectRoot "venv\Scripts\python.exe"
 
-# List of scripts to run, relative to project root
+# List of scripts to run, relative to project root (optional args after a space)
+# The headline bus broker goes first – monitors fall back to the store if it isn't up yet
 $scripts = @(
+    "utils\headline_bus.py serve",
+    "utils\headline_bus.py archive monitors\headlines1.csv",
     "bots\discord_bot.py",
     "monitors\flyboty.py",
     "monitors\newsfeeder.py",
@@ -19,12 +22,14 @@ $scripts = @(
 )
 
 foreach ($rel in $scripts) {
-    $full = Join-Path $ProjectRoot $rel
+    $parts = $rel -split " ", 2
+    $full = Join-Path $ProjectRoot $parts[0]
+    $extra = if ($parts.Count -gt 1) { " " + $parts[1] } else { "" }
 
     Start-Process -FilePath "powershell.exe" `
         -WorkingDirectory $ProjectRoot `
         -ArgumentList @(
             "-NoExit",
-            "-Command", "& `"$Python`" `"$full`""
+            "-Command", "& `"$Python`" `"$full`"$extra"
         )
 }
@@ -1,7 +1,7 @@
 import os
 import re
-import requests
 from utils import Keys
+from utils.discord_sender import BULK, DiscordError, get_sender
 from openai import OpenAI
 from PyPDF2 import PdfReader
 
@@ -9,7 +9,6 @@ from PyPDF2 import PdfReader
 ENABLE_DISCORD = True  # Set to False to disable Discord integration entirely
 PROMPT_BEFORE_SEND = False  # Set to False to auto-send without prompting after summary
 DISCORD_CHANNEL_ID = "1176530579433455688"
-DISCORD_API_URL = f"https://discord.com/api/v9/channels/{DISCORD_CHANNEL_ID}/messages"
 
 # OpenAI client setup
 api_key = os.environ.get("OPENAI_API_KEY", Keys.OPENAI_API)
@@ -22,17 +21,13 @@ MONITOR_DIR = r"C:\Users\User\Dropbox\Current\2025"
 def send_to_discord(title: str, summary: str) -> None:
     """
     Send the given summary to Discord using a bot. Title will be formatted as a markdown heading.
+    Long summaries are split over several messages.
     """
-    token = Keys.DISCORD_BOT_TOKEN
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json"
-    }
     content = f"# {title}\n{summary}"
-    payload = {"content": content}
-    response = requests.post(DISCORD_API_URL, json=payload, headers=headers)
-    if not response.ok:
-        print(f"Failed to send to Discord: {response.status_code} {response.text}")
+    try:
+        get_sender().post(DISCORD_CHANNEL_ID, content=content, priority=BULK).result()
+    except DiscordError as e:
+        print(f"Failed to send to Discord: {e}")
 
 
 def list_recent_files(directory, count=50):
@@ -0,0 +1,22 @@
+from monitors.feed_delta import FeedDelta, HeadlineTokenizer
+
+
+def feed(prime, *updates):
+    delta, tokens = FeedDelta(), HeadlineTokenizer()
+    delta.prime(prime)
+    return [[(i.ts, i.headline) for i in tokens.feed(delta.update(u).text)] for u in updates]
+
+
+def test_same_stamp_keeps_second_headline():
+    cpi = "08:30:00\nUS CPI RISES 0.3% IN MAY AS EXPECTED"
+    retail = "08:30:00\nUS RETAIL SALES FALL 0.2% IN MAY"
+    claims = "08:30:00\nUS JOBLESS CLAIMS 230K VS 235K EXPECTED"
+    out = feed(cpi, f"{retail}\n{cpi}", f"{claims}\n{retail}\n{cpi}")
+    assert out == [[("08:30:00", "US RETAIL SALES FALL 0.2% IN MAY")],
+                   [("08:30:00", "US JOBLESS CLAIMS 230K VS 235K EXPECTED")]]
+
+
+def test_scrolled_back_headline_is_not_new():
+    cpi = "08:30:00\nUS CPI RISES 0.3% IN MAY AS EXPECTED"
+    ecb = "09:00:00\nECB SAYS RATES ON HOLD FOR NOW"
+    assert feed(cpi, ecb, f"{ecb}\n{cpi}") == [[("09:00:00", "ECB SAYS RATES ON HOLD FOR NOW")], []]
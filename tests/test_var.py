@@ -0,0 +1,55 @@
+import numpy as np
+
+from benchmarks import fake_mt5
+
+with fake_mt5.installed():
+    from RISKCODE.var import EwmaCovariance
+
+DAY = 86_400
+
+
+def test_forming_bar_is_not_folded_in():
+    rng = np.random.default_rng(7)
+    times = np.arange(1, 302) * DAY                  # return row t ends at bar t
+    final = rng.normal(0, 0.01, (301, 2))
+    forming = final[:300].copy()
+    forming[-1] = rng.normal(0, 0.01, 2)             # bar 300 mid-session
+
+    ewma = EwmaCovariance(path=None)
+    ewma.seed(["A", "B"], times[:299], final[:299], now=times[298] + DAY)
+    assert ewma.update(times[:300], forming, now=times[299] + 3600) == 0
+    assert ewma.update(times[:300], final[:300], now=times[299] + DAY) == 1
+    assert ewma.update(times, final, now=times[300] + 3600) == 0     # bar 301 forming
+
+    fresh = EwmaCovariance(path=None)
+    fresh.seed(["A", "B"], times, final, now=times[300] + 3600)
+    assert ewma.last == fresh.last == times[299]
+    np.testing.assert_allclose(ewma.cov, fresh.cov, rtol=1e-6)           # seeds differ by λ^300
+
+
+def test_dead_symbol_leaves_the_state(tmp_path):
+    with fake_mt5.installed():
+        from RISKCODE.history import RATE_DTYPE, RateStore
+        from RISKCODE.var import RiskEngine
+    store = RateStore(tmp_path / "rates", min_sync=float("inf"))     # never asks the terminal
+    rng = np.random.default_rng(3)
+    times = 1_600_000_000 + np.arange(400) * DAY
+
+    def write(symbol, n):
+        bars = np.zeros(n, RATE_DTYPE)
+        bars["time"] = times[:n]
+        bars["close"] = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        bars.tofile(store.path(symbol))
+
+    for s in ("A", "B", "C"):
+        write(s, 300)
+    engine = RiskEngine(store, EwmaCovariance(path=None))
+    engine.refresh(["A", "B", "C"])
+    assert engine.ewma.last == times[299]
+
+    write("A", 400)
+    write("B", 400)                          # C stops printing bars at 300
+    assert engine.refresh(["A", "B"]) == (["A", "B"], [])
+    assert engine.ewma.symbols == ["A", "B"]
+    assert engine.ewma.last == times[399]
+    assert engine.refresh(["A", "C"]) == (["A"], ["C"])              # held but dead: left out
@@ -0,0 +1,234 @@
+"""
+dedup_index.py – fixed-size, cross-process "have we seen this headline?" index.
+
+One memory-mapped file per namespace (``data/dedup/<name>.idx``):
+
+    header   64 bytes   magic, geometry, TTL, epoch of each Bloom generation
+    bloom    2 x BLOOM_BITS bits – two time generations, each TTL long
+    table    SLOTS x 16 bytes    – (fingerprint:uint64, last_seen_ms:int64)
+
+A lookup first asks the Bloom filter; only a positive answer probes the
+on-disk open-addressing table (bounded PROBE window).  Entries older than the
+TTL count as empty and are overwritten, and a full probe window evicts its
+oldest entry, so memory stays fixed forever.  Every process that opens the same
+namespace maps the same pages, so a headline seen by one monitor is a
+duplicate for all of them; a small lock file serialises check-and-insert
+across processes, and a thread lock in front of it across the threads that
+share one instance.
+
+CLI (seed the index from the store after first deploy):
+
+    python -m utils.dedup_index seed --days 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from utils.headline_store import PROJECT_ROOT, HeadlineStore, _FileLock
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+DEDUP_DIR   = PROJECT_ROOT / "data" / "dedup"
+DEFAULT_TTL = 3 * 24 * 3600          # seconds a headline stays a duplicate
+SLOTS       = 1 << 18                # 262k entries  -> 4 MB table
+BLOOM_BITS  = 1 << 21                # per generation -> 256 KB
+BLOOM_K     = 4
+PROBE       = 16
+
+MAGIC  = b"FADEDUP1"
+HEADER = struct.Struct("<8sqqqqq")   # magic, slots, bloom_bits, ttl, epoch0, epoch1
+HEADER_SIZE = 64
+EPOCHS = struct.Struct("<qq")
+EPOCH_OFF = 32                       # offset of (epoch0, epoch1) in HEADER
+SLOT   = struct.Struct("<Qq")
+
+
+def normalize(text: str) -> str:
+    """Case- and whitespace-insensitive key for a headline."""
+    return " ".join(text.split()).casefold()
+
+
+# --------------------------------------------------------------------------- #
+# Index
+# --------------------------------------------------------------------------- #
+
+class DedupIndex:
+    """Shared Bloom-filter-fronted hash index with time-based eviction."""
+
+    def __init__(self, name: str = "headlines", root: Path | str = DEDUP_DIR,
+                 ttl: float = DEFAULT_TTL, slots: int = SLOTS,
+                 bloom_bits: int = BLOOM_BITS):
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        self.path = root / f"{name}.idx"
+        self._lock = _FileLock(root / f"{name}.lock")
+
+        with self._lock:
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                self._create(slots, bloom_bits, int(ttl))
+            self._fh = self.path.open("r+b")
+            self._mm = mmap.mmap(self._fh.fileno(), 0)
+        magic, self.slots, self.bloom_bits, ttl_s, *_ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise RuntimeError(f"{self.path} is not a dedup index")
+        self.ttl_ms = ttl_s * 1000           # geometry/TTL come from the file
+        self._bloom_bytes = self.bloom_bits // 8
+        self._bloom_off = HEADER_SIZE
+        self._table_off = HEADER_SIZE + 2 * self._bloom_bytes
+
+    def _create(self, slots: int, bloom_bits: int, ttl: int):
+        size = HEADER_SIZE + 2 * (bloom_bits // 8) + slots * SLOT.size
+        with self.path.open("wb") as f:
+            f.write(HEADER.pack(MAGIC, slots, bloom_bits, ttl, -1, -1))
+            f.truncate(size)
+
+    def close(self):
+        self._mm.close()
+        self._fh.close()
+        self._lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Hashing
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _digest(text: str) -> tuple[int, int]:
+        d = hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", d)
+        return h1 | 1, h2 | 1                # 0 marks an empty slot
+
+    # ------------------------------------------------------------------ #
+    # Bloom generations
+    # ------------------------------------------------------------------ #
+    def _generations(self, now_ms: int) -> tuple[int, list[int]]:
+        """Rotate if needed; return (current slot, slots that may hold hits)."""
+        gen = now_ms // self.ttl_ms
+        cur = gen % 2
+        epochs = list(EPOCHS.unpack_from(self._mm, EPOCH_OFF))
+        if epochs[cur] != gen:
+            start = self._bloom_off + cur * self._bloom_bytes
+            self._mm[start:start + self._bloom_bytes] = bytes(self._bloom_bytes)
+            epochs[cur] = gen
+            EPOCHS.pack_into(self._mm, EPOCH_OFF, *epochs)
+        live = [g for g in (0, 1) if epochs[g] in (gen, gen - 1)]
+        return cur, live
+
+    def _bloom_bits_for(self, h1: int, h2: int) -> list[int]:
+        return [(h1 + i * h2) % self.bloom_bits for i in range(BLOOM_K)]
+
+    def _bloom_test(self, gen: int, bits: list[int]) -> bool:
+        base = self._bloom_off + gen * self._bloom_bytes
+        mm = self._mm
+        return all(mm[base + (b >> 3)] & (1 << (b & 7)) for b in bits)
+
+    def _bloom_set(self, gen: int, bits: list[int]):
+        base = self._bloom_off + gen * self._bloom_bytes
+        mm = self._mm
+        for b in bits:
+            mm[base + (b >> 3)] |= 1 << (b & 7)
+
+    # ------------------------------------------------------------------ #
+    # Table
+    # ------------------------------------------------------------------ #
+    def _probe(self, fp: int, now_ms: int, insert: bool,
+               ts_ms: Optional[int] = None) -> bool:
+        """Return True if ``fp`` is live in the table; optionally record it."""
+        ts_ms = now_ms if ts_ms is None else ts_ms
+        start = fp % self.slots
+        victim, victim_ts = None, None
+        for i in range(PROBE):
+            slot = (start + i) % self.slots
+            off = self._table_off + slot * SLOT.size
+            slot_fp, ts = SLOT.unpack_from(self._mm, off)
+            live = slot_fp != 0 and now_ms - ts < self.ttl_ms
+            if live and slot_fp == fp:
+                if insert and ts_ms > ts:
+                    SLOT.pack_into(self._mm, off, fp, ts_ms)
+                return True
+            if not live:
+                ts = -1                      # free / expired beats any live slot
+            if victim is None or ts < victim_ts:
+                victim, victim_ts = off, ts
+        if insert:
+            SLOT.pack_into(self._mm, victim, fp, ts_ms)
+        return False
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def seen(self, headline: str, ts: Optional[float] = None) -> bool:
+        """Record ``headline``; return True if it was already seen within TTL.
+
+        ``ts`` back-dates the entry (used when seeding from the store) so it
+        expires TTL after the headline's own time rather than now.
+        """
+        now_ms = int(time.time() * 1000)
+        ts_ms = now_ms if ts is None else int(ts * 1000)
+        h1, h2 = self._digest(headline)
+        bits = self._bloom_bits_for(h1, h2)
+        with self._lock:
+            cur, live = self._generations(now_ms)
+            if any(self._bloom_test(g, bits) for g in live):
+                dup = self._probe(h1, now_ms, insert=True, ts_ms=ts_ms)
+            else:                            # Bloom says new – just claim a slot
+                dup = False
+                self._probe(h1, now_ms, insert=True, ts_ms=ts_ms)
+            self._bloom_set(cur, bits)
+        return dup
+
+    def __contains__(self, headline: str) -> bool:
+        now_ms = int(time.time() * 1000)
+        h1, h2 = self._digest(headline)
+        bits = self._bloom_bits_for(h1, h2)
+        with self._lock:
+            _, live = self._generations(now_ms)
+            if not any(self._bloom_test(g, bits) for g in live):
+                return False
+            return self._probe(h1, now_ms, insert=False)
+
+    def add(self, headline: str, ts: Optional[float] = None):
+        self.seen(headline, ts)
+
+    def update(self, headlines: Iterable[str]):
+        for h in headlines:
+            self.seen(h)
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def main(argv: Optional[list[str]] = None):
+    ap = argparse.ArgumentParser(description="Shared headline dedup index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    seed = sub.add_parser("seed", help="mark recent store headlines as seen")
+    seed.add_argument("--days", type=float, default=3)
+    seed.add_argument("--name", default="headlines")
+    args = ap.parse_args(argv)
+
+    with HeadlineStore() as store, DedupIndex(args.name) as idx:
+        n = 0
+        for rec in store.recent(args.days * 86400):
+            idx.seen(rec.text, rec.ts_ms / 1000)
+            n += 1
+    print(f"Seeded {n:,} headlines into {idx.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
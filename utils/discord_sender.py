@@ -0,0 +1,402 @@
+"""
+discord_sender.py – one pooled, rate-limit-aware Discord message sender.
+
+Every script used to carry its own ``post_to_discord``: a fresh
+``requests.post`` per message, 429s and ``X-RateLimit-*`` ignored, and the
+message gone on any failure.  ``DiscordSender`` replaces them:
+
+  * one ``aiohttp`` session – keep-alive connections, TLS set up once
+  * one lane per channel: messages go out in priority order (``URGENT``
+    headlines before ``NORMAL`` before ``BULK`` summaries), FIFO within a
+    priority, one request in flight per channel so order is kept
+  * per-route buckets fed from ``X-RateLimit-Remaining`` /
+    ``X-RateLimit-Reset-After``; a lane waits for its bucket instead of
+    collecting 429s, and a 429 (route or global) is honoured and retried
+  * while a lane is backed up, queued embed-only messages are packed into
+    one request – up to 10 embeds / 6000 characters, Discord's limits
+  * transport errors and 5xx are retried with backoff; a message is only
+    given up after ``retries`` attempts and its future says why
+
+Async code owns a ``DiscordSender``; threaded scripts use the process-wide
+``BackgroundSender`` from ``get_sender()``, which runs one on its own event
+loop thread:
+
+    from utils.discord_sender import URGENT, get_sender
+    get_sender().post(CHANNEL_ID, embed={"description": text}, priority=URGENT)
+
+``DISCORD_API_BASE`` points every sender at another server, e.g. the fake
+one in ``utils/fake_discord.py``.
+
+CLI (throughput against the fake server):
+
+    python -m utils.discord_sender bench --messages 2000 --channels 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+API_BASE      = "https://discord.com/api/v10"
+MAX_EMBEDS    = 10            # per message
+MAX_EMBED_LEN = 6000          # characters across all embeds of a message
+MAX_CONTENT   = 2000          # characters of plain content
+CONNECTIONS   = 8             # pooled keep-alive connections
+RETRIES       = 5             # attempts per request (429s don't count)
+BACKOFF       = 0.5           # seconds, doubled per failed attempt
+TIMEOUT       = 15.0          # seconds per request
+
+URGENT, NORMAL, BULK = 0, 1, 2   # priority lanes – lower goes first
+
+
+class DiscordError(Exception):
+    """A message Discord would not take after all retries."""
+
+
+# --------------------------------------------------------------------------- #
+# Messages and lanes
+# --------------------------------------------------------------------------- #
+
+@dataclass(order=True)
+class Message:
+    priority: int
+    seq: int
+    channel_id: str = field(compare=False)
+    content: Optional[str] = field(compare=False, default=None)
+    embed: Optional[dict] = field(compare=False, default=None)
+    future: Optional[asyncio.Future] = field(compare=False, default=None)
+
+    @property
+    def packable(self) -> bool:
+        return self.embed is not None and not self.content
+
+
+def embed_len(embed: dict) -> int:
+    """Characters Discord counts towards the 6000 limit."""
+    n = len(embed.get("title", "")) + len(embed.get("description", ""))
+    n += len(embed.get("footer", {}).get("text", "")) + len(embed.get("author", {}).get("name", ""))
+    return n + sum(len(f.get("name", "")) + len(f.get("value", "")) for f in embed.get("fields", ()))
+
+
+def split_content(text: str, limit: int = MAX_CONTENT) -> List[str]:
+    """Split long content at line (else word) boundaries into ≤ ``limit`` chunks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n ")
+    return chunks + [text] if text else chunks
+
+
+class _Lane:
+    """Priority heap of one channel's pending messages."""
+
+    def __init__(self):
+        self.heap: List[Message] = []
+        self.inflight: List[Message] = []      # taken off the heap, request not answered yet
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def push(self, msg: Message):
+        heapq.heappush(self.heap, msg)
+        self.ready.set()
+
+    def take(self, pack: bool = True) -> List[Message]:
+        """Next message, plus whatever queued embeds fit in the same request."""
+        batch = [heapq.heappop(self.heap)]
+        if pack and batch[0].packable:
+            size = embed_len(batch[0].embed)
+            while (self.heap and self.heap[0].packable and len(batch) < MAX_EMBEDS
+                   and size + embed_len(self.heap[0].embed) <= MAX_EMBED_LEN):
+                msg = heapq.heappop(self.heap)
+                size += embed_len(msg.embed)
+                batch.append(msg)
+        if not self.heap:
+            self.ready.clear()
+        return batch
+
+
+class _Bucket:
+    """Discord's view of one route, from the last response's headers."""
+
+    def __init__(self):
+        self.remaining = 1
+        self.reset_at = 0.0
+
+    def update(self, headers):
+        if "X-RateLimit-Remaining" in headers:
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Reset-After" in headers:
+            self.reset_at = time.monotonic() + float(headers["X-RateLimit-Reset-After"])
+
+    def delay(self) -> float:
+        if self.remaining > 0:
+            return 0.0
+        wait = self.reset_at - time.monotonic()
+        if wait <= 0:
+            self.remaining = 1                  # window over – probe again
+        return max(wait, 0.0)
+
+
+# --------------------------------------------------------------------------- #
+# Sender
+# --------------------------------------------------------------------------- #
+
+class DiscordSender:
+    """Pooled async sender; create, ``await start()``, then ``submit``/``send``."""
+
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 connections: int = CONNECTIONS, retries: int = RETRIES,
+                 timeout: float = TIMEOUT, batch: bool = True):
+        if token is None:
+            from utils.Keys import DISCORD_BOT_TOKEN as token
+        self.token = token
+        self.base_url = (base_url or os.environ.get("DISCORD_API_BASE") or API_BASE).rstrip("/")
+        self.connections, self.retries, self.timeout = connections, retries, timeout
+        self.batch = batch
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._lanes: Dict[str, _Lane] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._global_until = 0.0
+        self._seq = itertools.count()
+        self.sent = self.requests = self.rate_limited = self.failed = 0
+
+    async def start(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Authorization": f"Bot {self.token}",
+                         "User-Agent": "DiscordBot (fiat-assist, 1.0)"})
+        return self
+
+    async def close(self, drain: float = 10.0):
+        """Wait up to ``drain`` seconds for queued and in-flight messages, then
+        shut down; whatever is left fails with ``DiscordError("sender closed")``."""
+        deadline = time.monotonic() + drain
+        while (any(l.heap or l.inflight for l in self._lanes.values())
+               and time.monotonic() < deadline):
+            await asyncio.sleep(0.05)
+        tasks = [l.task for l in self._lanes.values() if l.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for lane in self._lanes.values():
+            for msg in lane.inflight + lane.heap:
+                if not msg.future.done():
+                    msg.future.set_exception(DiscordError("sender closed"))
+            lane.inflight, lane.heap = [], []
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # -- queueing -------------------------------------------------------------
+    def submit(self, channel_id, content: Optional[str] = None,
+               embed: Optional[dict] = None, priority: int = NORMAL) -> asyncio.Future:
+        """Queue a message (call from the sender's loop); the future resolves to
+        Discord's message id.  Over-long content is split into several
+        messages, the future then follows the last one."""
+        channel_id = str(channel_id)
+        lane = self._lanes.get(channel_id)
+        if lane is None:
+            lane = self._lanes[channel_id] = _Lane()
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.get_running_loop().create_task(self._run(channel_id, lane))
+        parts = split_content(content) if content else [None]
+        for i, part in enumerate(parts):
+            fut = asyncio.get_running_loop().create_future()
+            lane.push(Message(priority, next(self._seq), channel_id, part,
+                              embed if i == len(parts) - 1 else None, fut))
+        return fut
+
+    async def send(self, channel_id, content: Optional[str] = None,
+                   embed: Optional[dict] = None, priority: int = NORMAL) -> str:
+        return await self.submit(channel_id, content, embed, priority)
+
+    def pending(self) -> int:
+        return sum(len(l.heap) for l in self._lanes.values())
+
+    def stats(self) -> str:
+        return (f"sent {self.sent} in {self.requests} requests, {self.rate_limited} × 429, "
+                f"{self.failed} failed, {self.pending()} queued")
+
+    # -- delivery ---------------------------------------------------------------
+    async def _run(self, channel_id: str, lane: _Lane):
+        while True:
+            await lane.ready.wait()
+            batch = lane.inflight = lane.take(self.batch)
+            try:
+                msg_id = await self._deliver(channel_id, batch)
+            except Exception as e:
+                lane.inflight = []
+                self.failed += len(batch)
+                logger.warning("Discord post to %s failed: %s", channel_id, e)
+                for m in batch:
+                    if not m.future.done():
+                        m.future.set_exception(e if isinstance(e, DiscordError) else DiscordError(str(e)))
+                continue
+            lane.inflight = []
+            self.sent += len(batch)
+            for m in batch:
+                if not m.future.done():
+                    m.future.set_result(msg_id)
+
+    async def _deliver(self, channel_id: str, batch: List[Message]) -> str:
+        route = f"POST /channels/{channel_id}/messages"
+        bucket = self._buckets.setdefault(route, _Bucket())
+        payload: dict = {}
+        if batch[0].content:
+            payload["content"] = batch[0].content
+        embeds = [m.embed for m in batch if m.embed is not None]
+        if embeds:
+            payload["embeds"] = embeds
+        url = f"{self.base_url}/channels/{channel_id}/messages"
+
+        attempt = 0
+        while True:
+            wait = max(bucket.delay(), self._global_until - time.monotonic())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.requests += 1
+            try:
+                async with self.session.post(url, json=payload) as r:
+                    bucket.update(r.headers)
+                    if r.status in (200, 201):
+                        return (await r.json()).get("id", "")
+                    body = await r.json(content_type=None) if r.content_type == "application/json" else {}
+                    if r.status == 429:
+                        self.rate_limited += 1
+                        retry = float(body.get("retry_after", r.headers.get("Retry-After", 1)))
+                        if body.get("global") or r.headers.get("X-RateLimit-Global"):
+                            self._global_until = time.monotonic() + retry
+                        else:
+                            bucket.remaining, bucket.reset_at = 0, time.monotonic() + retry
+                        logger.info("Discord 429 on %s, retry in %.2fs", route, retry)
+                        continue
+                    if r.status < 500:              # our fault – retrying won't help
+                        raise DiscordError(f"{r.status}: {body or await r.text()}")
+                    error = f"{r.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+            attempt += 1
+            if attempt >= self.retries:
+                raise DiscordError(f"gave up after {attempt} attempts ({error})")
+            await asyncio.sleep(BACKOFF * 2 ** (attempt - 1) * (1 + random.random() / 4))
+
+
+class BackgroundSender:
+    """A ``DiscordSender`` on a daemon event-loop thread, for synchronous code."""
+
+    def __init__(self, **kw):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever,
+                                        name="discord-sender", daemon=True)
+        self._thread.start()
+        self.sender = DiscordSender(**kw)
+        asyncio.run_coroutine_threadsafe(self.sender.start(), self.loop).result()
+
+    def post(self, channel_id, content: Optional[str] = None, embed: Optional[dict] = None,
+             priority: int = NORMAL) -> Future:
+        """Queue a message from any thread; returns a concurrent Future (message id)."""
+        async def _submit():
+            return await self.sender.submit(channel_id, content, embed, priority)
+        return asyncio.run_coroutine_threadsafe(_submit(), self.loop)
+
+    def close(self, drain: float = 10.0):
+        if self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.sender.close(drain), self.loop).result(drain + 5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+        self.loop.close()
+
+
+_default: Optional[BackgroundSender] = None
+_default_lock = threading.Lock()
+
+
+def get_sender() -> BackgroundSender:
+    """Process-wide background sender, drained at exit."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = BackgroundSender()
+            atexit.register(_default.close)
+        return _default
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+async def _bench(args) -> str:
+    from utils.fake_discord import FakeDiscord
+
+    fake = FakeDiscord(limit=args.limit, per=args.per, latency=args.latency / 1000)
+    base = await fake.start()
+    results = {}
+    for batch in (False, True):
+        fake.reset()
+        async with DiscordSender("bench", base, batch=batch) as sender:
+            t0 = time.perf_counter()
+            futs = [sender.submit(1000 + i % args.channels, embed={"description": f"headline {i}"},
+                                  priority=URGENT if i % 10 == 0 else NORMAL)
+                    for i in range(args.messages)]
+            await asyncio.gather(*futs)
+            dt = time.perf_counter() - t0
+            results[batch] = (dt, sender.stats())
+    await fake.stop()
+    lines = [f"{args.messages} embeds over {args.channels} channel(s), "
+             f"{args.limit} req/{args.per:g}s per channel, {args.latency:g} ms server latency"]
+    for batch, (dt, stats) in results.items():
+        lines.append(f"  {'batched' if batch else 'single '}  {args.messages / dt:9,.1f} msg/s  "
+                     f"({dt:.2f}s)  {stats}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Discord sender tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench", help="throughput against utils.fake_discord")
+    b.add_argument("--messages", type=int, default=500)
+    b.add_argument("--channels", type=int, default=1)
+    b.add_argument("--limit", type=int, default=5, help="requests per window per channel")
+    b.add_argument("--per", type=float, default=1.0, help="window seconds (Discord: 5/5s)")
+    b.add_argument("--latency", type=float, default=20.0, help="fake server ms per request")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    print(asyncio.run(_bench(args)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
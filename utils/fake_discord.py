@@ -0,0 +1,173 @@
+"""
+fake_discord.py – local stand-in for Discord's create-message endpoint.
+
+Accepts ``POST /channels/{id}/messages`` and behaves like Discord as far as
+a sender can tell: a fixed-window bucket per channel with
+``X-RateLimit-Limit/-Remaining/-Reset-After/-Bucket`` headers, a 429 with
+``retry_after`` when the bucket is exhausted, a global per-second limit,
+Discord's 10-embed / 2000-character checks, and optional server latency
+and random 5xx.  Everything accepted is kept in ``messages`` for tests.
+
+    fake = FakeDiscord(limit=5, per=5)
+    base = await fake.start()                  # http://127.0.0.1:<port>
+    ... DiscordSender(token, base) ...
+    await fake.stop()
+
+CLI (point scripts at it with ``DISCORD_API_BASE=http://127.0.0.1:8790``):
+
+    python -m utils.fake_discord --port 8790 --limit 5 --per 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+LIMIT        = 5              # requests per window per channel (Discord: 5 / 5 s)
+PER          = 5.0            # window seconds
+GLOBAL_LIMIT = 50             # requests per second across all routes
+PORT         = 8790
+
+
+class FakeDiscord:
+    def __init__(self, limit: int = LIMIT, per: float = PER, global_limit: int = GLOBAL_LIMIT,
+                 latency: float = 0.0, error_rate: float = 0.0):
+        self.limit, self.per, self.global_limit = limit, per, global_limit
+        self.latency, self.error_rate = latency, error_rate
+        self._ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.reset()
+
+    def reset(self):
+        self.messages: List[Tuple[str, dict]] = []           # (channel, payload)
+        self.requests = self.limited = self.errors = 0
+        self._windows: Dict[str, Tuple[float, int]] = defaultdict(lambda: (0.0, 0))
+        self._global: Tuple[int, int] = (0, 0)                # (second, count)
+
+    @property
+    def embeds(self) -> int:
+        return sum(len(p.get("embeds", ())) for _, p in self.messages)
+
+    # -- server -----------------------------------------------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/channels/{channel}/messages", self.create_message)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # -- endpoint -----------------------------------------------------------------
+    def _take(self, channel: str) -> Tuple[bool, int, float]:
+        """Consume one request from the channel's window: (ok, remaining, reset_after)."""
+        now = time.monotonic()
+        start, used = self._windows[channel]
+        if now - start >= self.per:
+            start, used = now, 0
+        ok = used < self.limit
+        used += ok
+        self._windows[channel] = (start, used)
+        return ok, self.limit - used, start + self.per - now
+
+    async def create_message(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        channel = request.match_info["channel"]
+        if not request.headers.get("Authorization", "").startswith("Bot "):
+            return web.json_response({"message": "401: Unauthorized", "code": 0}, status=401)
+
+        sec = int(time.monotonic())
+        g_sec, g_count = self._global
+        g_count = g_count + 1 if g_sec == sec else 1
+        self._global = (sec, g_count)
+        if g_count > self.global_limit:
+            self.limited += 1
+            return web.json_response({"message": "You are being rate limited.",
+                                      "retry_after": round(1 - time.monotonic() % 1, 3),
+                                      "global": True},
+                                     status=429, headers={"X-RateLimit-Global": "true"})
+
+        ok, remaining, reset_after = self._take(channel)
+        headers = {"X-RateLimit-Limit": str(self.limit),
+                   "X-RateLimit-Remaining": str(max(remaining, 0)),
+                   "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                   "X-RateLimit-Bucket": f"fake-{channel}"}
+        if not ok:
+            self.limited += 1
+            return web.json_response({"message": "You are being rate limited.",
+                                      "retry_after": round(reset_after, 3), "global": False},
+                                     status=429, headers=headers)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"message": "Internal Server Error"}, status=500)
+
+        payload = await request.json()
+        embeds, content = payload.get("embeds", []), payload.get("content") or ""
+        if len(embeds) > 10 or len(content) > 2000 or not (embeds or content):
+            return web.json_response({"message": "Invalid Form Body", "code": 50035},
+                                     status=400, headers=headers)
+        self.messages.append((channel, payload))
+        return web.json_response({"id": str(next(self._ids)), "channel_id": channel,
+                                  "content": content, "embeds": embeds}, headers=headers)
+
+    def stats(self) -> str:
+        return (f"{len(self.messages)} messages / {self.embeds} embeds accepted, "
+                f"{self.requests} requests, {self.limited} × 429, {self.errors} × 5xx")
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+async def _serve(args):
+    fake = FakeDiscord(args.limit, args.per, args.global_limit, args.latency / 1000,
+                       args.error_rate)
+    base = await fake.start(args.host, args.port)
+    print(f"Fake Discord on {base}  (DISCORD_API_BASE={base})", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(fake.stats(), flush=True)
+    finally:
+        await fake.stop()
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Local fake Discord API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--limit", type=int, default=LIMIT, help="requests per window per channel")
+    ap.add_argument("--per", type=float, default=PER, help="window seconds")
+    ap.add_argument("--global-limit", type=int, default=GLOBAL_LIMIT, help="requests per second")
+    ap.add_argument("--latency", type=float, default=0.0, help="ms added per request")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests → 500")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+"""
+headline_bus.py – local pub/sub for headline events, backed by the store.
+
+Monitors used to append to the store and publishers found out through a
+watchdog filesystem event plus a re-read.  With the bus:
+
+    monitor ──pub──► broker ──append──► data/headlines/*.seg
+                        └──fan-out──► publisher_v2, archive, …
+
+The broker is the store's writer for bus clients: it appends, then pushes
+the new record (with its store cursor) to every subscriber over a local
+socket – a Unix-domain socket where the platform has one, TCP loopback
+otherwise (Windows).  Messages are JSON lines.
+
+Delivery is at-least-once.  A subscriber persists its position with the
+same checkpoint files as ``StoreTailer``; on (re)connect it sends that
+cursor and the broker replays everything after it from the store before
+switching to live events.  A slow subscriber is disconnected rather than
+buffered without bound, and replays on reconnect.  If the broker is down,
+``BusPublisher`` appends to the store directly and ``BusSubscriber`` polls
+the store, so nothing is lost – the broker also picks up such direct
+writes and fans them out.
+
+CLI:
+
+    python -m utils.headline_bus serve                 # run the broker
+    python -m utils.headline_bus archive headlines.csv # CSV archive subscriber
+    python -m utils.headline_bus tail                  # print live events
+    python -m utils.headline_bus pub RTRS "SOME HEADLINE"
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from utils.headline_store import (CHECKPOINT_DIR, PROJECT_ROOT, Cursor, Headline,
+                                  HeadlineStore, StoreTailer)
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+HAVE_UNIX     = hasattr(socket, "AF_UNIX")
+SOCKET_PATH   = PROJECT_ROOT / "data" / "bus.sock"
+TCP_ADDR      = ("127.0.0.1", 8765)
+SCAN_INTERVAL = 0.25          # broker picks up direct store writes this often
+SEND_LIMIT    = 4 * 1024**2   # bytes buffered for one subscriber before it is cut
+RECONNECT     = 2.0           # seconds between client reconnect attempts
+POLL_FALLBACK = 1.0           # subscriber store poll while the broker is down
+
+Address = Union[str, Tuple[str, int]]
+
+
+def default_address() -> Address:
+    """``HEADLINE_BUS`` env (``unix:/path`` or ``tcp:host:port``), else per platform."""
+    spec = os.environ.get("HEADLINE_BUS", "")
+    if spec.startswith("unix:"):
+        return spec[5:]
+    if spec.startswith("tcp:"):
+        host, _, port = spec[4:].rpartition(":")
+        return host, int(port)
+    return str(SOCKET_PATH) if HAVE_UNIX else TCP_ADDR
+
+
+# --------------------------------------------------------------------------- #
+# Wire format
+# --------------------------------------------------------------------------- #
+
+def encode_event(rec: Headline) -> bytes:
+    return (json.dumps({"op": "event", "ts": rec.ts_ms, "src": rec.source, "text": rec.text,
+                        "extra": list(rec.extra), "seg": rec.cursor.segment,
+                        "off": rec.cursor.offset, "end": rec.end},
+                       ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def decode_event(msg: dict) -> Headline:
+    return Headline(msg["ts"], msg["src"], msg["text"], Cursor(msg["seg"], msg["off"]),
+                    tuple(msg.get("extra", ())), msg["end"])
+
+
+def _line(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# --------------------------------------------------------------------------- #
+# Broker
+# --------------------------------------------------------------------------- #
+
+class Broker:
+    def __init__(self, store: HeadlineStore, address: Optional[Address] = None):
+        self.store = store
+        self.address = address or default_address()
+        # only its position is used – fan-out is always "whatever is new in
+        # the store", so direct writers and bus publishers look the same
+        self.tailer = StoreTailer(store, "bus-broker", start_at_end=True)
+        self.subs: List[asyncio.StreamWriter] = []
+        self.published = self.delivered = self.dropped_subs = 0
+
+    async def serve(self):
+        if isinstance(self.address, str):
+            Path(self.address).unlink(missing_ok=True)
+            server = await asyncio.start_unix_server(self.handle, self.address)
+        else:
+            server = await asyncio.start_server(self.handle, *self.address)
+        print(f"Headline bus on {self.address}", flush=True)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self._scan_loop())
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(SCAN_INTERVAL)
+            self.pump()
+
+    def pump(self):
+        """Fan out every record that reached the store since the last pump."""
+        batch = self.tailer.poll()
+        if not batch or not self.subs:
+            return
+        data = b"".join(encode_event(r) for r in batch)
+        for w in list(self.subs):
+            if w.transport.get_write_buffer_size() > SEND_LIMIT:
+                # it will reconnect and replay from its checkpoint
+                self.dropped_subs += 1
+                self._drop(w)
+                continue
+            w.write(data)
+            self.delivered += len(batch)
+
+    def _drop(self, w: asyncio.StreamWriter):
+        if w in self.subs:
+            self.subs.remove(w)
+        w.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get("op") == "pub":
+                await self._publisher(reader, writer)
+            elif hello.get("op") == "sub":
+                await self._subscriber(hello, reader, writer)
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._drop(writer)
+
+    async def _publisher(self, reader, writer):
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                return
+            msg = json.loads(raw)
+            cursor = self.store.append(msg["text"], msg["src"], msg.get("ts"),
+                                       *msg.get("extra", ()))
+            self.published += 1
+            self.pump()                               # subscribers first, then the ack
+            writer.write(_line({"op": "ack", "seg": cursor.segment, "off": cursor.offset}))
+
+    async def _subscriber(self, hello, reader, writer):
+        self.pump()
+        start = Cursor(hello["seg"], hello["off"]) if "seg" in hello else self.tailer.position
+        # replay up to the broker's position, then go live; anything the
+        # client sees twice it skips by cursor
+        while start < self.tailer.position:
+            recs, start = self.store.read_from(start, limit=1000)
+            if not recs:
+                break
+            writer.write(b"".join(encode_event(r) for r in recs))
+            await writer.drain()
+        self.subs.append(writer)
+        print(f"Subscriber {hello.get('name', '?')} live from {start.segment}@{start.offset:,}",
+              flush=True)
+        while await reader.readline():                # keep-alive / wait for EOF
+            pass
+
+
+# --------------------------------------------------------------------------- #
+# Publisher client (sync – monitors are threaded scripts)
+# --------------------------------------------------------------------------- #
+
+class BusPublisher:
+    """Drop-in for ``HeadlineStore.append`` that goes through the broker.
+
+    Each append waits for the broker's ack (the record is on disk by then).
+    Without a broker it appends to the store itself and retries the
+    connection every ``RECONNECT`` seconds.  One lock covers a whole append
+    (connect, send, ack, fallback), so threads sharing a publisher never
+    read each other's acks.
+    """
+
+    def __init__(self, address: Optional[Address] = None, store: Optional[HeadlineStore] = None):
+        self.address = address or default_address()
+        self._store = store
+        self._sock: Optional[socket.socket] = None
+        self._rfile = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> bool:
+        if self._sock is not None:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        try:
+            if isinstance(self.address, str):
+                s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            s.settimeout(5)
+            s.connect(self.address)
+            s.sendall(_line({"op": "pub"}))
+        except OSError:
+            self._retry_at = time.monotonic() + RECONNECT
+            return False
+        self._sock, self._rfile = s, s.makefile("rb")
+        return True
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._rfile = None
+        self._retry_at = time.monotonic() + RECONNECT
+
+    def append(self, headline: str, source: str,
+               ts: Optional[float] = None, *extra: str) -> Cursor:
+        with self._lock:
+            if self._connect():
+                try:
+                    self._sock.sendall(_line({"src": source, "text": headline, "ts": ts,
+                                              "extra": list(extra)}))
+                    ack = json.loads(self._rfile.readline())
+                    return Cursor(ack["seg"], ack["off"])
+                except (OSError, ValueError, KeyError):
+                    # not acked – it may or may not be stored; writing it directly
+                    # can at worst duplicate, which dedup downstream absorbs
+                    self._disconnect()
+            if self._store is None:
+                self._store = HeadlineStore()
+            return self._store.append(headline, source, ts, *extra)
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+            if self._store is not None:
+                self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --------------------------------------------------------------------------- #
+# Subscriber client (async – publishers and the gateway are asyncio)
+# --------------------------------------------------------------------------- #
+
+class BusSubscriber:
+    """``async for rec in sub.events()`` – every record, in store order.
+
+    ``commit(cursor)`` makes progress durable (``data/checkpoints/<name>.json``,
+    shared format with ``StoreTailer``); a restart resumes from there.
+    """
+
+    def __init__(self, name: str, address: Optional[Address] = None,
+                 store: Optional[HeadlineStore] = None, start_at_end: bool = True,
+                 checkpoint_dir: Path | str = CHECKPOINT_DIR):
+        self.name = name
+        self.address = address or default_address()
+        self.store = store or HeadlineStore()
+        self.tailer = StoreTailer(self.store, name, checkpoint_dir, start_at_end)
+        self.live = False
+
+    @property
+    def position(self) -> Cursor:
+        return self.tailer.position
+
+    def commit(self, cursor: Optional[Cursor] = None):
+        self.tailer.commit(cursor)
+
+    async def _open(self):
+        if isinstance(self.address, str):
+            return await asyncio.open_unix_connection(self.address)
+        return await asyncio.open_connection(*self.address)
+
+    async def events(self) -> AsyncIterator[Headline]:
+        while True:
+            try:
+                reader, writer = await self._open()
+            except OSError:
+                # broker down – read the store directly until it is back
+                self.live = False
+                deadline = time.monotonic() + RECONNECT
+                while time.monotonic() < deadline:
+                    for rec in self.tailer.poll():
+                        yield rec
+                    await asyncio.sleep(POLL_FALLBACK)
+                continue
+            pos = self.tailer.position
+            writer.write(_line({"op": "sub", "name": self.name,
+                                "seg": pos.segment, "off": pos.offset}))
+            self.live = True
+            try:
+                while True:
+                    raw = await reader.readline()
+                    if not raw:
+                        break
+                    rec = decode_event(json.loads(raw))
+                    if rec.cursor < self.tailer.position:
+                        continue                      # replay overlap
+                    self.tailer.position = rec.next_cursor
+                    yield rec
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                self.live = False
+                writer.close()
+            await asyncio.sleep(RECONNECT)
+
+    def close(self):
+        self.store.close()
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+async def _archive(path: Path, name: str):
+    """CSV archive subscriber – same ``ts,headline,source`` rows as the old files."""
+    sub = BusSubscriber(name)
+    with path.open("a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        async for rec in sub.events():
+            w.writerow([rec.stamp, rec.text, rec.source])
+            f.flush()
+            sub.commit(rec.next_cursor)
+
+
+async def _tail(from_start: bool):
+    sub = BusSubscriber("bus-tail", start_at_end=not from_start)
+    async for rec in sub.events():
+        lag = time.time() * 1000 - rec.ts_ms
+        print(f"{rec.stamp} [{rec.source}] {rec.text}   (+{lag:.1f} ms)", flush=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Local headline event bus")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("serve", help="run the broker")
+    arc = sub.add_parser("archive", help="append every event to a CSV")
+    arc.add_argument("csv", type=Path)
+    arc.add_argument("--name", default="archive", help="checkpoint name")
+    tail = sub.add_parser("tail", help="print events as they arrive")
+    tail.add_argument("--from-start", action="store_true")
+    pub = sub.add_parser("pub", help="publish one headline")
+    pub.add_argument("source")
+    pub.add_argument("text")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.cmd == "serve":
+            with HeadlineStore() as store:
+                asyncio.run(Broker(store).serve())
+        elif args.cmd == "archive":
+            asyncio.run(_archive(args.csv, args.name))
+        elif args.cmd == "tail":
+            asyncio.run(_tail(args.from_start))
+        else:
+            with BusPublisher() as bus:
+                print(bus.append(args.text, args.source))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
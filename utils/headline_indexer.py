@@ -0,0 +1,574 @@
+"""
+headline_indexer.py – embed every stored headline into an on-disk ANN index.
+
+The indexer catches up on the store from its own cursor, then follows the
+headline bus.  Every live headline is looked up *before* it is added, and its
+top-k neighbours with cosine distances go to
+``data/semantic/<name>/neighbours.jsonl`` – the "how close was the nearest
+story we already had" log.
+
+Embedders (``--embedder``), chosen when the index is created:
+
+    hash[:dim]              signed feature hashing of words, word pairs and
+                            character trigrams – no model, no network
+                            (default, 256 dims)
+    openai[:model]          OpenAI embeddings (text-embedding-3-small)
+    local:URL[#model]       any OpenAI-compatible embeddings server
+
+Index layout (``data/semantic/<name>/``), IVF-flat over unit vectors:
+
+    meta.json      embedder, dim, row count, list count, store cursor
+    vectors.i8     row-major int8 vectors (scalar-quantised), append-only
+    rows.bin       (ts_ms, offset into texts.txt, vector scale) per row
+    texts.txt      "SOURCE<tab>text" lines
+    lists.u16      inverted-list id of each row
+    centroids.npy  coarse quantizer (spherical k-means)
+
+New rows are assigned to their nearest centroid and appended – nothing is
+rebuilt per headline.  The first ``TRAIN_AT`` rows are searched flat; after
+that the quantizer is trained, and retrained (all rows reassigned) only when
+the index has grown ``RETRAIN_FACTOR``-fold and the list count would still
+grow, so the cost is amortised and stops at ``MAX_LISTS``.  A query scores
+the ``nprobe`` nearest lists, a few thousand rows even at millions of
+headlines.  ``meta.json`` is written last; on open, files are cut back to
+its row count, so a crash mid-append loses nothing that was committed.
+
+CLI:
+
+    python -m utils.headline_indexer run                     # catch up, then follow the bus
+    python -m utils.headline_indexer query "ECB raises rates" -k 5
+    python -m utils.headline_indexer stats
+    python -m utils.headline_indexer bench --rows 2000000    # synthetic, temp dir
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from array import array
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from utils.headline_bus import BusSubscriber
+from utils.headline_store import (PROJECT_ROOT, Cursor, Headline, HeadlineStore,
+                                  read_legacy_csv)
+from utils.rotating_log import dump_logger
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+INDEX_DIR      = PROJECT_ROOT / "data" / "semantic"
+HASH_DIM       = 256
+TOP_K          = 5
+NPROBE         = 16           # lists scored per query
+TRAIN_AT       = 8_192        # rows before the quantizer is first trained
+RETRAIN_FACTOR = 4            # retrain when the index has grown this much
+MAX_LISTS      = 2_048
+KMEANS_ITERS   = 8
+KMEANS_SAMPLE  = 32           # training rows per list
+CATCHUP_BATCH  = 4_096
+CHUNK          = 65_536       # rows scored / assigned per matrix product
+
+ROW = np.dtype([("ts", "<i8"), ("off", "<i8"), ("scale", "<f4")])
+
+
+def dbg(msg: str):
+    print(time.strftime("[%H:%M:%S] ") + msg, flush=True)
+
+
+# --------------------------------------------------------------------------- #
+# Embedders
+# --------------------------------------------------------------------------- #
+
+class Embedder(ABC):
+    spec = "embedder"
+    dim = 0
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """``len(texts) x dim`` float32, rows of unit length (or zero)."""
+
+
+def _unit(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    return m / np.where(norms > 0, norms, 1)
+
+
+_WORD = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+
+class HashingEmbedder(Embedder):
+    """Feature hashing – a bag of words, word pairs and trigrams of longer words.
+
+    Not semantic in the model sense, but deterministic, free and fast enough
+    to index the whole archive; headlines sharing wording land close together.
+    """
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim, self.spec = dim, f"hash:{dim}"
+
+    @staticmethod
+    def features(text: str):
+        words = _WORD.findall(text.lower())
+        for w in words:
+            yield w, 1.0
+        for a, b in zip(words, words[1:]):
+            yield f"{a} {b}", 0.7
+        for w in words:
+            if len(w) > 3 and w.isalpha():
+                p = f"<{w}>"
+                for i in range(len(p) - 2):
+                    yield p[i:i + 3], 0.25
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), np.float32)
+        for row, text in enumerate(texts):
+            for feat, w in self.features(text):
+                h = int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += w if h >> 63 else -w
+        return _unit(out)
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI's embeddings endpoint, or any server speaking the same API."""
+
+    def __init__(self, model: str = "text-embedding-3-small", base_url: Optional[str] = None):
+        from openai import OpenAI
+        if base_url:                           # local servers ignore the key
+            api_key = os.environ.get("OPENAI_API_KEY", "local")
+        else:
+            from utils import Keys
+            api_key = os.environ.get("OPENAI_API_KEY", Keys.OPENAI_API)
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.model = model
+        self.spec = f"local:{base_url}#{model}" if base_url else f"openai:{model}"
+        self.dim = len(self.client.embeddings.create(model=model, input=["dim"]).data[0].embedding)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        resp = self.client.embeddings.create(model=self.model, input=list(texts))
+        return _unit(np.array([d.embedding for d in resp.data], np.float32))
+
+
+def make_embedder(spec: str) -> Embedder:
+    """Build an embedder from a short spec string (see module docstring)."""
+    kind, _, rest = spec.partition(":")
+    if kind == "hash":
+        return HashingEmbedder(int(rest) if rest else HASH_DIM)
+    if kind == "openai":
+        return OpenAIEmbedder(rest or "text-embedding-3-small")
+    if kind == "local":
+        url, _, model = rest.partition("#")
+        return OpenAIEmbedder(model or "text-embedding-3-small", base_url=url)
+    raise ValueError(f"unknown embedder {spec!r}")
+
+
+# --------------------------------------------------------------------------- #
+# Quantizer
+# --------------------------------------------------------------------------- #
+
+def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x), np.uint16)
+    for i in range(0, len(x), CHUNK // 4):
+        block = np.asarray(x[i:i + CHUNK // 4], np.float32)
+        out[i:i + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = KMEANS_ITERS, seed: int = 0) -> np.ndarray:
+    """Spherical k-means – centroids of unit length, cosine assignment."""
+    rng = np.random.default_rng(seed)
+    c = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest(x, c)
+        sums = np.zeros_like(c)
+        np.add.at(sums, assign, x)
+        empty = ~sums.any(axis=1)
+        sums[empty] = x[rng.choice(len(x), int(empty.sum()))]   # reseed dead lists
+        c = _unit(sums)
+    return c
+
+
+def quantize(v: np.ndarray):
+    """Per-row int8 scalar quantisation – a quarter of float32 on disk, and
+    int8 → float32 converts several times faster than float16 when scoring."""
+    scale = np.abs(v).max(axis=1) / 127
+    scale[scale == 0] = 1
+    return np.rint(v / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+
+def lists_for(n: int) -> int:
+    return int(min(MAX_LISTS, max(16, 2 * np.sqrt(n))))
+
+
+# --------------------------------------------------------------------------- #
+# Index
+# --------------------------------------------------------------------------- #
+
+class Neighbour(NamedTuple):
+    distance: float          # cosine distance, 0 = same direction
+    ts_ms: int
+    source: str
+    text: str
+
+
+class SemanticIndex:
+    """IVF-flat index on disk; one writer (the indexer), any number of readers."""
+
+    def __init__(self, name: str = "headlines", root: Path | str = INDEX_DIR,
+                 embedder: Optional[str] = None, readonly: bool = False):
+        self.dir = Path(root) / name
+        self.readonly = readonly
+        self._meta_path = self.dir / "meta.json"
+        if self._meta_path.exists():
+            self.meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            if embedder and embedder != self.meta["embedder"]:
+                raise ValueError(f"{self.dir} was built with {self.meta['embedder']}, not {embedder} "
+                                 "– use another --name")
+        elif readonly:
+            raise FileNotFoundError(f"no semantic index at {self.dir}")
+        else:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self.meta = {"embedder": embedder or f"hash:{HASH_DIM}", "count": 0,
+                         "text_bytes": 0, "trained_on": 0, "cursor": ["", 0]}
+        self._embedder: Optional[Embedder] = None
+        self.dim = self.meta.get("dim") or self.embedder.dim
+        self.meta["dim"] = self.dim
+
+        if not readonly:
+            self._truncate()
+            self._vec_f = open(self.dir / "vectors.i8", "ab")
+            self._row_f = open(self.dir / "rows.bin", "ab")
+            self._txt_f = open(self.dir / "texts.txt", "ab")
+            self._lst_f = open(self.dir / "lists.u16", "ab")
+            self._save_meta()
+        self._txt_r = open(self.dir / "texts.txt", "rb")
+        self._meta_mtime = self._meta_path.stat().st_mtime_ns
+        self._load()
+
+    # ------------------------------------------------------------------ #
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = make_embedder(self.meta["embedder"])
+        return self._embedder
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def cursor(self) -> Cursor:
+        return Cursor(*self.meta["cursor"])
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def _truncate(self):
+        n = self.count
+        for fname, size in (("vectors.i8", n * self.dim), ("rows.bin", n * ROW.itemsize),
+                            ("texts.txt", self.meta["text_bytes"]), ("lists.u16", n * 2)):
+            with open(self.dir / fname, "ab") as f:
+                if f.tell() != size:
+                    f.truncate(size)
+
+    def _save_meta(self):
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.meta), encoding="utf-8")
+        os.replace(tmp, self._meta_path)
+
+    def _map(self):
+        n = self.count
+        if n == 0:
+            self.vectors = np.zeros((0, self.dim), np.int8)
+            self.rows = np.zeros(0, ROW)
+            return
+        self.vectors = np.memmap(self.dir / "vectors.i8", np.int8, "r", shape=(n, self.dim))
+        self.rows = np.memmap(self.dir / "rows.bin", ROW, "r", shape=(n,))
+
+    def _load(self):
+        """(Re)build the in-memory inverted lists from ``lists.u16``."""
+        self._map()
+        self.centroids = None
+        self._lists: List[np.ndarray] = []
+        if not self.meta["trained_on"]:
+            return
+        self.centroids = np.load(self.dir / "centroids.npy")
+        assign = np.fromfile(self.dir / "lists.u16", np.uint16, count=self.count)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.nlist)]
+        self._tails: List[array] = [array("q") for _ in range(self.nlist)]   # rows added since
+
+    def refresh(self):
+        """Readers: pick up rows the indexer has added since the last call."""
+        mtime = self._meta_path.stat().st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+        self._meta_mtime = mtime
+        old = self.meta
+        self.meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        if self.meta["trained_on"] != old["trained_on"] or not self.meta["trained_on"]:
+            self._load()
+            return
+        self._map()
+        new = np.fromfile(self.dir / "lists.u16", np.uint16, count=self.count)[old["count"]:]
+        for row, lst in enumerate(new, old["count"]):
+            self._tails[lst].append(row)
+
+    def close(self):
+        self._txt_r.close()
+        if not self.readonly:
+            for f in (self._vec_f, self._row_f, self._txt_f, self._lst_f):
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.embedder.embed(texts)
+
+    def add(self, recs: Sequence[Headline], cursor: Cursor,
+            vectors: Optional[np.ndarray] = None):
+        """Append ``recs`` (link records are skipped) and move the cursor on."""
+        keep = [i for i, r in enumerate(recs) if r.text and not r.ref]
+        if keep:
+            if vectors is None:
+                vectors = self.embed([recs[i].text for i in keep])
+            else:
+                vectors = vectors[keep]
+            self._append(vectors, [recs[i].ts_ms for i in keep],
+                         [f"{recs[i].source}\t{recs[i].text}" for i in keep])
+        self.meta["cursor"] = list(cursor)
+        self._commit()
+
+    def _append(self, vectors: np.ndarray, ts_ms: Sequence[int], lines: Sequence[str]):
+        n0 = self.count
+        blob = "".join(f"{line}\n" for line in lines).encode("utf-8")
+        lens = np.fromiter((len(line.encode("utf-8")) + 1 for line in lines), np.int64, len(lines))
+        rows = np.empty(len(lines), ROW)
+        q8, rows["scale"] = quantize(vectors)
+        rows["ts"] = ts_ms
+        rows["off"] = self.meta["text_bytes"] + np.concatenate(([0], np.cumsum(lens)[:-1]))
+        assign = (_nearest(vectors, self.centroids) if self.centroids is not None
+                  else np.zeros(len(vectors), np.uint16))
+
+        self._vec_f.write(q8.tobytes())
+        self._row_f.write(rows.tobytes())
+        self._txt_f.write(blob)
+        self._lst_f.write(assign.tobytes())
+        self.meta["count"] = n0 + len(vectors)
+        self.meta["text_bytes"] += len(blob)
+        for row, lst in enumerate(assign, n0):
+            if self.centroids is not None:
+                self._tails[lst].append(row)
+
+    def _commit(self):
+        for f in (self._vec_f, self._row_f, self._txt_f, self._lst_f):
+            f.flush()
+        n, trained = self.count, self.meta["trained_on"]
+        if n >= TRAIN_AT and (not trained or (n >= RETRAIN_FACTOR * trained
+                                               and lists_for(n) > self.nlist)):
+            self.train()
+        self._save_meta()
+        self._meta_mtime = self._meta_path.stat().st_mtime_ns
+        self._map()
+
+    def train(self):
+        """(Re)train the quantizer on a sample and reassign every row."""
+        t0 = time.perf_counter()
+        self._map()
+        n = self.count
+        k = lists_for(n)
+        sample = np.sort(np.random.default_rng(n).choice(n, min(n, KMEANS_SAMPLE * k), replace=False))
+        centroids = kmeans(self.decode(sample), k)
+        assign = _nearest(self.vectors, centroids)    # argmax ignores the row scale
+        np.save(self.dir / "centroids.tmp.npy", centroids)
+        os.replace(self.dir / "centroids.tmp.npy", self.dir / "centroids.npy")
+        self._lst_f.close()
+        assign.tofile(self.dir / "lists.u16")
+        self._lst_f = open(self.dir / "lists.u16", "ab")
+        self.meta["trained_on"] = n
+        self.meta["nlist"] = k
+        self._load()
+        dbg(f"Trained {k:,} lists on {len(sample):,} of {n:,} rows in {time.perf_counter() - t0:.1f}s")
+
+    # ------------------------------------------------------------------ #
+    def decode(self, sel) -> np.ndarray:
+        return np.asarray(self.vectors[sel], np.float32) * self.rows["scale"][sel][:, None]
+
+    def _scores(self, sel, q: np.ndarray) -> np.ndarray:
+        return (np.asarray(self.vectors[sel], np.float32) @ q) * self.rows["scale"][sel]
+
+    def _candidates(self, q: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return None                               # flat: every row
+        probe = np.argpartition(-(self.centroids @ q), min(nprobe, self.nlist) - 1)[:nprobe]
+        parts = [self._lists[i] for i in probe]
+        parts += [np.frombuffer(self._tails[i], np.int64) for i in probe if self._tails[i]]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, np.int64)
+
+    def search_vector(self, q: np.ndarray, k: int = TOP_K, nprobe: int = NPROBE):
+        """Row ids and cosine distances of the ``k`` nearest rows to ``q``."""
+        rows = self._candidates(q, nprobe)
+        if rows is None:
+            scores = np.concatenate([self._scores(slice(i, i + CHUNK), q)
+                                     for i in range(0, self.count, CHUNK)] or [np.empty(0)])
+            rows = np.arange(self.count)
+        else:
+            scores = self._scores(rows, q)
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores)
+        return rows[order], 1.0 - scores[order]
+
+    def search(self, text: str, k: int = TOP_K, nprobe: int = NPROBE) -> List[Neighbour]:
+        return self.neighbours(*self.search_vector(self.embed([text])[0], k, nprobe))
+
+    def neighbours(self, rows: np.ndarray, dists: np.ndarray) -> List[Neighbour]:
+        out = []
+        for row, d in zip(rows, dists):
+            self._txt_r.seek(int(self.rows[row]["off"]))
+            source, _, text = self._txt_r.readline().decode("utf-8").rstrip("\n").partition("\t")
+            out.append(Neighbour(round(float(d), 4), int(self.rows[row]["ts"]), source, text))
+        return out
+
+    def stats(self) -> str:
+        sizes = [len(l) + len(t) for l, t in zip(self._lists, self._tails)] if self.nlist else [self.count]
+        return (f"{self.count:,} rows, {self.meta['embedder']} ({self.dim} dims), "
+                f"{self.nlist:,} lists (trained on {self.meta['trained_on']:,}), "
+                f"largest list {max(sizes, default=0):,}, cursor {self.cursor.segment}@{self.cursor.offset:,}")
+
+
+# --------------------------------------------------------------------------- #
+# Indexer
+# --------------------------------------------------------------------------- #
+
+async def run(index: SemanticIndex, k: int = TOP_K):
+    """Catch up on the store, then index live headlines and log their neighbours."""
+    store = HeadlineStore()
+    t0, n0 = time.perf_counter(), index.count
+    while True:
+        recs, cursor = store.read_from(index.cursor, limit=CATCHUP_BATCH)
+        if not recs:
+            break
+        index.add(recs, cursor)
+    dbg(f"Caught up: {index.count - n0:,} new rows in {time.perf_counter() - t0:.1f}s – {index.stats()}")
+
+    log = dump_logger("semantic.neighbours", index.dir / "neighbours.jsonl")
+    # the index's cursor is the checkpoint – nothing is committed to data/checkpoints
+    sub = BusSubscriber("headline_indexer", store=store)
+    sub.tailer.position = index.cursor
+    async for rec in sub.events():
+        if rec.ref or not rec.text:
+            index.add([rec], rec.next_cursor)
+            continue
+        t = time.perf_counter()
+        vec = index.embed([rec.text])
+        hits = index.neighbours(*index.search_vector(vec[0], k)) if index.count else []
+        ms = (time.perf_counter() - t) * 1000
+        index.add([rec], rec.next_cursor, vec)
+        log.info(json.dumps({"ts": rec.ts_ms, "source": rec.source, "text": rec.text,
+                             "ms": round(ms, 2), "nn": [list(h) for h in hits]}, ensure_ascii=False))
+        nearest = f"{hits[0].distance:.3f} {hits[0].text[:50]}" if hits else "-"
+        dbg(f"{rec.source:<6} {rec.text[:60]}  ⟶ {nearest}  ({ms:.1f} ms)")
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def bench(rows: int, queries: int, k: int, nprobe: int):
+    """Synthetic corpus blended from real headline embeddings; recall against brute force."""
+    emb = HashingEmbedder()
+    seeds = {text for path in sorted(PROJECT_ROOT.glob("*/*.csv"))
+             for _, text, _ in read_legacy_csv(path)}
+    base = emb.embed(sorted(seeds) or [f"headline {i} about topic {i % 97}" for i in range(2000)])
+    rng = np.random.default_rng(0)
+
+    def sample(n):
+        a, b = base[rng.integers(len(base), size=n)], base[rng.integers(len(base), size=n)]
+        mix = rng.uniform(0, 0.5, (n, 1))
+        return _unit((1 - mix) * a + mix * b + rng.normal(0, 0.02, (n, HASH_DIM))).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp, SemanticIndex("bench", tmp) as idx:
+        t0 = time.perf_counter()
+        for i in range(0, rows, CHUNK):
+            n = min(CHUNK, rows - i)
+            idx._append(sample(n), np.full(n, int(time.time() * 1000)),
+                        [f"BENCH\t{j}" for j in range(i, i + n)])
+            idx._commit()
+        print(f"Built {idx.stats()} in {time.perf_counter() - t0:.1f}s")
+
+        qs = sample(queries)
+        t0 = time.perf_counter()
+        found = [idx.search_vector(q, k, nprobe)[0] for q in qs]
+        per_q = (time.perf_counter() - t0) / queries * 1000
+        check = qs[:50]
+        scores = np.concatenate([idx.decode(slice(i, i + CHUNK)) @ check.T
+                                 for i in range(0, idx.count, CHUNK)])
+        exact = np.argpartition(-scores, k - 1, axis=0)[:k].T
+        hit = sum(len(set(e) & set(got)) for e, got in zip(exact, found))
+        print(f"{queries} queries, k={k}, nprobe={nprobe}: {per_q:.2f} ms/query, "
+              f"recall@{k} {hit / (len(check) * k):.2%}")
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Semantic headline index")
+    ap.add_argument("--name", default="headlines")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="catch up on the store, then follow the bus")
+    r.add_argument("--embedder", help="hash[:dim] | openai[:model] | local:URL[#model] (new index only)")
+    r.add_argument("-k", type=int, default=TOP_K)
+    q = sub.add_parser("query", help="nearest stored headlines to TEXT")
+    q.add_argument("text")
+    q.add_argument("-k", type=int, default=10)
+    q.add_argument("--nprobe", type=int, default=NPROBE)
+    sub.add_parser("stats")
+    b = sub.add_parser("bench", help="query latency and recall on a synthetic index")
+    b.add_argument("--rows", type=int, default=1_000_000)
+    b.add_argument("--queries", type=int, default=500)
+    b.add_argument("-k", type=int, default=10)
+    b.add_argument("--nprobe", type=int, default=NPROBE)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "bench":
+        return bench(args.rows, args.queries, args.k, args.nprobe)
+    if args.cmd == "run":
+        with SemanticIndex(args.name, embedder=args.embedder) as idx:
+            try:
+                asyncio.run(run(idx, args.k))
+            except KeyboardInterrupt:
+                dbg("Stopped by user")
+        return
+
+    with SemanticIndex(args.name, readonly=True) as idx:
+        if args.cmd == "stats":
+            print(idx.stats())
+            return
+        t = time.perf_counter()
+        hits = idx.search(args.text, args.k, args.nprobe)
+        print(f"{len(hits)} neighbours in {(time.perf_counter() - t) * 1000:.1f} ms")
+        for h in hits:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(h.ts_ms / 1000))
+            print(f"{h.distance:.3f}  {stamp}  {h.source:<6} {h.text}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
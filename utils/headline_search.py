@@ -0,0 +1,368 @@
+"""
+headline_search.py – full-text inverted index over the headline store.
+
+    terms ──► posting list (doc ids, ascending)
+    doc id ──► (ts_ms, source, store cursor)
+
+Postings are ``array('I')`` per term and grow by appending – a new headline
+only touches its own terms.  A query intersects the posting lists shortest
+first (binary search into the longer list), applies the source / time
+filters on the doc columns with numpy, and returns ids newest first; only
+the page being shown is read back from the store.
+
+The index follows the store the same way the other readers do: catch up
+from its own cursor, then live events from the headline bus.  A snapshot
+(``data/search/<name>.npz``) is written every ``SAVE_INTERVAL`` seconds
+and on close, so a restart only re-reads what arrived since.
+
+Query syntax (all words must match, case-insensitive):
+
+    qatar lng                   both terms
+    qatar -lng                  without "lng"
+    source:rtrs  src:fly,nwk    source filter
+    since:7d  since:12h  since:2025-06-20   until:…   time filter
+    page:2                      pagination (CLI / !search)
+
+CLI:
+
+    python -m utils.headline_search build            # catch up and snapshot
+    python -m utils.headline_search query "qatar source:rtrs since:7d"
+    python -m utils.headline_search stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.headline_bus import BusSubscriber
+from utils.headline_store import PROJECT_ROOT, Cursor, Headline, HeadlineStore
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+SEARCH_DIR    = PROJECT_ROOT / "data" / "search"
+PAGE_SIZE     = 10
+CATCHUP_BATCH = 2_000         # records per step, the event loop runs in between
+SAVE_INTERVAL = 600           # seconds between snapshots while following
+
+_TERM = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_SPAN = re.compile(r"^(\d+(?:\.\d+)?)([mhdw])$")
+_UNIT = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def terms(text: str) -> List[str]:
+    return _TERM.findall(text.lower())
+
+
+# --------------------------------------------------------------------------- #
+# Query
+# --------------------------------------------------------------------------- #
+
+def parse_when(raw: str, now: Optional[float] = None) -> float:
+    """``7d`` / ``12h`` / ``30m`` / ``2w`` ago, or a ``YYYY-MM-DD[ HH:MM]`` date → epoch secs."""
+    m = _SPAN.match(raw.lower())
+    if m:
+        return (now or time.time()) - float(m.group(1)) * _UNIT[m.group(2)]
+    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(raw, fmt).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"bad time {raw!r} – use 7d, 12h, 30m or YYYY-MM-DD")
+
+
+@dataclass
+class Query:
+    include: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    since: Optional[float] = None
+    until: Optional[float] = None
+    page: int = 1
+
+    @classmethod
+    def parse(cls, text: str) -> "Query":
+        q = cls()
+        for tok in text.split():
+            key, sep, val = tok.partition(":")
+            key = key.lower()
+            if sep and key in ("source", "src"):
+                q.sources += [s.upper() for s in val.split(",") if s]
+            elif sep and key == "since":
+                q.since = parse_when(val)
+            elif sep and key == "until":
+                q.until = parse_when(val)
+            elif sep and key == "page" and val.isdigit():
+                q.page = max(1, int(val))
+            elif tok.startswith("-"):
+                q.exclude += terms(tok[1:])
+            else:
+                q.include += terms(tok)
+        return q
+
+    def __str__(self):
+        parts = self.include + [f"-{t}" for t in self.exclude]
+        if self.sources:
+            parts.append("source:" + ",".join(self.sources))
+        for key in ("since", "until"):
+            if getattr(self, key) is not None:
+                parts.append(f"{key}:{datetime.fromtimestamp(getattr(self, key)):%Y-%m-%d %H:%M}")
+        return " ".join(parts)
+
+
+@dataclass
+class Result:
+    query: Query
+    ids: np.ndarray                  # matching doc ids, store order
+    ts: np.ndarray                   # their timestamps (ms)
+    ms: float
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // PAGE_SIZE))
+
+    def page_ids(self, page: int) -> np.ndarray:
+        """Doc ids of one page (1-based), newest first – only the first
+        ``page * PAGE_SIZE`` hits are ever sorted."""
+        lo, hi = (page - 1) * PAGE_SIZE, min(page * PAGE_SIZE, self.total)
+        if hi <= lo:
+            return self.ids[:0]
+        top = np.argpartition(-self.ts, hi - 1)[:hi] if hi < self.total else np.arange(self.total)
+        top = top[np.argsort(-self.ts[top], kind="stable")]
+        return self.ids[top[lo:hi]]
+
+
+def _intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Sorted ``a ∩ b`` – binary search of the shorter in the longer."""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = 0
+    return a[b[pos] == a]
+
+
+# --------------------------------------------------------------------------- #
+# Index
+# --------------------------------------------------------------------------- #
+
+class HeadlineSearch:
+    """In-memory inverted index with a snapshot on disk; one per process."""
+
+    def __init__(self, name: str = "headlines", root: Path | str = SEARCH_DIR,
+                 store: Optional[HeadlineStore] = None):
+        self.path = Path(root) / f"{name}.npz"
+        self.store = store or HeadlineStore()
+        self.postings: Dict[str, array] = {}
+        self.ts = array("q")                 # per doc
+        self.src = array("B")                #   index into self.sources
+        self.seg = array("H")                #   index into self.segments
+        self.off = array("q")                #   byte offset in the segment
+        self.sources: List[str] = []
+        self.segments: List[str] = []
+        self._source_ids: Dict[str, int] = {}
+        self._segment_ids: Dict[str, int] = {}
+        self.cursor = Cursor("", 0)
+        self.dirty = False
+        self._saved = time.monotonic()
+        if self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _code(table: List[str], codes: Dict[str, int], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def add(self, recs: Sequence[Headline], cursor: Cursor):
+        """Index ``recs`` (link records are skipped) and move the cursor on."""
+        for rec in recs:
+            if rec.ref or not rec.text:
+                continue
+            doc = len(self.ts)
+            self.ts.append(rec.ts_ms)
+            self.src.append(self._code(self.sources, self._source_ids, rec.source))
+            self.seg.append(self._code(self.segments, self._segment_ids, rec.cursor.segment))
+            self.off.append(rec.cursor.offset)
+            for term in set(terms(rec.text)):
+                plist = self.postings.get(term)
+                if plist is None:
+                    plist = self.postings[term] = array("I")
+                plist.append(doc)
+        self.cursor = cursor
+        self.dirty = True
+
+    def catch_up(self, limit: Optional[int] = None) -> int:
+        """Index what the store has beyond our cursor; returns records read."""
+        recs, cursor = self.store.read_from(self.cursor, limit=limit)
+        if recs:
+            self.add(recs, cursor)
+        return len(recs)
+
+    async def follow(self):
+        """Catch up without blocking the event loop for long, then go live."""
+        while self.catch_up(CATCHUP_BATCH):
+            await asyncio.sleep(0)
+        self.save()
+        # the snapshot's cursor is the checkpoint – nothing is committed to data/checkpoints
+        sub = BusSubscriber("headline_search", store=self.store)
+        sub.tailer.position = self.cursor
+        async for rec in sub.events():
+            self.add([rec], rec.next_cursor)
+            if time.monotonic() - self._saved > SAVE_INTERVAL:
+                self.save()
+
+    # ------------------------------------------------------------------ #
+    def save(self):
+        if not self.dirty and self.path.exists():
+            return
+        names = list(self.postings)
+        lengths = np.fromiter((len(self.postings[t]) for t in names), np.uint32, len(names))
+        meta = {"cursor": list(self.cursor), "sources": self.sources, "segments": self.segments}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, meta=np.frombuffer(json.dumps(meta).encode(), np.uint8),
+                     terms=np.frombuffer("\n".join(names).encode(), np.uint8),
+                     lengths=lengths,
+                     postings=np.frombuffer(b"".join(self.postings[t].tobytes() for t in names), np.uint32),
+                     ts=np.frombuffer(self.ts, np.int64), src=np.frombuffer(self.src, np.uint8),
+                     seg=np.frombuffer(self.seg, np.uint16), off=np.frombuffer(self.off, np.int64))
+        os.replace(tmp, self.path)
+        self.dirty = False
+        self._saved = time.monotonic()
+
+    def load(self):
+        with np.load(self.path) as z:
+            meta = json.loads(z["meta"].tobytes())
+            names = z["terms"].tobytes().decode().split("\n") if z["terms"].size else []
+            blob = z["postings"].tobytes()
+            ends = np.cumsum(z["lengths"], dtype=np.int64) * 4
+            for name, lo, hi in zip(names, np.concatenate(([0], ends[:-1])), ends):
+                plist = self.postings[name] = array("I")
+                plist.frombytes(blob[lo:hi])
+            for col in ("ts", "src", "seg", "off"):
+                getattr(self, col).frombytes(z[col].tobytes())
+        self.cursor = Cursor(*meta["cursor"])
+        self.sources, self.segments = meta["sources"], meta["segments"]
+        self._source_ids = {v: i for i, v in enumerate(self.sources)}
+        self._segment_ids = {v: i for i, v in enumerate(self.segments)}
+        self.dirty = False
+
+    # ------------------------------------------------------------------ #
+    def _plist(self, term: str) -> np.ndarray:
+        plist = self.postings.get(term)
+        return np.frombuffer(plist, np.uint32) if plist else np.empty(0, np.uint32)
+
+    def search(self, query: Query | str) -> Result:
+        if isinstance(query, str):
+            query = Query.parse(query)
+        t0 = time.perf_counter()
+        lists = sorted((self._plist(t) for t in set(query.include)), key=len)
+        if lists:
+            ids = lists[0]
+            for plist in lists[1:]:
+                ids = _intersect(ids, plist)
+        else:
+            ids = slice(None)                         # filters only – whole columns
+        src = np.frombuffer(self.src, np.uint8)[ids]
+        ts = np.frombuffer(self.ts, np.int64)[ids]
+
+        keep = np.ones(len(ts), bool)
+        if query.sources:
+            wanted = np.zeros(256, bool)
+            wanted[[i for i, s in enumerate(self.sources) if s in query.sources]] = True
+            keep &= wanted[src]
+        if query.since is not None:
+            keep &= ts >= query.since * 1000
+        if query.until is not None:
+            keep &= ts < query.until * 1000
+        ids = np.flatnonzero(keep).astype(np.uint32) if not lists else ids[keep]
+        ts = ts[keep]
+        for term in set(query.exclude):
+            drop = np.isin(ids, self._plist(term), assume_unique=True)
+            ids, ts = ids[~drop], ts[~drop]
+        return Result(query, ids, ts, (time.perf_counter() - t0) * 1000)
+
+    def page(self, result: Result, page: Optional[int] = None) -> List[Headline]:
+        """Read back the headlines of one page (1-based) from the store."""
+        page = min(page or result.query.page, result.pages)
+        hits = []
+        for doc in result.page_ids(page):
+            rec = self.store.read_at(Cursor(self.segments[self.seg[doc]], self.off[doc]))
+            if rec is not None:
+                hits.append(rec)
+        return hits
+
+    def stats(self) -> str:
+        postings = sum(len(p) for p in self.postings.values())
+        return (f"{len(self):,} headlines, {len(self.postings):,} terms, {postings:,} postings, "
+                f"cursor {self.cursor.segment}@{self.cursor.offset:,}")
+
+
+def format_page(index: HeadlineSearch, result: Result, page: Optional[int] = None,
+                width: int = 160) -> str:
+    """Plain-text page for the CLI and the ``!search`` command."""
+    page = min(page or result.query.page, result.pages)
+    out = io.StringIO()
+    for rec in index.page(result, page):
+        text = rec.text if len(rec.text) <= width else rec.text[:width - 1] + "…"
+        out.write(f"{rec.ts:%Y-%m-%d %H:%M} {rec.source:<6} {text}\n")
+    out.write(f"– page {page}/{result.pages} · {result.total:,} hits · {result.ms:.1f} ms")
+    return out.getvalue()
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Full-text headline search")
+    ap.add_argument("--name", default="headlines")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="index everything new in the store and snapshot")
+    q = sub.add_parser("query", help="search; see module docstring for syntax")
+    q.add_argument("text", nargs="+")
+    sub.add_parser("stats")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    idx = HeadlineSearch(args.name)
+    loaded = len(idx)
+    while idx.catch_up(CATCHUP_BATCH * 10):
+        pass
+    print(f"{loaded:,} from snapshot, {len(idx) - loaded:,} caught up in "
+          f"{time.perf_counter() - t0:.1f}s – {idx.stats()}")
+    idx.save()
+    if args.cmd == "query":
+        print(format_page(idx, idx.search(" ".join(args.text))))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
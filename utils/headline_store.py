@@ -0,0 +1,598 @@
+"""
+headline_store.py – append-only, day-partitioned headline log shared by every
+monitor and publisher (replaces the flat ``monitors/headlines1.csv``).
+
+On-disk layout (``data/headlines/`` under the project root):
+
+    20250623.seg   one record per line:  <epoch_ms>\\t<SOURCE>\\t<headline>\\n
+    20250623.idx   sparse index – 16-byte little-endian (<epoch_ms, offset>)
+                   pairs, one for every record that crosses an INDEX_STRIDE
+                   boundary of the segment
+
+Writers only ever append whole lines with a single ``os.write`` on an
+``O_APPEND`` descriptor, inside the store's ``append.lock`` (Windows'
+``O_APPEND`` is seek-then-write, not atomic between processes, and the
+record's offset is read back with ``lseek``), so several monitors can
+share a segment – the broker normally, each monitor directly when the
+broker is down.  Readers
+memory-map the segments and use the sparse index to jump straight to the
+first record of interest, so tailing, range queries and start-up loads cost
+O(new data) instead of O(file size).
+
+CLI:
+
+    python -m utils.headline_store import monitors/headlines1.csv publishers/headlines.csv
+    python -m utils.headline_store tail
+
+Long-running readers should use ``StoreTailer``: it keeps the current segment
+mapped, hands back every complete record since the last poll in one batch and
+persists a (segment, offset, inode) checkpoint so a restart resumes exactly
+where the previous run stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:              # Windows
+    fcntl = None
+    import msvcrt
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+STORE_DIR    = PROJECT_ROOT / "data" / "headlines"
+CHECKPOINT_DIR = PROJECT_ROOT / "data" / "checkpoints"
+
+SEG_SUFFIX   = ".seg"
+IDX_SUFFIX   = ".idx"
+INDEX_STRIDE = 4096                  # bytes of segment data per index entry
+IDX_ENTRY    = struct.Struct("<qq")  # (epoch_ms, byte offset)
+TS_FMT       = "%Y-%m-%d %H:%M:%S"
+
+_O_BINARY = getattr(os, "O_BINARY", 0)     # Windows: no newline translation
+LOCK_NAME = "append.lock"
+
+
+# --------------------------------------------------------------------------- #
+# Cross-process lock
+# --------------------------------------------------------------------------- #
+
+class _FileLock:
+    """Exclusive across processes *and* threads.
+
+    flock / msvcrt.locking are held per descriptor, so threads sharing this
+    object would all get through; they queue on a thread lock first.
+    """
+
+    def __init__(self, path: Path):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread = threading.Lock()
+
+    def __enter__(self):
+        self._thread.acquire()
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        except BaseException:
+            self._thread.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread.release()
+
+    def close(self):
+        os.close(self._fd)
+
+
+# --------------------------------------------------------------------------- #
+# Records
+# --------------------------------------------------------------------------- #
+
+class Cursor(NamedTuple):
+    """Position in the store – segment day (``YYYYMMDD``) and byte offset."""
+    segment: str
+    offset: int
+
+
+@dataclass(frozen=True)
+class Headline:
+    ts_ms: int
+    source: str
+    text: str
+    cursor: Cursor                   # where the record starts
+    extra: Tuple[str, ...] = ()      # trailing fields added by newer writers
+    end: int = -1                    # offset just past the record's newline
+
+    @property
+    def next_cursor(self) -> Cursor:
+        """Cursor that resumes right after this record."""
+        return Cursor(self.cursor.segment, self.end)
+
+    @property
+    def ts(self) -> datetime:
+        return datetime.fromtimestamp(self.ts_ms / 1000)
+
+    @property
+    def stamp(self) -> str:
+        """Timestamp in the legacy CSV format (``YYYY-MM-DD HH:MM:SS``)."""
+        return self.ts.strftime(TS_FMT)
+
+    @property
+    def ref(self) -> Optional[str]:
+        """``SOURCE@ts_ms`` of the record this one repeats (``ref=`` field), if any.
+
+        Linked records are kept for the archive but are not news on their own.
+        """
+        return next((e[4:] for e in self.extra if e.startswith("ref=")), None)
+
+
+def _clean(field: str) -> str:
+    return " ".join(field.replace("\t", " ").split())
+
+
+def encode_record(ts_ms: int, source: str, text: str, *extra: str) -> bytes:
+    fields = [str(ts_ms), _clean(source).upper(), _clean(text)]
+    fields.extend(_clean(str(e)) for e in extra)
+    return ("\t".join(fields) + "\n").encode("utf-8")
+
+
+def decode_record(raw: bytes, cursor: Cursor) -> Optional[Headline]:
+    fields = raw.decode("utf-8", errors="replace").rstrip("\r\n").split("\t")
+    if len(fields) < 3 or not fields[0].isdigit():
+        return None
+    return Headline(int(fields[0]), fields[1], fields[2], cursor, tuple(fields[3:]),
+                    cursor.offset + len(raw) + 1)
+
+
+def segment_for(ts_ms: int) -> str:
+    return time.strftime("%Y%m%d", time.localtime(ts_ms / 1000))
+
+
+# --------------------------------------------------------------------------- #
+# Segment reader (memory-mapped)
+# --------------------------------------------------------------------------- #
+
+class _Segment:
+    """Read-only view of one ``.seg`` file plus its sparse index."""
+
+    def __init__(self, root: Path, name: str):
+        self.name = name
+        self.seg_path = root / f"{name}{SEG_SUFFIX}"
+        self.idx_path = root / f"{name}{IDX_SUFFIX}"
+        self._fh = None
+        self._mm: Optional[mmap.mmap] = None
+        self._idx_ts: List[int] = []
+        self._idx_off: List[int] = []
+        self._idx_read = 0           # bytes of .idx already loaded
+
+    # ------------------------------------------------------------------ #
+    def size(self) -> int:
+        try:
+            return self.seg_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _view(self) -> Optional[mmap.mmap]:
+        """Map the segment, re-mapping (not re-opening) only when it has grown."""
+        if self._fh is None:
+            if not self.seg_path.exists():
+                return None
+            self._fh = self.seg_path.open("rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        if size == 0:
+            return None
+        if self._mm is not None and len(self._mm) >= size:
+            return self._mm
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mmap.mmap(self._fh.fileno(), size, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def inode(self) -> int:
+        try:
+            return self.seg_path.stat().st_ino
+        except FileNotFoundError:
+            return 0
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    # ------------------------------------------------------------------ #
+    def _load_index(self):
+        """Pull in index entries written since the last call."""
+        try:
+            with self.idx_path.open("rb") as f:
+                f.seek(self._idx_read)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        usable = len(data) - len(data) % IDX_ENTRY.size
+        if not usable:
+            return
+        self._idx_read += usable
+        new = sorted(IDX_ENTRY.iter_unpack(data[:usable]), key=lambda e: e[1])
+        if self._idx_off and new[0][1] < self._idx_off[-1]:
+            # two writers raced on the index – rare, rebuild in offset order
+            new = sorted(list(zip(self._idx_ts, self._idx_off)) + new,
+                         key=lambda e: e[1])
+            self._idx_ts, self._idx_off = [], []
+        self._idx_ts.extend(ts_ms for ts_ms, _ in new)
+        self._idx_off.extend(off for _, off in new)
+
+    def seek_ts(self, ts_ms: int) -> int:
+        """Byte offset from which a scan will see every record >= ts_ms."""
+        self._load_index()
+        i = bisect.bisect_left(self._idx_ts, ts_ms)
+        return self._idx_off[i - 1] if i else 0
+
+    # ------------------------------------------------------------------ #
+    def scan(self, offset: int = 0) -> Iterator[Headline]:
+        """Yield complete records from ``offset`` to the current end."""
+        mm = self._view()
+        if mm is None:
+            return
+        end = len(mm)
+        pos = offset
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            if nl < 0:               # partial line still being written
+                break
+            rec = decode_record(mm[pos:nl], Cursor(self.name, pos))
+            pos = nl + 1
+            if rec is not None:
+                yield rec
+
+    def end_of_complete(self) -> int:
+        """Offset just past the last complete (newline-terminated) record."""
+        mm = self._view()
+        if mm is None:
+            return 0
+        return mm.rfind(b"\n") + 1
+
+    def last_ts(self) -> Optional[int]:
+        """Timestamp of the last complete record (None if there is none)."""
+        end = self.end_of_complete()
+        if not end:
+            return None
+        start = self._mm.rfind(b"\n", 0, end - 1) + 1
+        rec = decode_record(self._mm[start:end - 1], Cursor(self.name, start))
+        return rec.ts_ms if rec else None
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+class HeadlineStore:
+    """Single entry point for writing and reading headlines."""
+
+    def __init__(self, root: Path | str = STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._writers: dict[str, Tuple[int, int]] = {}   # name -> (seg fd, idx fd)
+        self._segments: dict[str, _Segment] = {}
+        self._lock: Optional[_FileLock] = None           # opened by the first append
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+    def _writer(self, name: str) -> Tuple[int, int]:
+        fds = self._writers.get(name)
+        if fds is None:
+            flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | _O_BINARY
+            fds = (os.open(self.root / f"{name}{SEG_SUFFIX}", flags, 0o644),
+                   os.open(self.root / f"{name}{IDX_SUFFIX}", flags, 0o644))
+            # only the current day's segment is kept open for appends
+            for old in list(self._writers):
+                for fd in self._writers.pop(old):
+                    os.close(fd)
+            self._writers[name] = fds
+        return fds
+
+    def append(self, headline: str, source: str,
+               ts: Optional[float] = None, *extra: str) -> Cursor:
+        """Append one headline and return its cursor.
+
+        ``ts`` (epoch seconds) defaults to *now*; pass it only when
+        back-filling, live writers should always use the wall clock so the
+        segments stay in time order for tailing readers.
+        """
+        ts_ms = int((time.time() if ts is None else ts) * 1000)
+        name = segment_for(ts_ms)
+        record = encode_record(ts_ms, source, headline, *extra)
+        if self._lock is None:
+            self._lock = _FileLock(self.root / LOCK_NAME)
+        with self._lock:                         # write + lseek as one step, all processes
+            seg_fd, idx_fd = self._writer(name)
+            os.write(seg_fd, record)
+            end = os.lseek(seg_fd, 0, os.SEEK_CUR)   # end of *our* write under O_APPEND
+            start = end - len(record)
+            if start == 0 or start // INDEX_STRIDE != end // INDEX_STRIDE:
+                os.write(idx_fd, IDX_ENTRY.pack(ts_ms, start))
+        return Cursor(name, start)
+
+    def close(self):
+        for fds in self._writers.values():
+            for fd in fds:
+                os.close(fd)
+        self._writers.clear()
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+        for seg in self._segments.values():
+            seg.close()
+        self._segments.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    def segments(self) -> List[str]:
+        return sorted(p.stem for p in self.root.glob(f"*{SEG_SUFFIX}"))
+
+    def _segment(self, name: str) -> _Segment:
+        seg = self._segments.get(name)
+        if seg is None:
+            seg = self._segments[name] = _Segment(self.root, name)
+        return seg
+
+    def end_cursor(self) -> Cursor:
+        """Cursor just past the newest complete record."""
+        names = self.segments()
+        if not names:
+            return Cursor(segment_for(int(time.time() * 1000)), 0)
+        return Cursor(names[-1], self._segment(names[-1]).end_of_complete())
+
+    def read_from(self, cursor: Optional[Cursor] = None,
+                  limit: Optional[int] = None) -> Tuple[List[Headline], Cursor]:
+        """Return records written after ``cursor`` and the cursor to resume at.
+
+        ``cursor=None`` starts at the very first record of the store.
+        """
+        cursor = cursor or Cursor("", 0)
+        out: List[Headline] = []
+        for name in self.segments():
+            if name < cursor.segment:
+                continue
+            start = cursor.offset if name == cursor.segment else 0
+            for rec in self._segment(name).scan(start):
+                out.append(rec)
+                if limit is not None and len(out) >= limit:
+                    return out, rec.next_cursor
+            seg = self._segment(name)
+            cursor = Cursor(name, max(start, seg.end_of_complete()))
+        return out, cursor
+
+    def read_at(self, cursor: Cursor) -> Optional[Headline]:
+        """The record starting at ``cursor`` (a ``Headline.cursor``), if any."""
+        return next(self._segment(cursor.segment).scan(cursor.offset), None)
+
+    def range(self, start: datetime | float,
+              end: datetime | float | None = None) -> Iterator[Headline]:
+        """Yield records with ``start <= ts < end`` (datetimes or epoch secs)."""
+        lo = int((start.timestamp() if isinstance(start, datetime) else start) * 1000)
+        hi = None
+        if end is not None:
+            hi = int((end.timestamp() if isinstance(end, datetime) else end) * 1000)
+        first = segment_for(lo)
+        for name in self.segments():
+            if name < first or (hi is not None and name > segment_for(hi)):
+                continue
+            seg = self._segment(name)
+            for rec in seg.scan(seg.seek_ts(lo)):
+                if rec.ts_ms < lo:
+                    continue
+                if hi is not None and rec.ts_ms >= hi:
+                    break
+                yield rec
+
+    def recent(self, seconds: float) -> List[Headline]:
+        return list(self.range(time.time() - seconds))
+
+
+# --------------------------------------------------------------------------- #
+# Checkpointed tailing
+# --------------------------------------------------------------------------- #
+
+class StoreTailer:
+    """Batch reader over the store with a persisted resume point.
+
+    ``poll()`` returns every complete record written since the previous poll
+    (a half-written trailing line is left for the next call).  The read
+    position only becomes durable through ``commit()``, so callers commit
+    once a record has actually been handled and a crash replays, never skips.
+    """
+
+    def __init__(self, store: HeadlineStore, name: str,
+                 checkpoint_dir: Path | str = CHECKPOINT_DIR,
+                 start_at_end: bool = True):
+        self.store = store
+        self.path = Path(checkpoint_dir) / f"{name}.json"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.position = self._load(start_at_end)
+        self.committed = self.position
+
+    # ------------------------------------------------------------------ #
+    def _load(self, start_at_end: bool) -> Cursor:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return self.store.end_cursor() if start_at_end else Cursor("", 0)
+        cursor = Cursor(state["segment"], int(state["offset"]))
+        seg = self.store._segment(cursor.segment)
+        if seg.inode() != state.get("inode") or cursor.offset > seg.size():
+            # segment was rebuilt or truncated – replay it from the top
+            return Cursor(cursor.segment, 0)
+        return cursor
+
+    def commit(self, cursor: Optional[Cursor] = None):
+        """Persist ``cursor`` (default: everything polled so far)."""
+        cursor = cursor or self.position
+        if cursor <= self.committed and self.path.exists():
+            return
+        state = {"segment": cursor.segment, "offset": cursor.offset,
+                 "inode": self.store._segment(cursor.segment).inode(),
+                 "saved": time.time()}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.committed = cursor
+
+    def poll(self, limit: Optional[int] = None) -> List[Headline]:
+        """Every complete record after the current position, oldest first."""
+        seg = self.store._segment(self.position.segment) if self.position.segment else None
+        if seg is not None:
+            # fast path: keep reading the open segment without listing the dir
+            batch: List[Headline] = []
+            for rec in seg.scan(self.position.offset):
+                batch.append(rec)
+                if limit is not None and len(batch) >= limit:
+                    break
+            if batch:
+                self.position = batch[-1].next_cursor
+                return batch
+        batch, self.position = self.store.read_from(self.position, limit)
+        return batch
+
+
+# --------------------------------------------------------------------------- #
+# Legacy CSV import
+# --------------------------------------------------------------------------- #
+
+_CSV_TS_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S")
+
+
+def parse_csv_ts(raw: str) -> Optional[datetime]:
+    for fmt in _CSV_TS_FORMATS:
+        try:
+            return datetime.strptime(raw.strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def read_legacy_csv(path: Path | str,
+                    default_source: str = "") -> Iterator[Tuple[datetime, str, str]]:
+    """Yield ``(ts, headline, source)`` from a ``ts,headline[,source]`` CSV."""
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            ts = parse_csv_ts(row[0])
+            if ts is None or not row[1].strip():
+                continue
+            source = row[2] if len(row) > 2 and row[2].strip() else default_source
+            yield ts, row[1].strip(), source.strip().upper()
+
+
+def import_csv(store: HeadlineStore, paths: Sequence[Path | str] | Path | str,
+               default_source: str = "") -> Dict[str, int]:
+    """Back-fill one or more legacy CSVs; rows per path.
+
+    Segments must stay in time order (``range`` bisects the sparse index and
+    stops at the first record past its end), so the rows of *all* files are
+    merged and sorted before anything is appended, and the import is refused
+    if a row would land before a record already in its segment.
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    counts: Dict[str, int] = {}
+    rows = []
+    for path in paths:
+        before = len(rows)
+        rows.extend((ts.timestamp(), headline, source)
+                    for ts, headline, source in read_legacy_csv(path, default_source))
+        counts[str(path)] = len(rows) - before
+    rows.sort(key=lambda r: r[0])
+    first: Dict[str, int] = {}
+    for ts, _, _ in rows:
+        first.setdefault(segment_for(int(ts * 1000)), int(ts * 1000))
+    for name, ts_ms in first.items():
+        last = store._segment(name).last_ts()
+        if last is not None and ts_ms < last:
+            raise ValueError(f"segment {name} already holds records up to "
+                             f"{datetime.fromtimestamp(last / 1000):{TS_FMT}}; importing "
+                             f"{datetime.fromtimestamp(ts_ms / 1000):{TS_FMT}} would break "
+                             f"its time order")
+    for ts, headline, source in rows:
+        store.append(headline, source, ts)
+    return counts
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Headline store utilities")
+    ap.add_argument("--root", default=str(STORE_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="back-fill from legacy CSV files")
+    imp.add_argument("paths", nargs="+")
+    imp.add_argument("--source", default="", help="source for 2-column CSVs (e.g. FLY)")
+    tail = sub.add_parser("tail", help="print new headlines as they arrive")
+    tail.add_argument("--from-start", action="store_true")
+    args = ap.parse_args(argv)
+
+    with HeadlineStore(args.root) as store:
+        if args.cmd == "import":
+            try:
+                counts = import_csv(store, args.paths, args.source)
+            except ValueError as e:
+                print(f"import refused: {e}", file=sys.stderr)
+                return 1
+            for p, n in counts.items():
+                print(f"{p}: {n:,} rows")
+            return
+        cursor = None if args.from_start else store.end_cursor()
+        try:
+            while True:
+                recs, cursor = store.read_from(cursor)
+                for r in recs:
+                    print(f"{r.stamp} [{r.source}] {r.text}", flush=True)
+                time.sleep(0.25)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+latency.py – per-headline stage timestamps and rolling latency histograms.
+
+Every headline carries epoch-ms stamps for the stages it went through:
+
+    source   time printed by the source (RTRS / FIATFEED ``HH:MM:SS``, audio
+             start for the squawk) – second resolution where it comes from
+             a clock on screen
+    capture  when our monitor saw it
+    dedup    after the shared dedup check
+    persist  when it hit the store (the record's own timestamp)
+    queue    when the publisher queued it for Discord
+    post     when Discord acknowledged the post
+
+Monitors write the first three into the store record as one trailing field
+(``lat=source:…,capture:…,dedup:…``); the publisher adds queue/post and
+feeds the lot to ``LatencyRecorder``, which keeps one log-bucketed histogram
+per (source, span) and writes a JSON line per interval to a size-rotated,
+gzipped metrics file.
+
+    stamps = Stamps().mark("capture")
+    ...
+    store.append(headline, "RTRS", None, stamps.mark("dedup").field())
+
+CLI:
+
+    python -m utils.latency report              # last hour, every source
+    python -m utils.latency report --since 1440 --source RTRS
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.headline_store import PROJECT_ROOT, Headline
+from utils.rotating_log import dump_logger
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+METRICS_FILE = PROJECT_ROOT / "data" / "metrics" / "latency.jsonl"
+FLUSH_EVERY  = 60.0           # seconds per histogram window in the metrics file
+STAGES       = ("source", "capture", "dedup", "persist", "queue", "post")
+FIELD_PREFIX = "lat="
+
+HIST_MIN_MS  = 0.01           # bucket 0 upper edge
+HIST_GROWTH  = 1.04           # ~4 % relative error per bucket
+
+# --------------------------------------------------------------------------- #
+# Stamps
+# --------------------------------------------------------------------------- #
+
+class Stamps(dict):
+    """stage name → epoch milliseconds."""
+
+    def mark(self, stage: str, t: Optional[float] = None) -> "Stamps":
+        """Record ``stage`` at ``t`` (epoch seconds, default now)."""
+        self[stage] = int((time.time() if t is None else t) * 1000)   # truncated, like ts_ms
+        return self
+
+    def field(self) -> str:
+        """The store record field for these stamps."""
+        return FIELD_PREFIX + ",".join(f"{s}:{self[s]}" for s in STAGES if s in self)
+
+    @classmethod
+    def parse(cls, rec: Headline) -> "Stamps":
+        stamps = cls()
+        for e in rec.extra:
+            if e.startswith(FIELD_PREFIX):
+                for pair in e[len(FIELD_PREFIX):].split(","):
+                    stage, _, ms = pair.partition(":")
+                    if ms.isdigit():
+                        stamps[stage] = int(ms)
+        # a record written with a caller-supplied timestamp says nothing about
+        # when it was persisted
+        if "persist" not in stamps and rec.ts_ms >= max(stamps.values(), default=0):
+            stamps["persist"] = rec.ts_ms
+        return stamps
+
+    def spans(self) -> List[Tuple[str, float]]:
+        """(``a→b``, ms) between consecutive present stages, plus ``total``."""
+        present = [s for s in STAGES if s in self]
+        out = [(f"{a}→{b}", float(self[b] - self[a])) for a, b in zip(present, present[1:])]
+        if len(present) > 2:
+            out.append(("total", float(self[present[-1]] - self[present[0]])))
+        return out
+
+
+def source_time(hhmmss: str, now: Optional[datetime] = None) -> datetime:
+    """Today's (or, just after midnight, yesterday's) datetime for a feed stamp."""
+    now = now or datetime.now()
+    h, m, s = map(int, hhmmss.split(":"))
+    ts = now.replace(hour=h, minute=m, second=s, microsecond=0)
+    if ts > now + timedelta(seconds=5):        # a few seconds of clock skew is fine
+        ts -= timedelta(days=1)
+    return ts
+
+
+# --------------------------------------------------------------------------- #
+# Histogram
+# --------------------------------------------------------------------------- #
+
+class Histogram:
+    """Sparse log-bucketed histogram of millisecond values."""
+
+    __slots__ = ("counts", "n", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.n = 0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(ms: float) -> int:
+        if ms <= HIST_MIN_MS:
+            return 0
+        return 1 + int(math.log(ms / HIST_MIN_MS, HIST_GROWTH))
+
+    @staticmethod
+    def upper(bucket: int) -> float:
+        return HIST_MIN_MS * HIST_GROWTH ** bucket
+
+    def add(self, ms: float):
+        self.counts[self.bucket(ms)] += 1
+        self.n += 1
+        self.max = max(self.max, ms)
+
+    def merge(self, other: "Histogram"):
+        for b, c in other.counts.items():
+            self.counts[b] += c
+        self.n += other.n
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        if not self.n:
+            return float("nan")
+        rank = math.ceil(p / 100 * self.n)
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= rank:
+                return min(self.upper(b), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "max": round(self.max, 3),
+                "p50": round(self.percentile(50), 3), "p95": round(self.percentile(95), 3),
+                "p99": round(self.percentile(99), 3), "b": dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Histogram":
+        h = cls()
+        for b, c in d.get("b", {}).items():
+            h.counts[int(b)] += c
+        h.n, h.max = d.get("n", 0), d.get("max", 0.0)
+        return h
+
+
+# --------------------------------------------------------------------------- #
+# Recorder
+# --------------------------------------------------------------------------- #
+
+class LatencyRecorder:
+    """Aggregates stamps per (source, span); one JSON line per window."""
+
+    def __init__(self, path: Path | str = METRICS_FILE, interval: float = FLUSH_EVERY):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.log = dump_logger(f"latency.{Path(path).stem}", path)
+        self.interval = interval
+        self._hists: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self._t0 = time.time()
+
+    def observe(self, source: str, stamps: Stamps):
+        for span, ms in stamps.spans():
+            self._hists[(source, span)].add(max(ms, 0.0))   # source clocks can run ahead
+        if time.time() - self._t0 >= self.interval:
+            self.flush()
+
+    def flush(self):
+        now = time.time()
+        if self._hists:
+            out: Dict[str, Dict[str, dict]] = defaultdict(dict)
+            for (source, span), h in self._hists.items():
+                out[source][span] = h.to_dict()
+            self.log.info(json.dumps({"t0": round(self._t0, 3), "t1": round(now, 3),
+                                      "hist": out}, ensure_ascii=False))
+        self._hists.clear()
+        self._t0 = now
+
+    def close(self):
+        self.flush()
+
+
+# --------------------------------------------------------------------------- #
+# Report
+# --------------------------------------------------------------------------- #
+
+def _metric_files(path: Path) -> List[Path]:
+    rotated = sorted(path.parent.glob(path.name + ".*.gz"),
+                     key=lambda p: int(p.suffixes[-2][1:]), reverse=True)
+    return rotated + ([path] if path.exists() else [])
+
+
+def _windows(path: Path) -> Iterator[dict]:
+    for f in _metric_files(path):
+        opener = gzip.open if f.suffix == ".gz" else open
+        with opener(f, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def report(path: Path = METRICS_FILE, since_min: float = 60,
+           source: Optional[str] = None) -> str:
+    cutoff = time.time() - since_min * 60
+    merged: Dict[str, Dict[str, Histogram]] = defaultdict(lambda: defaultdict(Histogram))
+    for w in _windows(path):
+        if w.get("t1", 0) < cutoff:
+            continue
+        for src, spans in w["hist"].items():
+            if source and src != source.upper():
+                continue
+            for span, d in spans.items():
+                merged[src][span].merge(Histogram.from_dict(d))
+
+    if not merged:
+        return f"No latency samples in the last {since_min:g} min ({path})"
+    order = {f"{a}→{b}": i for i, (a, b) in enumerate(zip(STAGES, STAGES[1:]))}
+    lines = []
+    for src in sorted(merged):
+        spans = merged[src]
+        total = spans.get("total")
+        lines.append(f"\n{src}  ({total.n if total else max(h.n for h in spans.values()):,} headlines)")
+        lines.append(f"  {'stage':<18} {'n':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}  share")
+        t50 = total.percentile(50) if total else 0
+        for span in sorted(spans, key=lambda s: order.get(s, 99)):
+            h = spans[span]
+            share = f"{h.percentile(50) / t50 * 100:5.1f}%" if t50 and span != "total" else ""
+            lines.append(f"  {span:<18} {h.n:>7,} " +
+                         " ".join(f"{_fmt(h.percentile(p)):>10}" for p in (50, 95, 99)) +
+                         f" {_fmt(h.max):>10}  {share}")
+    return "\n".join(lines)
+
+
+def _fmt(ms: float) -> str:
+    if ms != ms:                               # nan
+        return "-"
+    if ms < 1:
+        return f"{ms * 1000:.0f}µs"
+    if ms < 1000:
+        return f"{ms:.1f}ms"
+    return f"{ms / 1000:.2f}s"
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Headline latency metrics")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rep = sub.add_parser("report", help="per-source, per-stage latency breakdown")
+    rep.add_argument("--since", type=float, default=60, help="minutes (default 60)")
+    rep.add_argument("--source", help="only this source (RTRS, FLY, SQUAWK, NWK…)")
+    rep.add_argument("--file", type=Path, default=METRICS_FILE)
+    args = ap.parse_args(argv)
+    print(report(args.file, args.since, args.source))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
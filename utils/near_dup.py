@@ -0,0 +1,313 @@
+"""
+near_dup.py – shared near-duplicate headline detector (MinHash + LSH).
+
+``DedupIndex`` only catches exact repeats.  RTRS re-sends the same story
+with small edits, truncated ("… CITING DEFENCE MINISTR") or with a date
+suffix ("… 11 May 2025"); those should not be posted twice either.
+
+Each headline is normalised to its tokens (case, punctuation and a trailing
+date dropped) and summarised as a 32-value MinHash signature, cut into 16
+bands of 2 rows.  Two headlines become candidates when any band is equal,
+so a lookup touches 16 hash slots however many headlines are indexed.
+Candidates are then confirmed exactly on the normalised text:
+
+  * one is a prefix of the other (a truncated or extended re-send), or
+  * token Jaccard >= ``threshold`` and the shorter one's numbers all appear
+    in the longer – "CPI 3.1%" is not a duplicate of "CPI 3.2%"
+
+Like ``DedupIndex`` everything lives in one memory-mapped file per namespace
+(``data/dedup/<name>.lsh``) shared by every process, at a fixed size:
+
+    header   64 bytes
+    ring     CAPACITY x 192 bytes – (ts_ms, normalised text, band keys)
+    bands    BANDS x BAND_SLOTS x uint32 – ring index + 1 per LSH bucket
+
+~5 MB in total for 16k headlines.  Entries older than ``window`` never match
+and are overwritten in ring order.  Each entry keeps its band keys rather
+than its signature, so a probe checks a slot with two ``unpack_from`` calls
+(timestamp, one key) and only candidates have their text decoded.
+
+CLI:
+
+    python -m utils.near_dup scan --hours 24        # near-dups in the store
+    python -m utils.near_dup check "HEADLINE TEXT"
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import re
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from utils.dedup_index import DEDUP_DIR, _FileLock
+from utils.headline_store import HeadlineStore
+
+# --------------------------------------------------------------------------- #
+# Configuration
+# --------------------------------------------------------------------------- #
+
+THRESHOLD   = 0.85            # token Jaccard at which two headlines are one story
+WINDOW      = 6 * 3600        # seconds a headline can suppress its near-duplicates
+MIN_PREFIX  = 24              # characters a truncated headline needs to count
+CAPACITY    = 1 << 14         # ring entries (~ a few days of every source)
+BANDS, ROWS = 16, 2
+PERMS       = BANDS * ROWS
+BAND_SLOTS  = 1 << 15         # per band – 2x capacity keeps probes short
+PROBE       = 8
+TEXT_BYTES  = 118             # normalised text kept per entry for verification
+
+MAGIC   = b"FANEAR02"                         # 01 stored signatures, not band keys
+HEADER  = struct.Struct("<8sqqqq")            # magic, capacity, band_slots, window, next
+HEADER_SIZE = 64
+NEXT_OFF = 32
+ENTRY   = struct.Struct(f"<qH{TEXT_BYTES}s{BANDS}I")   # ts_ms, text len, text, band keys
+ENTRY_SIZE = ENTRY.size
+TEXT    = struct.Struct(f"<H{TEXT_BYTES}s")
+TEXT_OFF = 8
+KEYS_OFF = TEXT_OFF + TEXT.size
+_TS     = struct.Struct("<q")
+_KEY    = struct.Struct("<I")
+
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 2**63, PERMS, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, PERMS, dtype=np.uint64)
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+_DATE  = re.compile(rf"[\s\-–,(]*(?:\d{{1,2}}\s+{_MONTH}\s+\d{{4}}|{_MONTH}\s+\d{{1,2}},?\s+\d{{4}})\)?\s*$")
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+(?:[.,]\d+)*%?")
+
+
+# --------------------------------------------------------------------------- #
+# Normalisation / signatures
+# --------------------------------------------------------------------------- #
+
+def normalize(headline: str) -> str:
+    """Lower-case tokens joined by single spaces, trailing date removed."""
+    return " ".join(_TOKEN.findall(_DATE.sub("", headline.casefold())))
+
+
+def _clip(text: str) -> str:
+    """``text`` cut to what an entry stores (whole UTF-8 characters)."""
+    return text.encode("utf-8")[:TEXT_BYTES].decode("utf-8", "ignore")
+
+
+def minhash(text: str) -> np.ndarray:
+    x = np.fromiter({zlib.crc32(t.encode("utf-8")) for t in text.split()}, dtype=np.uint64)
+    mixed = (_A[:, None] * x[None, :] + _B[:, None]) >> np.uint64(32)   # wraps mod 2^64
+    return mixed.min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    rows = sig.reshape(BANDS, ROWS).astype(np.uint64)
+    keys = (rows[:, 0] * np.uint64(0x9E3779B1) ^ rows[:, 1]) + np.arange(BANDS, dtype=np.uint64)
+    return (keys & np.uint64(0xFFFFFFFF)).tolist()
+
+
+def similarity(a: str, b: str) -> float:
+    """1.0 for a prefix re-send, else token Jaccard; 0 if numbers disagree.
+
+    ``a`` and ``b`` are ``normalize``d; either may be cut at ``TEXT_BYTES``.
+    """
+    short, long_ = sorted((_clip(a), _clip(b)), key=len)
+    if len(short) >= MIN_PREFIX and long_.startswith(short):
+        return 1.0
+    ts, tl = short.split(), long_.split()
+    if len(short.encode("utf-8")) >= TEXT_BYTES - 1:
+        ts = ts[:-1]                          # the last token may be cut in half
+    nums_s = {t for t in ts if t[0].isdigit()}
+    if not nums_s <= {t for t in tl if t[0].isdigit()}:
+        return 0.0
+    ss, sl = set(ts), set(tl)
+    return len(ss & sl) / len(ss | sl) if ss else 0.0
+
+
+@dataclass
+class Match:
+    score: float
+    age: float                         # seconds since the earlier headline
+    text: str                          # its normalised (possibly clipped) text
+
+
+# --------------------------------------------------------------------------- #
+# Index
+# --------------------------------------------------------------------------- #
+
+class NearDupIndex:
+    """Shared MinHash-LSH index of recent headlines."""
+
+    def __init__(self, name: str = "headlines", root: Path | str = DEDUP_DIR,
+                 threshold: float = THRESHOLD, window: float = WINDOW,
+                 capacity: int = CAPACITY, band_slots: int = BAND_SLOTS):
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        self.path = root / f"{name}.lsh"
+        self.threshold = threshold
+        self._lock = _FileLock(root / f"{name}.lsh.lock")
+        with self._lock:
+            if not self.path.exists() or self.path.stat().st_size == 0 or self._outdated():
+                self._create(capacity, band_slots, int(window))
+            self._fh = self.path.open("r+b")
+            self._mm = mmap.mmap(self._fh.fileno(), 0)
+        magic, self.capacity, self.band_slots, window_s, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise RuntimeError(f"{self.path} is not a near-dup index")
+        self.window_ms = window_s * 1000       # geometry/window come from the file
+        self._ring_off = HEADER_SIZE
+        self._bands = np.ndarray((BANDS, self.band_slots), dtype=np.uint32, buffer=self._mm,
+                                 offset=HEADER_SIZE + self.capacity * ENTRY_SIZE)
+
+    def _outdated(self) -> bool:
+        """An index written by an older layout – rebuilt from empty."""
+        with self.path.open("rb") as f:
+            magic = f.read(len(MAGIC))
+        return magic.startswith(MAGIC[:6]) and magic != MAGIC
+
+    def _create(self, capacity: int, band_slots: int, window: int):
+        size = HEADER_SIZE + capacity * ENTRY_SIZE + BANDS * band_slots * 4
+        with self.path.open("wb") as f:
+            f.write(HEADER.pack(MAGIC, capacity, band_slots, window, 0))
+            f.truncate(size)
+
+    def close(self):
+        del self._bands
+        self._mm.close()
+        self._fh.close()
+        self._lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Ring entries
+    # ------------------------------------------------------------------ #
+    def _text(self, idx: int) -> str:
+        n, raw = TEXT.unpack_from(self._mm, self._ring_off + idx * ENTRY_SIZE + TEXT_OFF)
+        return raw[:n].decode("utf-8", "ignore")
+
+    def _write_entry(self, idx: int, ts_ms: int, text: str, keys: List[int]):
+        raw = _clip(text).encode("utf-8")
+        ENTRY.pack_into(self._mm, self._ring_off + idx * ENTRY_SIZE, ts_ms, len(raw), raw, *keys)
+
+    # ------------------------------------------------------------------ #
+    # Lookup / insert (caller holds the lock)
+    # ------------------------------------------------------------------ #
+    def _lookup(self, text: str, keys: List[int], now_ms: int):
+        """Best live match for ``text`` plus the slot per band a new entry goes in."""
+        found, free = {}, []
+        mm, ring, window = self._mm, self._ring_off, self.window_ms
+        for band, key in enumerate(keys):
+            row = self._bands[band]
+            start = key % self.band_slots
+            victim, victim_ts = None, None
+            for i in range(PROBE):
+                slot = (start + i) % self.band_slots
+                ref = int(row[slot])
+                if not ref:                                  # never used – end of run
+                    if victim_ts is None or victim_ts >= 0:
+                        victim = slot
+                    break
+                base = ring + (ref - 1) * ENTRY_SIZE
+                ts = _TS.unpack_from(mm, base)[0]
+                if now_ms - ts >= window:
+                    ts = -1                                  # expired – reusable
+                elif ref not in found and _KEY.unpack_from(mm, base + KEYS_OFF + 4 * band)[0] == key:
+                    found[ref] = ts                          # not overwritten since
+                if victim is None or ts < victim_ts:
+                    victim, victim_ts = slot, ts
+            free.append(victim)
+
+        best: Optional[Match] = None
+        for ref, ts in found.items():
+            other = self._text(ref - 1)
+            score = similarity(text, other)
+            if score >= self.threshold and (best is None or score > best.score):
+                best = Match(score, (now_ms - ts) / 1000, other)
+        return best, free
+
+    def _insert(self, text: str, keys: List[int], ts_ms: int, free: List[int]):
+        nxt = HEADER.unpack_from(self._mm, 0)[4]
+        idx = nxt % self.capacity
+        self._write_entry(idx, ts_ms, text, keys)
+        struct.pack_into("<q", self._mm, NEXT_OFF, nxt + 1)
+        for band, slot in enumerate(free):
+            self._bands[band, slot] = idx + 1
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def check(self, headline: str) -> Optional[Match]:
+        """Closest earlier headline within the window at/above threshold, if any."""
+        text = normalize(headline)
+        if not text:
+            return None
+        with self._lock:
+            return self._lookup(text, band_keys(minhash(text)), int(time.time() * 1000))[0]
+
+    def seen(self, headline: str, ts: Optional[float] = None) -> Optional[Match]:
+        """Record ``headline``; the near-duplicate it repeats, if one was indexed."""
+        text = normalize(headline)
+        if not text:
+            return None
+        keys = band_keys(minhash(text))
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            match, free = self._lookup(text, keys, now_ms)
+            self._insert(text, keys, now_ms if ts is None else int(ts * 1000), free)
+        return match
+
+    def __contains__(self, headline: str) -> bool:
+        return self.check(headline) is not None
+
+    def add(self, headline: str, ts: Optional[float] = None):
+        self.seen(headline, ts)
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def main(argv: Optional[list[str]] = None):
+    ap = argparse.ArgumentParser(description="Near-duplicate headline index")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    scan = sub.add_parser("scan", help="list near-duplicates among recent store headlines")
+    scan.add_argument("--hours", type=float, default=24)
+    chk = sub.add_parser("check", help="is this headline a near-dup of a recent one?")
+    chk.add_argument("headline")
+    chk.add_argument("--name", default="headlines")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "check":
+        with NearDupIndex(args.name, threshold=args.threshold) as idx:
+            m = idx.check(args.headline)
+        print(f"near-dup of {m.text!r} ({m.score:.2f}, {m.age:.0f}s ago)" if m else "new")
+        return
+
+    # a throw-away index, so scanning never marks anything in the live one
+    n = dups = 0
+    with tempfile.TemporaryDirectory() as tmp, HeadlineStore() as store, \
+            NearDupIndex("scan", tmp, args.threshold, window=args.hours * 3600) as idx:
+        for rec in store.recent(args.hours * 3600):
+            n += 1
+            m = idx.seen(rec.text)
+            if m and normalize(rec.text) != m.text:        # exact repeats are DedupIndex's
+                dups += 1
+                print(f"{m.score:.2f}  {rec.text}\n      ≈ {m.text}")
+    print(f"\n{dups:,} near-duplicates in {n:,} headlines")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
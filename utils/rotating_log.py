@@ -0,0 +1,53 @@
+"""
+rotating_log.py – size-rotated, gzip-compressed log/dump files.
+
+    handler = compressed_rotating_handler("control_dump_v2.csv")
+    logger.addHandler(handler)
+
+``control_dump_v2.csv`` is the live file; rotated generations become
+``control_dump_v2.csv.1.gz`` … ``.N.gz`` and the oldest is deleted, so disk
+use is bounded at roughly ``max_bytes * (1 + backups * ratio)``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import shutil
+from logging.handlers import RotatingFileHandler
+
+MAX_BYTES = 5 * 1024 * 1024
+BACKUPS   = 20
+
+
+def _namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def compressed_rotating_handler(path: str | os.PathLike,
+                                max_bytes: int = MAX_BYTES,
+                                backups: int = BACKUPS,
+                                fmt: str = "%(message)s") -> RotatingFileHandler:
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                  encoding="utf-8")
+    handler.namer = _namer
+    handler.rotator = _rotator
+    handler.setFormatter(logging.Formatter(fmt))
+    return handler
+
+
+def dump_logger(name: str, path: str | os.PathLike, **kw) -> logging.Logger:
+    """Stand-alone logger that only writes to its own rotating file."""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(compressed_rotating_handler(path, **kw))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger